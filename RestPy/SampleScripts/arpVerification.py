@@ -0,0 +1,131 @@
+"""
+arpVerification.py
+
+Description
+   Bulk IPv4 ARP and IPv6 neighbor discovery verification.
+
+   verifyArp.py used to walk every Topology -> DeviceGroup -> Ethernet -> Ipv4/Ipv6 with a .find()
+   per object and then read Address.Values once per failed device.  This module reads the
+   status and SessionInfo of every stack with a single select operation and joins them by index in
+   memory.  The Address patterns of the stacks that have failures are read with one more select,
+   and the failed addresses are computed from them (see multivaluePattern.py).  Only the stacks
+   whose pattern is not modeled, such as random, read their Address values, one request per stack.
+
+   The number of REST round trips does not grow with the number of topologies, device groups
+   or devices.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from arpVerification import getArpFailures, printArpFailures
+
+   arpFailures = getArpFailures(session.Ixnetwork)
+   printArpFailures(arpFailures)
+"""
+
+from batchSelect import select, walk, childRegex, getMultivalueValues
+from multivaluePattern import readPatterns
+
+# The SessionInfo value of a device that failed ARP/ND
+arpFailedStatus = 'resolveMacFailed'
+
+
+def getArpFailures(uhd, stacks=None, failedStatus=arpFailedStatus):
+    """
+    Description
+        Get every IPv4/IPv6 device that failed ARP or ND in all started device groups.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        stacks: (list): The ip stacks to verify: ipv4 and/or ipv6. Defaults to both.
+        failedStatus: (str): The SessionInfo value that marks a failed device.
+
+    Return
+        A list of dicts, one per ip stack that has failures:
+            {'stack': 'ipv4',
+             'href': '/api/v1/sessions/1/ixnetwork/topology/1/deviceGroup/1/ethernet/1/ipv4/1',
+             'topology': 'Topo1', 'deviceGroup': 'DG1', 'ethernet': 'Eth1', 'name': 'Ipv4',
+             'failedIndexes': [3, 7],
+             'failedAddresses': ['1.1.1.4', '1.1.1.8']}
+
+        An empty list means that every device resolved its gateway.
+    """
+    if stacks is None:
+        stacks = ['ipv4', 'ipv6']
+
+    children = [{'child': childRegex(['topology', 'deviceGroup', 'ethernet']),
+                 'properties': ['name', 'status'],
+                 'filters': []},
+                {'child': childRegex(stacks),
+                 'properties': ['name', 'sessionInfo', 'address', 'count'],
+                 'filters': []}]
+    response = select(uhd, children=children)
+
+    arpFailures = []
+    for stack in stacks:
+        for ipObj, parents in walk(response, ['topology', 'deviceGroup', 'ethernet', stack]):
+            root, topology, deviceGroup, ethernet = parents
+
+            # Verify if the device group is enabled/started
+            if deviceGroup.get('status') != 'started':
+                continue
+
+            failedIndexes = [index for index, sessionInfo in enumerate(ipObj.get('sessionInfo', []))
+                             if sessionInfo == failedStatus]
+            if len(failedIndexes) == 0:
+                continue
+
+            arpFailures.append({'stack': stack,
+                                'href': ipObj['href'],
+                                'topology': topology.get('name'),
+                                'deviceGroup': deviceGroup.get('name'),
+                                'ethernet': ethernet.get('name'),
+                                'name': ipObj.get('name'),
+                                'failedIndexes': failedIndexes,
+                                'address': ipObj['address']})
+
+    # The addresses of all failing stacks from their patterns, without reading their values
+    patterns = readPatterns(uhd, [eachFailure['address'] for eachFailure in arpFailures], strict=False)
+    for eachFailure, pattern in zip(arpFailures, patterns):
+        addressHref = eachFailure.pop('address')
+        if pattern is not None:
+            eachFailure['failedAddresses'] = [pattern.valueAt(index) for index in eachFailure['failedIndexes']]
+        else:
+            eachFailure['failedAddresses'] = getAddresses(uhd, addressHref, eachFailure['failedIndexes'])
+
+    return arpFailures
+
+
+def getAddresses(uhd, addressHref, indexes):
+    """
+    Description
+        Map device indexes to their addresses with one request.
+        Only the span between the lowest and the highest failed index is read.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        addressHref: (str): The Address multivalue href of an ip stack.
+        indexes: (list): Sorted device indexes.
+    """
+    start = indexes[0]
+    values = getMultivalueValues(uhd, addressHref, start=start, count=indexes[-1] - start + 1)
+    return [values[index - start] for index in indexes]
+
+
+def printArpFailures(arpFailures):
+    if arpFailures == []:
+        print('\nNo ARP failures')
+        return
+
+    print('\nARP failures:')
+    for eachFailure in arpFailures:
+        print('\t{}/{}/{}/{}: {}'.format(eachFailure['topology'], eachFailure['deviceGroup'],
+                                        eachFailure['ethernet'], eachFailure['name'],
+                                        ', '.join(eachFailure['failedAddresses'])))
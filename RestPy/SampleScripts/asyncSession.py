@@ -0,0 +1,210 @@
+"""
+asyncSession.py
+
+Description
+   An asyncio API over session.Ixnetwork, to overlap the latency of independent requests.
+
+   Every restpy call is a blocking request, one at a time.  Reading the SessionInfo of 500 device
+   groups one by one, or many statistic views, waits for every round trip in turn.
+
+   AsyncIxnetwork runs the requests of the restpy connection on a pool of 'concurrency' threads,
+   each with a keep-alive HTTP connection, and returns coroutines:
+      - read_async, update_async, create_async, delete_async and execute_async take a url.
+      - ixn.Topology.DeviceGroup.find_async(Name='^DG1$') finds the nodes of a path with one select,
+        filtered like restpy find().
+      - ixn.node(href) reads, updates and runs operations on one node.
+   At most 'concurrency' requests are sent at the same time.  ratePerSecond limits how many requests
+   start per second, with bursts of up to 'burst' requests, so that many coroutines do not flood
+   the API server.  The sync session.Ixnetwork API keeps working alongside.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 3.7+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   import asyncio
+   from asyncSession import AsyncIxnetwork
+
+   async def readSessionInfo(uhd):
+       async with AsyncIxnetwork(uhd, concurrency=16, ratePerSecond=200) as ixn:
+           deviceGroups = await ixn.Topology.DeviceGroup.find_async()
+           return await asyncio.gather(*[ixn.node(deviceGroup['href']).Ethernet.Ipv4.find_async()
+                                         for deviceGroup in deviceGroups])
+
+   ipv4s = asyncio.run(readSessionInfo(session.Ixnetwork))
+"""
+
+import asyncio, time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    HTTPAdapter = None
+
+from batchSelect import selectUrl, walk, lowerCamel
+
+
+class RateLimiter(object):
+    def __init__(self, ratePerSecond, burst=None):
+        """
+        A token bucket: 'ratePerSecond' tokens per second, at most 'burst' saved up.
+
+        Parameters
+            ratePerSecond: (float): Requests started per second.
+            burst: (int): Requests that can start at once after an idle time. Defaults to 1.
+        """
+        self.ratePerSecond = float(ratePerSecond)
+        self.burst = burst if burst is not None else 1
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        """Wait for a token. Return the seconds waited"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        start = time.monotonic()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.ratePerSecond)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return now - start
+                await asyncio.sleep((1 - self._tokens) / self.ratePerSecond)
+
+
+class AsyncNode(object):
+    """A node, or a path of child nodes under a node, such as ixn.Topology.DeviceGroup"""
+    def __init__(self, client, href, path=()):
+        self._client = client
+        self.href = href
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return AsyncNode(self._client, self.href, self._path + (lowerCamel(name),))
+
+    async def find_async(self, **filters):
+        """
+        Description
+            Find the nodes at the end of the path with one select, like restpy find().
+
+        Parameters
+            filters: Property names and regex values. Ex: Name='^DG1$'
+
+        Return
+            A list of dicts with the properties and the href of every node found.
+        """
+        if len(self._path) == 0:
+            raise ValueError('find_async needs a child path, such as ixn.Topology.find_async()')
+        children = [{'child': '^{}$'.format(child), 'properties': [], 'filters': []} for child in self._path[:-1]]
+        children.append({'child': '^{}$'.format(self._path[-1]), 'properties': ['*'],
+                         'filters': [{'property': lowerCamel(name), 'regex': regex} for name, regex in filters.items()]})
+        payload = {'selects': [{'from': self.href, 'properties': [], 'children': children, 'inlines': []}]}
+        response = (await self._client.execute_async(selectUrl(self.href), payload))[0]
+        return [node for node, parents in walk(response, list(self._path))]
+
+    def _nodeHref(self):
+        if len(self._path) > 0:
+            raise ValueError('{}: find_async the nodes of a child path first'.format('/'.join(self._path)))
+        return self.href
+
+    async def read_async(self):
+        return await self._client.read_async(self._nodeHref())
+
+    async def update_async(self, **properties):
+        return await self._client.update_async(self._nodeHref(), dict((lowerCamel(name), value) for name, value in properties.items()))
+
+    async def execute_async(self, operation, payload=None):
+        """Run an operation of the node. Ex: await ixn.node(topologyHref).execute_async('start', {'arg1': [topologyHref]})"""
+        return await self._client.execute_async('{}/operations/{}'.format(self._nodeHref(), operation), payload or {})
+
+
+class AsyncIxnetwork(object):
+    def __init__(self, uhd, concurrency=8, ratePerSecond=None, burst=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            concurrency: (int): The most requests at the same time, and the size of the connection pool.
+            ratePerSecond: (float): The most requests started per second. None is no limit.
+            burst: (int): The requests that can start at once within ratePerSecond. Defaults to concurrency.
+        """
+        self._uhd = uhd
+        self.href = uhd.href
+        self._connection = uhd._connection
+        self._concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+        self._rateLimiter = RateLimiter(ratePerSecond, burst if burst is not None else concurrency) if ratePerSecond else None
+        self._semaphore = None
+        self._loop = None
+        self._inFlight = 0
+        self.stats = {'requests': 0, 'maxInFlight': 0, 'rateLimitedSeconds': 0.0}
+
+        # One keep-alive connection per worker thread instead of the 10 of the default pool
+        session = getattr(self._connection, '_session', None)
+        if session is not None and HTTPAdapter is not None:
+            for prefix in ('http://', 'https://'):
+                session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+
+    def __getattr__(self, name):
+        # ixn.Topology is the Topology path under the root node
+        if name[:1].isupper():
+            return getattr(AsyncNode(self, self.href), name)
+        raise AttributeError(name)
+
+    def node(self, href):
+        """An AsyncNode for one href, such as the href of a node returned by find_async"""
+        return AsyncNode(self, href)
+
+    async def _call(self, function, *args):
+        # A semaphore belongs to one event loop, such as the loop of one asyncio.run()
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+            if self._rateLimiter is not None:
+                self._rateLimiter._lock = None
+
+        async with self._semaphore:
+            if self._rateLimiter is not None:
+                self.stats['rateLimitedSeconds'] += await self._rateLimiter.acquire()
+            self._inFlight += 1
+            self.stats['requests'] += 1
+            self.stats['maxInFlight'] = max(self.stats['maxInFlight'], self._inFlight)
+            try:
+                return await loop.run_in_executor(self._executor, function, *args)
+            finally:
+                self._inFlight -= 1
+
+    async def read_async(self, url=None):
+        return await self._call(self._connection._read, url or self.href)
+
+    async def update_async(self, url, payload):
+        return await self._call(self._connection._update, url, payload)
+
+    async def create_async(self, url, payload):
+        return await self._call(self._connection._create, url, payload)
+
+    async def delete_async(self, url, payload=None):
+        return await self._call(self._connection._delete, url, payload)
+
+    async def execute_async(self, url, payload):
+        return await self._call(self._connection._execute, url, payload)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
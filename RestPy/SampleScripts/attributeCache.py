@@ -0,0 +1,242 @@
+"""
+attributeCache.py
+
+Description
+   An opt-in read-through cache of node attributes, with a time to live per attribute.
+
+   Scripts read the same attributes again and again: uhd.Globals.BuildNumber, the DisplayName of
+   templates, deviceGroup.Status, quickTestHandle.Results.CurrentActions twice per loop.  With
+   restpy each of these selects the node again.
+
+   AttributeCache reads a node with one GET and keeps all its attributes.  Each attribute has a
+   time to live in seconds, from attributeTtls or the ttls of the cache:
+      - None: cached for the life of the cache, such as buildNumber and displayName.
+      - 0:    never cached, such as status, sessionInfo and currentActions.  This is the default.
+      - n:    cached for n seconds.
+   A GET of a node that is already in flight is not sent again: the callers that ask for it while
+   it runs wait for the same response.  set() and execute() through the cache invalidate the node
+   and its children.  The stats of the cache count the hits, misses and coalesced reads, overall
+   and per attribute, to tune the ttls.
+
+   Note: Changes made without the cache, by restpy or by another client, are not seen before the
+   time to live of an attribute runs out.  Give a short time to live to attributes that can change.
+   A new config replaces every node: invalidateAttributeCache(uhd) forgets the cache of the session
+   after NewConfig or LoadConfig.  SessionPool and the config loaders of this directory call it.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from attributeCache import getAttributeCache
+
+   cache = getAttributeCache(uhd)
+   buildNumber = cache.node(uhd.href + '/globals').BuildNumber         # One GET for the session
+   results = cache.node(quickTestHandle).child('Results')
+   currentActions = results.CurrentActions                             # One GET per read
+   deviceGroup = cache.node(deviceGroupObj)
+   deviceGroup.Name = 'DG1'                                            # PATCH and invalidate
+   print(cache.stats)
+"""
+
+import time, threading
+
+from batchSelect import rootHref, lowerCamel
+
+# The seconds an attribute stays cached, by REST attribute name.  None is forever, 0 is never
+attributeTtls = {
+    # Fixed for a server build or a session
+    'buildNumber': None,
+    'displayName': None,
+    'templateName': None,
+    'fieldTypeId': None,
+    'applicationType': None,
+    'userName': None,
+    # Live states and counters
+    'status': 0,
+    'state': 0,
+    'sessionInfo': 0,
+    'sessionStatus': 0,
+    'stateCounts': 0,
+    'currentActions': 0,
+    'progress': 0,
+    'isRunning': 0,
+    'connectionState': 0,
+}
+
+_lock = threading.Lock()
+# {ixnetwork root href: AttributeCache}
+_caches = {}
+
+
+def getAttributeCache(uhd, **kwargs):
+    """The process-wide AttributeCache of the session. kwargs are used when it is created"""
+    root = rootHref(uhd.href)
+    with _lock:
+        if root not in _caches:
+            _caches[root] = AttributeCache(uhd, **kwargs)
+        return _caches[root]
+
+
+def invalidateAttributeCache(uhd):
+    """Forget every node of the process-wide AttributeCache of the session, such as after NewConfig or LoadConfig"""
+    with _lock:
+        cache = _caches.get(rootHref(uhd.href))
+    if cache is not None:
+        cache.invalidate()
+
+
+class _Read(object):
+    """A GET in flight, shared by every caller that asks for the same node while it runs"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.properties = None
+        self.error = None
+
+
+class AttributeCache(object):
+    def __init__(self, uhd, ttls=None, defaultTtl=0):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            ttls: (dict): {REST attribute name: seconds}. Added to and overriding attributeTtls.
+            defaultTtl: (int): The seconds of the attributes with no ttl. 0 never caches them.
+        """
+        self._uhd = uhd
+        self.ttls = dict(attributeTtls)
+        self.ttls.update(ttls or {})
+        self.defaultTtl = defaultTtl
+        self._lock = threading.Lock()
+        # {href: {attribute: (value, read time)}}
+        self._nodes = {}
+        # {href: _Read}
+        self._inFlight = {}
+        # {href: number of invalidations}, so that a GET sent before a write is not cached after it
+        self._generations = {}
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'requests': 0, 'invalidations': 0, 'attributes': {}}
+
+    def ttl(self, attribute):
+        return self.ttls.get(attribute, self.defaultTtl)
+
+    def _count(self, attribute, result):
+        self.stats[result] += 1
+        counts = self.stats['attributes'].setdefault(attribute, {'hits': 0, 'misses': 0, 'coalesced': 0})
+        counts[result] += 1
+
+    def get(self, href, attribute):
+        """
+        Description
+            Read an attribute of a node, from the cache while its time to live lasts.
+
+        Parameters
+            href: (str): The node href.
+            attribute: (str): The REST attribute name. Ex: buildNumber
+        """
+        ttl = self.ttl(attribute)
+        with self._lock:
+            cached = self._nodes.get(href, {}).get(attribute)
+            if cached is not None and ttl != 0 and (ttl is None or time.time() - cached[1] < ttl):
+                self._count(attribute, 'hits')
+                return cached[0]
+
+            read = self._inFlight.get(href)
+            owner = read is None
+            if owner:
+                read = self._inFlight[href] = _Read()
+                generation = self._generations.get(href, 0)
+                self.stats['requests'] += 1
+            self._count(attribute, 'misses' if owner else 'coalesced')
+
+        if owner:
+            try:
+                read.properties = self._uhd._connection._read(href)
+            except Exception as errMsg:
+                read.error = errMsg
+            with self._lock:
+                del self._inFlight[href]
+                if read.error is None and self._generations.get(href, 0) == generation:
+                    now = time.time()
+                    self._nodes[href] = dict((name, (value, now)) for name, value in read.properties.items())
+            read.done.set()
+        else:
+            read.done.wait()
+
+        if read.error is not None:
+            raise read.error
+        if attribute not in read.properties:
+            raise AttributeError('{} has no attribute {}'.format(href, attribute))
+        return read.properties[attribute]
+
+    def invalidate(self, href=None):
+        """Forget a node and its children, or every node"""
+        with self._lock:
+            self.stats['invalidations'] += 1
+            for cachedHref in list(self._nodes) + list(self._inFlight):
+                if href is None or cachedHref == href or cachedHref.startswith(href + '/'):
+                    self._nodes.pop(cachedHref, None)
+                    self._generations[cachedHref] = self._generations.get(cachedHref, 0) + 1
+
+    def set(self, href, properties):
+        """Update attributes of a node on the server and invalidate the node. properties: {REST attribute name: value}"""
+        try:
+            return self._uhd._connection._update(href, properties)
+        finally:
+            self.invalidate(href)
+
+    def execute(self, href, operation, payload=None):
+        """Run an operation of a node and invalidate the node and its children"""
+        try:
+            return self._uhd._connection._execute('{}/operations/{}'.format(href, operation), payload or {})
+        finally:
+            self.invalidate(href)
+
+    def node(self, node):
+        """
+        Description
+            A CachedNode for an href or a restpy object.  Attributes are read with their restpy
+            names, such as BuildNumber, through the cache.
+        """
+        if isinstance(node, CachedNode):
+            return node
+        return CachedNode(self, getattr(node, 'href', node), getattr(node, '_SDM_ATT_MAP', None))
+
+
+class CachedNode(object):
+    def __init__(self, cache, href, attributeMap=None):
+        """
+        Parameters
+            cache: The AttributeCache.
+            href: (str): The node href.
+            attributeMap: (dict): {restpy attribute name: REST attribute name}, the _SDM_ATT_MAP of a restpy class.
+                          Without it the REST name is the restpy name with a lower case first letter.
+        """
+        object.__setattr__(self, '_cache', cache)
+        object.__setattr__(self, 'href', href)
+        object.__setattr__(self, '_attributeMap', attributeMap or {})
+
+    def _restName(self, name):
+        return self._attributeMap.get(name, lowerCamel(name))
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._cache.get(self.href, self._restName(name))
+
+    def __setattr__(self, name, value):
+        self._cache.set(self.href, {self._restName(name): value})
+
+    def child(self, name, index=None):
+        """A singleton child such as child('Results'), or child('DeviceGroup', 1)"""
+        href = '{}/{}'.format(self.href, lowerCamel(name))
+        return CachedNode(self._cache, href if index is None else '{}/{}'.format(href, index))
+
+    def execute(self, operation, payload=None):
+        return self._cache.execute(self.href, operation, payload)
+
+    def invalidate(self):
+        self._cache.invalidate(self.href)
@@ -0,0 +1,173 @@
+"""
+batchSelect.py
+
+Description
+   Helpers to read many UHD objects with as few REST round trips as possible.
+
+   Every restpy .find() and .refresh() is one request per object.  The API server also
+   offers a select operation that takes a list of "from" hrefs and a list of child
+   regexes, and returns the whole matching subtree in a single POST:
+
+       POST /api/v1/sessions/{id}/ixnetwork/operations/select
+       {"selects": [{"from": "/api/v1/sessions/1/ixnetwork",
+                     "properties": [],
+                     "children": [{"child": "^(topology|deviceGroup)$", "properties": ["*"], "filters": []}],
+                     "inlines": []}]}
+
+   The functions below wrap that operation and flatten the nested response so that
+   callers can join the results in memory.  importConfig() is the write side: it updates
+   any number of nodes, addressed by xpath, with one resourceManager importConfig POST.
+   lowerCamel() and stringTypes are shared by the modules built on these helpers.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+"""
+
+import json
+
+try:
+    stringTypes = (str, unicode)
+except NameError:
+    stringTypes = (str,)
+
+
+def lowerCamel(name):
+    """The REST name of a restpy attribute or class name. Ex: DeviceGroup -> deviceGroup"""
+    return name[0].lower() + name[1:]
+
+
+def rootHref(href):
+    """
+    Description
+        Return the /api/v1/sessions/{id}/ixnetwork part of any href.
+    """
+    if 'ixnetwork' not in href:
+        return href
+
+    return href[0:href.index('ixnetwork') + len('ixnetwork')]
+
+
+def selectUrl(href, xpath=False):
+    return '{}/operations/select?xpath={}'.format(rootHref(href), str(xpath).lower())
+
+
+def select(uhd, fromHref=None, children=None, properties=None, inlines=None, xpath=False):
+    """
+    Description
+        Run one select operation and return the response for the "from" node.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        fromHref: (str): Where to start the select. Defaults to the ixnetwork root.
+        children: (list): Child select dicts: {'child': regex, 'properties': [...], 'filters': [...]}. Defaults to none.
+        properties: (list): Properties to read on the "from" node. Defaults to none.
+        inlines: (list): Inline select dicts, e.g. {'child': 'multivalue', 'properties': ['format', 'pattern']}. Defaults to none.
+        xpath: (bool): Include the xpath of every returned node.
+
+    Return
+        A dict with the requested properties and one list per matching child name.
+    """
+    if fromHref is None:
+        fromHref = uhd.href
+
+    payload = {'selects': [{'from': fromHref,
+                            'properties': properties if properties is not None else [],
+                            'children': children if children is not None else [],
+                            'inlines': inlines if inlines is not None else []}]}
+    return uhd._connection._execute(selectUrl(fromHref, xpath), payload)[0]
+
+
+def selectMany(uhd, hrefs, properties=None, xpath=False):
+    """
+    Description
+        Read the properties of many unrelated objects in one request.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        hrefs: (list): The hrefs to read.
+        properties: (list): Properties to read on every href. Defaults to all of them: ['*']
+
+    Return
+        A list of property dicts in the same order as hrefs.
+    """
+    if len(hrefs) == 0:
+        return []
+    if properties is None:
+        properties = ['*']
+
+    selects = []
+    for href in hrefs:
+        selects.append({'from': href, 'properties': properties, 'children': [], 'inlines': []})
+
+    return uhd._connection._execute(selectUrl(hrefs[0], xpath), {'selects': selects})
+
+
+def childRegex(childNames):
+    return '^({})$'.format('|'.join(childNames))
+
+
+def walk(node, path, parents=()):
+    """
+    Description
+        Flatten a nested select response along a path of child names.
+
+    Parameters
+        node: (dict): A select response node.
+        path: (list): The child names to descend through. Ex: ['topology', 'deviceGroup', 'ethernet']
+
+    Return
+        A generator of (node, parents) tuples for every node at the end of the path,
+        where parents is a tuple of the ancestor nodes along the path.
+    """
+    if len(path) == 0:
+        yield node, parents
+        return
+
+    children = node.get(path[0], [])
+    if isinstance(children, dict):
+        children = [children]
+
+    for child in children:
+        for result in walk(child, path[1:], parents + (node,)):
+            yield result
+
+
+def getMultivalueValues(uhd, multivalueHref, start=0, count=None):
+    """
+    Description
+        Get the values of a single multivalue with one request.
+        The same operation restpy uses for Multivalue.Values, but with a start index and
+        count so that callers can ask for only the slice they need.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        multivalueHref: (str): /api/v1/sessions/{id}/ixnetwork/multivalue/{id}
+        start: (int): The first index to read.
+        count: (int): How many values to read. Required by the server.
+    """
+    payload = {'arg1': multivalueHref, 'arg2': start, 'arg3': count}
+    return uhd._connection._execute('{}/operations/getvalues'.format(multivalueHref), payload)
+
+
+def importConfig(uhd, config, createNew=False):
+    """
+    Description
+        Update many nodes with one request. The same operation as
+        uhd.ResourceManager.ImportConfig(json.dumps(config), False) without reading the
+        resourceManager node first.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        config: (list): Dicts with an xpath and the attributes to set.
+                Ex: [{'xpath': "/vport[1]", 'name': 'Port_1'}]
+        createNew: (bool): True replaces the whole configuration.
+    """
+    resourceManager = '{}/resourceManager'.format(rootHref(uhd.href))
+    payload = {'arg1': resourceManager, 'arg2': json.dumps(config), 'arg3': createNew}
+    return uhd._connection._execute('{}/operations/importconfig'.format(resourceManager), payload)
@@ -0,0 +1,102 @@
+"""
+benchArpVerification.py
+
+Description
+   Compare the REST round trips and wall-clock time of the per-object ARP walk that
+   verifyArp.py used to do against arpVerification.getArpFailures(), using the local
+   mock REST server in mockRestServer.py.
+
+   The per-object walk issues one .find() per topology, device group and ethernet, one per
+   ipv4/ipv6 stack and one Address.Values read per failed device.  The bulk verification
+   issues one select, one select of the Address patterns and, since the mock multivalues have
+   no pattern, one getvalues per failing stack.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchArpVerification.py
+"""
+
+import time
+
+from mockRestServer import MockRestServer, MockConnection
+from batchSelect import select
+from arpVerification import getArpFailures
+
+# Emulated API server round trip latency in seconds
+latency = 0.002
+
+# (topologies, device groups per topology, devices per device group)
+scales = [(2, 1, 10), (4, 8, 100), (8, 32, 250), (16, 64, 1000)]
+
+# Every Nth device fails ARP on every Nth device group
+failEvery = 50
+
+
+def buildConfig(server, topologies, deviceGroups, devices):
+    for t in range(topologies):
+        topology = server.add(server.root, 'topology', name='Topo{}'.format(t + 1))
+        for d in range(deviceGroups):
+            deviceGroup = server.add(topology, 'deviceGroup', name='DG{}'.format(d + 1), status='started',
+                                     multiplier=devices)
+            ethernet = server.add(deviceGroup, 'ethernet', name='Eth{}'.format(d + 1))
+
+            sessionInfo = ['none'] * devices
+            if d % failEvery == 0:
+                for index in range(0, devices, failEvery):
+                    sessionInfo[index] = 'resolveMacFailed'
+
+            addresses = ['{}.{}.{}.{}'.format(t + 1, d // 256, d % 256, index % 256) for index in range(devices)]
+            server.add(ethernet, 'ipv4', name='Ipv4', count=devices, sessionInfo=sessionInfo,
+                       address=server.addMultivalue(addresses))
+
+
+def perObjectWalk(uhd):
+    """The request pattern of the original verifyArp.py loop"""
+    def find(href, child):
+        return select(uhd, href, children=[{'child': '^{}$'.format(child), 'properties': ['*'], 'filters': []}]).get(child, [])
+
+    arpFailedList = []
+    for topology in find(uhd.href, 'topology'):
+        for deviceGroup in find(topology['href'], 'deviceGroup'):
+            if deviceGroup['status'] != 'started':
+                continue
+
+            for ethernet in find(deviceGroup['href'], 'ethernet'):
+                for stack in ['ipv4', 'ipv6']:
+                    for ipObj in find(ethernet['href'], stack):
+                        for index, arpFailed in enumerate(ipObj['sessionInfo']):
+                            if arpFailed == 'resolveMacFailed':
+                                payload = {'arg1': ipObj['address'], 'arg2': 0, 'arg3': ipObj['count']}
+                                values = uhd._connection._execute('{}/operations/getvalues'.format(ipObj['address']), payload)
+                                arpFailedList.append(values[index])
+    return arpFailedList
+
+
+def measure(server, function, uhd):
+    server.resetCounters()
+    start = time.time()
+    result = function(uhd)
+    return result, server.requestCount, time.time() - start
+
+
+if __name__ == '__main__':
+    print('{:>28} | {:>16} | {:>16}'.format('topologies x DGs x devices', 'walk requests/s', 'bulk requests/s'))
+    for topologies, deviceGroups, devices in scales:
+        server = MockRestServer(latency=latency).start()
+        try:
+            buildConfig(server, topologies, deviceGroups, devices)
+            uhd = MockConnection(server).Ixnetwork
+
+            walkResult, walkRequests, walkTime = measure(server, perObjectWalk, uhd)
+            bulkResult, bulkRequests, bulkTime = measure(server, getArpFailures, uhd)
+
+            bulkAddresses = [address for eachFailure in bulkResult for address in eachFailure['failedAddresses']]
+            assert bulkAddresses == walkResult
+
+            print('{:>28} | {:>7} {:>7.2f}s | {:>7} {:>7.2f}s'.format(
+                '{} x {} x {}'.format(topologies, deviceGroups, devices),
+                walkRequests, walkTime, bulkRequests, bulkTime))
+        finally:
+            server.stop()
@@ -0,0 +1,85 @@
+"""
+benchAsyncSession.py
+
+Description
+   Compare reading the SessionInfo of many device groups one request at a time, like the sync
+   restpy API does, with asyncSession.AsyncIxnetwork at several concurrency limits.
+
+   The mock REST server in mockRestServer.py stands in for the API server, with 'latency' seconds
+   per request.  It serves requests at the same time, so the ideal speedup is the concurrency
+   limit.  The last run adds a rate limit of 'ratePerSecond' requests per second.
+
+Requirements:
+   - Python 3.7+
+
+Usage:
+   - Enter: python benchAsyncSession.py [deviceGroups] [latency]
+"""
+
+import sys, time, asyncio
+
+from mockRestServer import MockRestServer, MockConnection
+from asyncSession import AsyncIxnetwork
+
+deviceGroupCount = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+concurrencies = [1, 2, 4, 8, 16, 32, 64]
+ratePerSecond = 200
+
+
+def buildConfig(server):
+    topology = server.add(server.root, 'topology', name='Topo1')
+    for index in range(deviceGroupCount):
+        deviceGroup = server.add(topology, 'deviceGroup', name='DG{}'.format(index + 1), status='started')
+        ethernet = server.add(deviceGroup, 'ethernet', name='Eth{}'.format(index + 1))
+        server.add(ethernet, 'ipv4', name='Ipv4', sessionInfo=['none'] * 10)
+
+
+def readSync(uhd, hrefs):
+    return [uhd._connection._read(href)['sessionInfo'] for href in hrefs]
+
+
+async def findIpv4s(uhd):
+    async with AsyncIxnetwork(uhd) as ixn:
+        return await ixn.Topology.DeviceGroup.Ethernet.Ipv4.find_async()
+
+
+async def readAsync(uhd, hrefs, concurrency, ratePerSecond=None):
+    async with AsyncIxnetwork(uhd, concurrency=concurrency, ratePerSecond=ratePerSecond) as ixn:
+        ipv4s = await asyncio.gather(*[ixn.node(href).read_async() for href in hrefs])
+        return [ipv4['sessionInfo'] for ipv4 in ipv4s], ixn.stats
+
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency).start()
+    try:
+        buildConfig(server)
+        uhd = MockConnection(server).Ixnetwork
+
+        # The ipv4 hrefs, found with one select
+        ipv4s = asyncio.run(findIpv4s(uhd))
+        hrefs = [ipv4['href'] for ipv4 in ipv4s]
+        assert len(hrefs) == deviceGroupCount
+        print('Read the SessionInfo of {} device groups, latency {}s'.format(deviceGroupCount, latency))
+
+        start = time.time()
+        expected = readSync(uhd, hrefs)
+        syncSeconds = time.time() - start
+        print('   {:24} {:7.2f}s'.format('Sync', syncSeconds))
+
+        for concurrency in concurrencies:
+            start = time.time()
+            result, stats = asyncio.run(readAsync(uhd, hrefs, concurrency))
+            seconds = time.time() - start
+            assert result == expected and stats['maxInFlight'] <= concurrency
+            print('   {:24} {:7.2f}s  speedup {:5.1f}x of {}x'.format('Async concurrency {}'.format(concurrency),
+                                                                     seconds, syncSeconds / seconds, concurrency))
+
+        start = time.time()
+        result, stats = asyncio.run(readAsync(uhd, hrefs, concurrencies[-1], ratePerSecond=ratePerSecond))
+        seconds = time.time() - start
+        assert result == expected
+        print('   {:24} {:7.2f}s  {:.0f} requests per second, {} limit after a burst of {}'.format(
+            'Async {}/s'.format(ratePerSecond), seconds, len(hrefs) / seconds, ratePerSecond, concurrencies[-1]))
+    finally:
+        server.stop()
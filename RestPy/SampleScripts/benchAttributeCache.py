@@ -0,0 +1,124 @@
+"""
+benchAttributeCache.py
+
+Description
+   Compare the requests of a polling loop that reads node attributes uncached, like restpy does,
+   with attributeCache.AttributeCache.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  Every iteration of the
+   loop reads uhd.Globals.BuildNumber, the DisplayName of some protocol templates, the Status of
+   a device group and the CurrentActions of a QuickTest twice.  Then 'threads' threads read the
+   same CurrentActions at the same time, to show the coalesced GETs, and a write through the
+   cache checks that the next read sees it.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchAttributeCache.py [iterations] [templates] [threads]
+"""
+
+import sys, time, threading
+
+from mockRestServer import MockRestServer, MockConnection
+from attributeCache import AttributeCache
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+templateCount = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+threadCount = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+latency = 0.005
+
+
+def buildConfig(server):
+    server.addSingleton(server.root, 'globals', buildNumber='1.0.0.100', username='admin')
+    traffic = server.addSingleton(server.root, 'traffic')
+    for index in range(templateCount):
+        server.add(traffic, 'protocolTemplate', displayName='Template {}'.format(index), templateName='template{}.xml'.format(index))
+    topology = server.add(server.root, 'topology', name='Topo1')
+    deviceGroup = server.add(topology, 'deviceGroup', name='DG1', status='started')
+    quickTest = server.addSingleton(server.root, 'quickTest')
+    rfcTest = server.add(quickTest, 'rfc2544throughput', name='RFC')
+    server.addSingleton(rfcTest, 'results', currentActions=[{'arg1': 0, 'arg2': 'TransmittingFrames'}], isRunning=True)
+    return deviceGroup['href'], rfcTest['href']
+
+
+def pollUncached(uhd, deviceGroupHref, rfcTestHref):
+    read = uhd._connection._read
+    for iteration in range(iterations):
+        read('{}/globals'.format(uhd.href))['buildNumber']
+        for index in range(1, templateCount + 1):
+            read('{}/traffic/protocolTemplate/{}'.format(uhd.href, index))['displayName']
+        read(deviceGroupHref)['status']
+        read('{}/results'.format(rfcTestHref))['currentActions']
+        read('{}/results'.format(rfcTestHref))['currentActions']
+
+
+def pollCached(cache, uhd, deviceGroupHref, rfcTestHref):
+    globalsNode = cache.node('{}/globals'.format(uhd.href))
+    templates = [cache.node('{}/traffic/protocolTemplate/{}'.format(uhd.href, index)) for index in range(1, templateCount + 1)]
+    deviceGroup = cache.node(deviceGroupHref)
+    results = cache.node(rfcTestHref).child('Results')
+    for iteration in range(iterations):
+        globalsNode.BuildNumber
+        for template in templates:
+            template.DisplayName
+        deviceGroup.Status
+        results.CurrentActions
+        results.CurrentActions
+
+
+def measure(server, function, *args):
+    server.resetCounters()
+    start = time.time()
+    function(*args)
+    return server.requestCount, time.time() - start
+
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency).start()
+    try:
+        deviceGroupHref, rfcTestHref = buildConfig(server)
+        uhd = MockConnection(server).Ixnetwork
+        print('{} iterations reading BuildNumber, {} DisplayNames, Status and CurrentActions twice, latency {}s'.format(
+            iterations, templateCount, latency))
+
+        requests, seconds = measure(server, pollUncached, uhd, deviceGroupHref, rfcTestHref)
+        print('   Uncached:        {:6} requests {:6.2f}s'.format(requests, seconds))
+        cache = AttributeCache(uhd)
+        cachedRequests, cachedSeconds = measure(server, pollCached, cache, uhd, deviceGroupHref, rfcTestHref)
+        print('   AttributeCache:  {:6} requests {:6.2f}s  {:.1f}x'.format(cachedRequests, cachedSeconds, seconds / cachedSeconds))
+        cache = AttributeCache(uhd, ttls={'currentActions': 0.5})
+        shortRequests, shortSeconds = measure(server, pollCached, cache, uhd, deviceGroupHref, rfcTestHref)
+        print('   CurrentActions cached 0.5s: {:6} requests {:6.2f}s'.format(shortRequests, shortSeconds))
+        print('   {:16} {:>6} {:>6} {:>9}'.format('Attribute', 'Hits', 'Misses', 'Coalesced'))
+        for attribute, counts in sorted(cache.stats['attributes'].items()):
+            print('   {:16} {:6} {:6} {:9}'.format(attribute, counts['hits'], counts['misses'], counts['coalesced']))
+
+        # Many threads reading a live attribute at the same time share the GETs in flight
+        cache = AttributeCache(uhd)
+        results = cache.node(rfcTestHref).child('Results')
+
+        def reader():
+            for read in range(20):
+                results.CurrentActions
+
+        server.resetCounters()
+        threads = [threading.Thread(target=reader) for thread in range(threadCount)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print('\n   {} threads x 20 reads of CurrentActions: {} requests, {} coalesced'.format(
+            threadCount, server.requestCount, cache.stats['coalesced']))
+
+        # A write through the cache invalidates the node
+        deviceGroup = cache.node(deviceGroupHref)
+        cache.ttls['name'] = None
+        assert deviceGroup.Name == 'DG1'
+        deviceGroup.Name = 'DG-renamed'
+        assert deviceGroup.Name == 'DG-renamed'
+        server.node(deviceGroupHref)['status'] = 'stopped'
+        assert deviceGroup.Status == 'stopped'
+        print('   A write through the cache and a live Status change are read back: OK')
+    finally:
+        server.stop()
@@ -0,0 +1,83 @@
+"""
+benchConfigIndex.py
+
+Description
+   Measure configIndex.ConfigIndex on the bundled JSON configs and on a synthetic config
+   'scale' times larger, without an API server.
+
+   The synthetic config repeats the topologies of bgp_ngpf_8.50.json 'scale' times and
+   renumbers their xpaths, multivalue sources included.
+
+   For every config the script reports the parse time and memory of json.loads, the index
+   build time and memory, and the time of a few find-style queries.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchConfigIndex.py [scale]
+"""
+
+import os, sys, json, time, timeit, tracemalloc
+
+from configIndex import ConfigIndex
+
+scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def syntheticConfig(text, scale):
+    """Repeat the topologies of a config scale times"""
+    config = json.loads(text)
+    topologies = config['topology']
+    scaled = []
+    for copy in range(scale):
+        for topology in topologies:
+            index = len(scaled) + 1
+            original = topology['xpath']
+            scaled.append(json.loads(json.dumps(topology).replace(original + '/', '/topology[{}]/'.format(index))
+                                                   .replace('"{}"'.format(original), '"/topology[{}]"'.format(index))
+                                                   .replace("'{} ".format(original), "'/topology[{}] ".format(index))))
+    config['topology'] = scaled
+    return json.dumps(config)
+
+
+def measure(name, text):
+    # Times without tracemalloc, it slows down allocations
+    start = time.time()
+    config = json.loads(text)
+    parseTime = time.time() - start
+    start = time.time()
+    index = ConfigIndex(config)
+    indexTime = time.time() - start
+    del index, config
+
+    tracemalloc.start()
+    config = json.loads(text)
+    parseMemory = tracemalloc.get_traced_memory()[0]
+    index = ConfigIndex(config)
+    indexMemory = tracemalloc.get_traced_memory()[0] - parseMemory
+    tracemalloc.stop()
+
+    queries = [('deviceGroups with multiplier > 1', lambda: index.find('deviceGroup', multiplier=lambda multiplier: multiplier > 1)),
+               ('dutIp pattern of every BGP peer', lambda: [index.pattern(peer, 'dutIp') for peer in index.find('bgpIpv4Peer', under='/topology')]),
+               ('node by xpath', lambda: index.node('/topology[1]/deviceGroup[1]/ethernet[1]')),
+               ('nodes by name', lambda: index.findByName('DG1'))]
+
+    print('{}: {:.1f} MB, {} nodes, {} multivalues'.format(name, len(text) / 1024.0 / 1024, len(index.nodes), len(index.multivalueOwners)))
+    print('   json.loads:  {:8.3f}s {:8.1f} MB'.format(parseTime, parseMemory / 1024.0 / 1024))
+    print('   index build: {:8.3f}s {:8.1f} MB'.format(indexTime, indexMemory / 1024.0 / 1024))
+    for description, query in queries:
+        count = len(query()) if isinstance(query(), list) else 1
+        runs = 1000
+        seconds = timeit.timeit(query, number=runs) / runs
+        print('   {:34} {:10.1f} us  ({} results)'.format(description + ':', seconds * 1e6, count))
+
+
+if __name__ == '__main__':
+    for filename in ['bgp.json', 'bgp_ngpf_8.50.json']:
+        with open(os.path.join(directory, filename)) as configFile:
+            text = configFile.read()
+        measure(filename, text)
+
+    measure('bgp_ngpf_8.50.json x {}'.format(scale), syntheticConfig(text, scale))
@@ -0,0 +1,89 @@
+"""
+benchConfigStream.py
+
+Description
+   Compare json.load/json.dump with configStream.ConfigStream on a synthetic config 'scale'
+   times the size of bgp_ngpf_8.50.json, without an API server.
+
+   Both rewrite the connectedTo of every vport and multiply the multiplier of every
+   deviceGroup by ten.  The script reports the time and the peak Python memory of each.
+   Memory is measured in a second pass with tracemalloc, which slows down allocations.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchConfigStream.py [scale]
+"""
+
+import os, sys, json, time, tempfile, tracemalloc
+
+from benchConfigIndex import syntheticConfig
+from configStream import ConfigStream
+
+scale = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+def rewriteConnectedTo(vport):
+    if vport.get('connectedTo') is not None:
+        vport['connectedTo'] = vport['connectedTo'].replace('192.168.70.11', '10.36.78.190')
+
+
+def withJson(source, destination):
+    with open(source) as sourceFile:
+        config = json.load(sourceFile)
+    for vport in config['vport']:
+        rewriteConnectedTo(vport)
+    for topology in config['topology']:
+        for deviceGroup in topology['deviceGroup']:
+            deviceGroup['multiplier'] *= 10
+    with open(destination, 'w') as destinationFile:
+        json.dump(config, destinationFile, indent=2)
+
+
+def withStream(source, destination):
+    def scaleMultiplier(deviceGroup):
+        deviceGroup['multiplier'] *= 10
+
+    stream = ConfigStream()
+    stream.on(rewriteConnectedTo, nodeType='vport')
+    stream.on(scaleMultiplier, xpath=r'^/topology\[\d+\]/deviceGroup\[\d+\]$')
+    stream.transform(source, destination)
+
+
+def measure(function, source, destination):
+    start = time.time()
+    function(source, destination)
+    seconds = time.time() - start
+
+    tracemalloc.start()
+    function(source, destination)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+if __name__ == '__main__':
+    with open(os.path.join(directory, 'bgp_ngpf_8.50.json')) as configFile:
+        text = syntheticConfig(configFile.read(), scale)
+
+    workDirectory = tempfile.mkdtemp()
+    source = os.path.join(workDirectory, 'scaled.json')
+    with open(source, 'w') as sourceFile:
+        sourceFile.write(json.dumps(json.loads(text), indent=2))
+    del text
+
+    print('bgp_ngpf_8.50.json x {}: {:.1f} MB'.format(scale, os.path.getsize(source) / 1024.0 / 1024))
+    results = {}
+    for name, function in (('json', withJson), ('configStream', withStream)):
+        destination = os.path.join(workDirectory, '{}.json'.format(name))
+        results[name] = measure(function, source, destination)
+        print('   {:14} {:8.2f}s {:10.1f} MB peak'.format(name + ':', results[name][0], results[name][1] / 1024.0 / 1024))
+
+    with open(os.path.join(workDirectory, 'json.json')) as jsonFile, open(os.path.join(workDirectory, 'configStream.json')) as streamFile:
+        print('   Same output: {}'.format(jsonFile.read() == streamFile.read()))
+
+    for filename in os.listdir(workDirectory):
+        os.remove(os.path.join(workDirectory, filename))
+    os.rmdir(workDirectory)
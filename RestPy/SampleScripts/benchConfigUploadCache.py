@@ -0,0 +1,78 @@
+"""
+benchConfigUploadCache.py
+
+Description
+   Compare uploading a config on every load with configUploadCache.ConfigUploadCache.
+
+   The mock REST server in mockRestServer.py stands in for the API server, with a per-request
+   latency and an upload bandwidth.  The script loads the bundled .ixncfg and .json configs
+   'loads' times in turn.  It uploads every time, like LoadConfig(Files(configFile, local_file=True)),
+   then loads through the upload cache with an empty index.  The first load of each config
+   checks the server file list and uploads.  Later loads only execute loadConfig.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchConfigUploadCache.py [loads] [latency] [megabitsPerSecond]
+"""
+
+import os, sys, time, tempfile
+
+from mockRestServer import MockRestServer, MockConnection
+from configUploadCache import ConfigUploadCache
+
+loads = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.02
+megabitsPerSecond = float(sys.argv[3]) if len(sys.argv) > 3 else 10
+directory = os.path.dirname(os.path.abspath(__file__))
+
+configFiles = [os.path.join(directory, filename) for filename in
+               ['ospf.ixncfg', 'bgp_ngpf_9.00.ixncfg', 'ngpfQuickTest2ports_8.50.ixncfg',
+                'QuickTestNgpf_vm8.20.ixncfg', 'bgp.json', 'bgp_ngpf_8.50.json']]
+
+
+def loadRemoteConfig(uhd, remoteFilename):
+    uhd._connection._execute('{}/operations/loadconfig'.format(uhd.href), {'arg1': remoteFilename})
+
+
+def uploadAndLoad(uhd, filename):
+    remoteFilename = os.path.basename(filename)
+    uhd._connection._put_file(uhd.href, filename, remote_filename=remoteFilename)
+    loadRemoteConfig(uhd, remoteFilename)
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+def run(server, load):
+    server.resetCounters()
+    start = time.time()
+    for index in range(loads):
+        load(configFiles[index % len(configFiles)])
+    return time.time() - start, server.requestCount
+
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency, bandwidth=megabitsPerSecond * 1000000 / 8)
+    server.start()
+    uhd = MockConnection(server).Ixnetwork
+
+    print('{} loads of {} configs ({:.0f}-{:.0f} KB), latency {}s, {} Mbit/s'.format(
+        loads, len(configFiles), min(os.path.getsize(f) for f in configFiles) / 1024.0,
+        max(os.path.getsize(f) for f in configFiles) / 1024.0, latency, megabitsPerSecond))
+
+    everyTime = run(server, lambda filename: uploadAndLoad(uhd, filename))
+
+    indexFile = os.path.join(tempfile.mkdtemp(), 'uploadIndex.json')
+    uploadCache = ConfigUploadCache(indexFile=indexFile, logger=Quiet())
+    cached = run(server, lambda filename: uploadCache.loadConfig(uhd, filename, load=loadRemoteConfig))
+    server.stop()
+    os.remove(indexFile)
+    os.rmdir(os.path.dirname(indexFile))
+
+    print('   Upload every time: {:8.2f}s {:5} requests'.format(*everyTime))
+    print('   Upload cache:      {:8.2f}s {:5} requests  {}'.format(cached[0], cached[1], uploadCache.stats))
+    print('   Speedup: {:.1f}x'.format(everyTime[0] / cached[0]))
@@ -0,0 +1,103 @@
+"""
+benchFindIndex.py
+
+Description
+   Compare resolving named nodes with one filtered select per find, like restpy find(), with
+   findIndex.FindIndex.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  The script finds
+   'vports' vports by Name, and the 'fields' fields of each of 'stacks' stacks of a config element
+   by DisplayName.  Then regex filters are checked against the server's answers, and a vport added
+   after an invalidation is found.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchFindIndex.py [vports] [stacks] [fields]
+"""
+
+import sys, time
+
+from mockRestServer import MockRestServer, MockConnection
+from batchSelect import selectUrl
+from findIndex import FindIndex
+
+vportCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+stackCount = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+fieldCount = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+latency = 0.005
+
+
+def buildConfig(server):
+    for index in range(vportCount):
+        server.add(server.root, 'vport', name='Port_{}'.format(index + 1), type='novusHundredGigLan')
+    traffic = server.addSingleton(server.root, 'traffic')
+    trafficItem = server.add(traffic, 'trafficItem', name='Raw packet')
+    configElement = server.add(trafficItem, 'configElement')
+    stackHrefs = []
+    for stackIndex in range(stackCount):
+        stack = server.add(configElement, 'stack', displayName='Stack {}'.format(stackIndex))
+        stackHrefs.append(stack['href'])
+        for fieldIndex in range(fieldCount):
+            server.add(stack, 'field', displayName='Field {}.{}'.format(stackIndex, fieldIndex), valueType='singleValue')
+    return configElement['href'], stackHrefs
+
+
+def find(uhd, parent, childName, **filters):
+    """A filtered select of one collection, the request of restpy find()"""
+    payload = {'selects': [{'from': parent, 'properties': [], 'inlines': [],
+                            'children': [{'child': childName, 'properties': ['*'],
+                                          'filters': [{'property': name, 'regex': regex} for name, regex in filters.items()]}]}]}
+    return uhd._connection._execute(selectUrl(parent), payload)[0].get(childName, [])
+
+
+def resolve(findFunction, uhd, stackHrefs):
+    hrefs = []
+    for index in range(vportCount):
+        hrefs.extend(node['href'] for node in findFunction(uhd.href, 'vport', name='^Port_{}$'.format(index + 1)))
+    for stackIndex, stackHref in enumerate(stackHrefs):
+        for fieldIndex in range(fieldCount):
+            hrefs.extend(node['href'] for node in findFunction(stackHref, 'field',
+                                                               displayName='^Field {}.{}$'.format(stackIndex, fieldIndex)))
+    return hrefs
+
+
+def measure(server, function, *args):
+    server.resetCounters()
+    start = time.time()
+    result = function(*args)
+    return result, server.requestCount, time.time() - start
+
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency).start()
+    try:
+        configElementHref, stackHrefs = buildConfig(server)
+        uhd = MockConnection(server).Ixnetwork
+        print('Find {} vports by Name and {} fields by DisplayName, latency {}s'.format(vportCount, stackCount * fieldCount, latency))
+
+        expected, requests, seconds = measure(server, resolve, lambda *args, **filters: find(uhd, *args, **filters), uhd, stackHrefs)
+        print('   One select per find: {:6} requests {:6.2f}s'.format(requests, seconds))
+        index = FindIndex(uhd)
+        hrefs, indexRequests, indexSeconds = measure(server, resolve, index.findProperties, uhd, stackHrefs)
+        print('   FindIndex:           {:6} requests {:6.2f}s  {:.1f}x'.format(indexRequests, indexSeconds, seconds / indexSeconds))
+        assert hrefs == expected and len(hrefs) == vportCount + stackCount * fieldCount
+        print('   {}'.format(index.stats))
+
+        # Regex filters give the server's answer
+        for filters in [{'name': '^Port_1'}, {'name': '0$', 'type': 'Lan'}, {'name': 'Port_(7|8)$'}, {'name': '^Port_1$', 'type': '^novus'}]:
+            assert [node['href'] for node in index.findProperties(uhd.href, 'vport', **filters)] == \
+                   [node['href'] for node in find(uhd, uhd.href, 'vport', **filters)], filters
+        assert [node['href'] for node in index.findProperties(stackHrefs, 'field', displayName='^Field [0-9]\\.1$')] == \
+               [node['href'] for stackHref in stackHrefs for node in find(uhd, stackHref, 'field', displayName='^Field [0-9]\\.1$')]
+
+        # A vport added outside of the index is found after an invalidation
+        server.add(server.root, 'vport', name='Port_New')
+        assert index.findProperties(uhd.href, 'vport', name='^Port_New$') == []
+        index.invalidate(uhd.href, 'vport')
+        assert len(index.findProperties(uhd.href, 'vport', name='^Port_New$')) == 1
+        assert len(index.findProperties(stackHrefs[0], 'field')) == fieldCount and index.stats['misses'] == stackCount + 3
+        print('   Regex filters match the server, and an invalidated collection is read again: OK')
+    finally:
+        server.stop()
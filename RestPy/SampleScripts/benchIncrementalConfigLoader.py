@@ -0,0 +1,109 @@
+"""
+benchIncrementalConfigLoader.py
+
+Description
+   Compare full config loads with incrementalConfigLoader.IncrementalConfigLoader over a sweep
+   of small variations of bgp_ngpf_8.50.json.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  A full load uploads
+   the file and executes loadConfig, which the server applies node by node.  A partial load
+   executes one importConfig with the changed nodes.  Both are charged 'nodeCost' seconds per
+   node applied plus the request latency.  The default costs are a model, not a measurement:
+   tune them to the server you compare with.
+
+   Every variation changes the deviceGroup multiplier and the BGP dutIp counter start, like a
+   scale sweep does.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchIncrementalConfigLoader.py [variations] [latency] [nodeCost]
+"""
+
+import os, sys, json, copy, time
+
+from mockRestServer import MockRestServer, MockConnection
+from incrementalConfigLoader import IncrementalConfigLoader, flattenConfig
+
+variations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+nodeCost = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0002
+directory = os.path.dirname(os.path.abspath(__file__))
+
+
+class ConfigServer(MockRestServer):
+    """Applies loadConfig of an uploaded file and importConfig, and charges nodeCost per node applied"""
+    def __init__(self, **kwargs):
+        super(ConfigServer, self).__init__(**kwargs)
+        self.nodesApplied = 0
+
+    def _apply(self, count):
+        self.nodesApplied += count
+        time.sleep(count * nodeCost)
+
+    def operation_loadconfig(self, href, payload):
+        self._apply(len(flattenConfig(json.loads(self._files[payload['arg1']]))))
+
+    def operation_importconfig(self, href, payload):
+        self._apply(len(json.loads(payload['arg2'])))
+
+
+def fullLoad(uhd, filename):
+    """Upload the file and loadConfig it, like uhd.LoadConfig(Files(filename, local_file=True))"""
+    name = os.path.basename(filename)
+    uhd._connection._put_file(uhd.href, filename, remote_filename=name)
+    uhd._connection._execute('{}/operations/loadconfig'.format(uhd.href), {'arg1': name})
+
+
+def sweep(config, count):
+    """Yield count variations of a config"""
+    for index in range(count):
+        variation = copy.deepcopy(config)
+        deviceGroup = variation['topology'][0]['deviceGroup'][0]
+        deviceGroup['multiplier'] = index % 100 + 1
+        bgpPeer = deviceGroup['ethernet'][0]['ipv4'][0]['bgpIpv4Peer'][0]
+        bgpPeer['dutIp']['counter']['start'] = '1.1.{}.{}'.format(index // 250, index % 250 + 1)
+        yield variation
+
+
+def run(server, uhd, configs, loader=None):
+    server.resetCounters()
+    server.nodesApplied = 0
+    start = time.time()
+    modes = {}
+    for config in configs:
+        if loader is None:
+            IncrementalConfigLoader(uhd, fullLoad=fullLoad, logger=Quiet()).load(config)
+            modes['full'] = modes.get('full', 0) + 1
+        else:
+            mode = loader.load(config)['mode']
+            modes[mode] = modes.get(mode, 0) + 1
+    return time.time() - start, server.requestCount, server.nodesApplied, modes
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+if __name__ == '__main__':
+    with open(os.path.join(directory, 'bgp_ngpf_8.50.json')) as configFile:
+        config = json.load(configFile)
+    configs = list(sweep(config, variations))
+
+    server = ConfigServer(latency=latency)
+    server.start()
+    uhd = MockConnection(server).Ixnetwork
+
+    print('{} variations of bgp_ngpf_8.50.json ({} nodes), latency {}s, {}s per node applied'.format(
+        variations, len(flattenConfig(config)), latency, nodeCost))
+
+    # A new loader per config: every load is a full load, like loadJsonConfigFile.py
+    full = run(server, uhd, configs)
+    incremental = run(server, uhd, configs, loader=IncrementalConfigLoader(uhd, fullLoad=fullLoad, logger=Quiet()))
+    server.stop()
+
+    for description, (seconds, requests, nodes, modes) in (('Full loads', full), ('Incremental', incremental)):
+        print('   {:12} {:8.2f}s {:6} requests {:8} nodes applied  {}'.format(description + ':', seconds, requests, nodes, modes))
+    print('   Speedup: {:.1f}x'.format(full[0] / incremental[0]))
@@ -0,0 +1,120 @@
+"""
+benchMultivaluePattern.py
+
+Description
+   Compare mapping failed device indexes to addresses by reading the Address values, like
+   verifyArp.py did, with multivaluePattern.readPatterns and local values.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  Every stack has
+   an Address multivalue with a pattern and its full list of values, and a few failed devices
+   spread over the whole range.  The values are sent as JSON, charged at 'bandwidth' bytes per
+   second, plus the request latency.
+
+   The bench also checks the local values of IPv4, IPv6, MAC, decrement and nested patterns
+   against the values of the server with verify().
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchMultivaluePattern.py [stacks] [devices] [latency]
+"""
+
+import sys, time, ipaddress
+
+from mockRestServer import MockRestServer, MockConnection
+from batchSelect import getMultivalueValues
+from multivaluePattern import readPatterns
+
+stackCount = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+deviceCount = int(sys.argv[2]) if len(sys.argv) > 2 else 250000
+latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.005
+bandwidth = 50 * 1024 * 1024
+
+# Every Nth device failed, the last one included
+failEvery = 25000
+
+
+def mac(number):
+    digits = '{:012x}'.format(number % (1 << 48))
+    return ':'.join(digits[index:index + 2] for index in range(0, 12, 2))
+
+
+# (pattern nodes, the values of the server), checked with verify().  The values are computed
+# here without multivaluePattern, IPv6 addresses in the compressed form of the server
+checkedPatterns = [
+    ({'counter': {'start': '1.1.0.1', 'step': '0.0.0.1', 'direction': 'increment'}},
+     [str(ipaddress.IPv4Address('1.1.0.1') + index) for index in range(1000)]),
+    ({'counter': {'start': '2000::1', 'step': '0:0:0:1::', 'direction': 'increment'}},
+     [str(ipaddress.IPv6Address('2000::1') + (index << 64)) for index in range(1000)]),
+    ({'counter': {'start': '00:00:00:00:01:05', 'step': '00:00:00:00:00:01', 'direction': 'decrement'}},
+     [mac(0x105 - index) for index in range(1000)]),
+    ({'custom': {'start': '10.0.0.1', 'step': '0.1.0.0',
+                 'increment': [{'value': '0.0.1.0', 'count': 4, 'increment': [{'value': '0.0.0.1', 'count': 10}]}]}},
+     ['10.{}.{}.{}'.format(index // 40, index // 10 % 4, 1 + index % 10) for index in range(1000)]),
+    ({'singleValue': {'value': 'true'}}, ['true'] * 1000),
+    ({'valueList': {'values': ['101', '102', '103']}}, ['101', '102', '103'] * 333 + ['101']),
+]
+
+
+def addMultivalue(server, nodes, values):
+    """A multivalue with its pattern nodes and values"""
+    href = server.addMultivalue(values)
+    multivalue = server.node(href)
+    multivalue['pattern'] = list(nodes)[0]
+    for name, properties in nodes.items():
+        increments = properties.pop('increment', None)
+        parent = server.add(multivalue, name, **properties)
+        while increments:
+            increment = dict(increments[0])
+            increments = increment.pop('increment', None)
+            parent = server.add(parent, 'increment', **increment)
+    return href
+
+
+def readValues(uhd, hrefs, indexes):
+    """The Address.Values read of verifyArp.py, per stack"""
+    return [[values[index] for index in indexes] for values in
+            [getMultivalueValues(uhd, href) for href in hrefs]]
+
+
+def computeValues(uhd, hrefs, indexes):
+    return [[pattern.valueAt(index) for index in indexes] for pattern in readPatterns(uhd, hrefs)]
+
+
+def measure(server, function, *args):
+    server.resetCounters()
+    start = time.time()
+    result = function(*args)
+    return result, server.requestCount, time.time() - start
+
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency, bandwidth=bandwidth).start()
+    try:
+        uhd = MockConnection(server).Ixnetwork
+        hrefs = []
+        for stack in range(stackCount):
+            start = '{}.0.0.1'.format(stack + 1)
+            values = [str(ipaddress.IPv4Address(start) + index) for index in range(deviceCount)]
+            hrefs.append(addMultivalue(server, {'counter': {'start': start, 'step': '0.0.0.1', 'direction': 'increment'}}, values))
+        indexes = list(range(0, deviceCount, failEvery)) + [deviceCount - 1]
+        print('{} stacks of {} devices, {} failed devices per stack, latency {}s'.format(
+            stackCount, deviceCount, len(indexes), latency))
+
+        readResult, readRequests, readSeconds = measure(server, readValues, uhd, hrefs, indexes)
+        print('   Read the values:     {:8.2f}s {:4} requests'.format(readSeconds, readRequests))
+        computedResult, computedRequests, computedSeconds = measure(server, computeValues, uhd, hrefs, indexes)
+        print('   Read the patterns:   {:8.2f}s {:4} requests'.format(computedSeconds, computedRequests))
+        assert computedResult == readResult
+        print('   Speedup: {:.1f}x'.format(readSeconds / computedSeconds))
+
+        print('\nverify() against the values of the server:')
+        checkedHrefs = [addMultivalue(server, nodes, values) for nodes, values in checkedPatterns]
+        for pattern, href in zip(readPatterns(uhd, checkedHrefs), checkedHrefs):
+            mismatches = pattern.verify(uhd, href, samples=32)
+            print('   {:50} {}'.format(str(pattern), 'OK' if mismatches == [] else mismatches[:3]))
+            assert mismatches == []
+            assert pattern.indexOf(pattern[777]) == 777 or pattern.pattern in ('singleValue', 'valueList')
+    finally:
+        server.stop()
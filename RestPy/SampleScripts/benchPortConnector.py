@@ -0,0 +1,141 @@
+"""
+benchPortConnector.py
+
+Description
+   Compare connecting ports the way the samples do, PortMapAssistant.Map() per port and one
+   Connect(ForceOwnership=True), with portConnector.PortConnector.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  Every port has a
+   takeover time and a link-up time.  One ConnectPorts request takes over its ports one after the
+   other, and requests from several connections are served at the same time.  The times are a model,
+   not a measurement: tune them to the server you compare with.  One port is slow to come up.
+   The last run connects without forceOwnership while two ports are owned by another user.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchPortConnector.py [ports] [latency]
+"""
+
+import sys, json, time, random
+
+from mockRestServer import MockRestServer, MockConnection
+from batchSelect import select, importConfig
+from portConnector import PortConnector, printTimings
+
+portCount = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.005
+pollInterval = 0.25
+
+
+class PortServer(MockRestServer):
+    """Vports whose connectionState follows the takeover and link-up time of their port"""
+    def __init__(self, takeoverSeconds, linkUpSeconds, ownedByOther=(), **kwargs):
+        super(PortServer, self).__init__(**kwargs)
+        self._takeoverSeconds = takeoverSeconds
+        self._linkUpSeconds = linkUpSeconds
+        self._ownedByOther = set(ownedByOther)
+
+    def operation_importconfig(self, href, payload):
+        for change in json.loads(payload['arg2']):
+            index = int(change['xpath'].split('[')[1].rstrip(']'))
+            vports = self.root['_children'].get('vport', [])
+            vport = vports[index - 1] if index <= len(vports) else self.add(self.root, 'vport', connectedAt=None)
+            vport.update(dict((key, value) for key, value in change.items() if key != 'xpath'))
+
+    def operation_connectports(self, href, payload):
+        for vportHref in payload['arg1']:
+            vport = self.node(vportHref)
+            if vport['location'] in self._ownedByOther and not payload['arg2']:
+                continue
+            time.sleep(self._takeoverSeconds[vport['location']])
+            vport['connectedAt'] = time.time()
+
+    def _properties(self, node, properties):
+        result = super(PortServer, self)._properties(node, properties)
+        if '/vport/' in node['href']:
+            if node.get('connectedAt') is None:
+                if not node.get('location'):
+                    result['connectionState'] = 'unassigned'
+                elif node['location'] in self._ownedByOther:
+                    result['connectionState'] = 'assignedInUseByOther'
+                else:
+                    result['connectionState'] = 'assignedUnconnected'
+            elif time.time() - node['connectedAt'] < self._linkUpSeconds[node['location']]:
+                result['connectionState'] = 'connectedLinkDown'
+            else:
+                result['connectionState'] = 'connectedLinkUp'
+            result.pop('connectedAt', None)
+        return result
+
+
+def portMapAssistant(uhd, ports):
+    """Map() per port, then one ConnectPorts for all ports and a wait for all links, like Connect()"""
+    start = time.time()
+    vports = []
+    for location, name in ports:
+        # Vport.find(Name='^name$')
+        vports.append(select(uhd, children=[{'child': '^vport$', 'properties': ['name'],
+                                              'filters': [{'property': 'name', 'regex': '^{}$'.format(name)}]}])['vport'][0])
+    importConfig(uhd, [{'xpath': vport['xpath'], 'location': location} for vport, (location, name) in zip(vports, ports)])
+    uhd._connection._execute('{}/vport/operations/connectports'.format(uhd.href), {'arg1': [vport['href'] for vport in vports], 'arg2': True})
+    while True:
+        states = select(uhd, children=[{'child': '^vport$', 'properties': ['connectionState'], 'filters': []}])['vport']
+        if all(vport['connectionState'] == 'connectedLinkUp' for vport in states):
+            return time.time() - start
+        time.sleep(pollInterval)
+
+
+def newServer(ports, takeoverSeconds, linkUpSeconds, ownedByOther=()):
+    server = PortServer(takeoverSeconds, linkUpSeconds, ownedByOther=ownedByOther, latency=latency)
+    server.start()
+    for location, name in ports:
+        server.add(server.root, 'vport', name=name, location=None, connectedAt=None)
+    return server
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+if __name__ == '__main__':
+    random.seed(1)
+    ports = [('localuhd/{}'.format(index), 'Port_{}'.format(index)) for index in range(1, portCount + 1)]
+    takeoverSeconds = dict((location, random.uniform(0.1, 0.5)) for location, name in ports)
+    linkUpSeconds = dict((location, random.uniform(0.2, 1.0)) for location, name in ports)
+    slowPort = ports[portCount // 2][0]
+    linkUpSeconds[slowPort] = 6.0
+    print('{} ports, takeover {:.1f}s in total, link up 0.2-1.0s, {} 6.0s, latency {}s'.format(
+        portCount, sum(takeoverSeconds.values()), slowPort, latency))
+
+    server = newServer(ports, takeoverSeconds, linkUpSeconds)
+    seconds = portMapAssistant(MockConnection(server).Ixnetwork, ports)
+    server.stop()
+    print('   Map per port and Connect: {:6.2f}s until all ports are up, no per-port timing'.format(seconds))
+
+    server = newServer(ports, takeoverSeconds, linkUpSeconds)
+    connector = PortConnector(MockConnection(server).Ixnetwork, workers=16, pollInterval=pollInterval, logger=Quiet())
+    report = connector.connect(ports, deadline=60)
+    server.stop()
+    print('   PortConnector:            {:6.2f}s until all ports are up'.format(report['seconds']))
+    printTimings(report, limit=5)
+
+    server = newServer(ports, takeoverSeconds, linkUpSeconds)
+    connector = PortConnector(MockConnection(server).Ixnetwork, workers=16, pollInterval=pollInterval, logger=Quiet())
+    report = connector.connect(ports, deadline=3, requireAll=False)
+    server.stop()
+    print('\n   PortConnector with a 3s deadline: {} ports ready, going on without {} after {:.2f}s'.format(
+        len(report['ready']), ', '.join(report['notReady']), report['seconds']))
+
+    # Without forceOwnership the ports of other users are reported, and the others are connected
+    owned = [ports[0][0], ports[1][0]]
+    server = newServer(ports, takeoverSeconds, linkUpSeconds, ownedByOther=owned)
+    connector = PortConnector(MockConnection(server).Ixnetwork, workers=16, pollInterval=pollInterval, logger=Quiet())
+    report = connector.connect(ports, forceOwnership=False, deadline=60, requireAll=False)
+    server.stop()
+    assert report['notReady'] == [ports[0][1], ports[1][1]] and len(report['ready']) == portCount - 2
+    assert all(port['error'] == 'Owned by another user' for port in report['ports'] if port['location'] in owned)
+    print('   PortConnector without forceOwnership: {} ports ready, {} owned by another user after {:.2f}s'.format(
+        len(report['ready']), ', '.join(report['notReady']), report['seconds']))
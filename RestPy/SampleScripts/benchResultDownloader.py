@@ -0,0 +1,105 @@
+"""
+benchResultDownloader.py
+
+Description
+   Compare one-at-a-time result downloads with resultDownloader.ResultDownloader.
+
+   The mock REST server in mockRestServer.py serves 'files' result files of 'sizeMB' MB each
+   with a per-request latency.  The script downloads them one after another, the way
+   getQuickTestCsvFiles() did, then with ResultDownloader, then once more with every file
+   interrupted halfway to show the resume path.  Every downloaded file is checked with SHA-256.
+   Then a part file of a server file that changed since, and a part file without a validator or a
+   checksum, are checked to be downloaded again from the start.
+
+Requirements:
+   - Python 3
+   - pip install requests
+
+Usage:
+   - Enter: python benchResultDownloader.py [files] [sizeMB] [latency]
+"""
+
+import os, sys, time, shutil, hashlib, tempfile
+
+import requests
+
+from mockRestServer import MockRestServer
+from resultDownloader import ResultDownloader, DownloadError
+
+files = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+sizeMB = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.2
+
+if __name__ == '__main__':
+    server = MockRestServer(latency=latency)
+    server.start()
+    filesUrl = '{}{}/files'.format(server.url, server.root['href'])
+
+    resultsPath = '/root/.local/share/Ixia/IxNetwork/data/result/DP.Rfc2544Tput/Run0001'
+    checksums = {}
+    for index in range(files):
+        data = os.urandom(1024 * 1024) * sizeMB
+        remoteFilename = '{}/result{}.csv'.format(resultsPath, index)
+        server.addFile(remoteFilename, data)
+        checksums[remoteFilename] = hashlib.sha256(data).hexdigest()
+
+    destination = tempfile.mkdtemp()
+    fileList = [(remoteFilename, os.path.join(destination, os.path.basename(remoteFilename))) for remoteFilename in sorted(checksums)]
+
+    # One file at a time, the whole file in memory, like session.Session.DownloadFile
+    start = time.time()
+    for remoteFilename, localFilename in fileList:
+        response = requests.get(filesUrl, params={'filename': remoteFilename})
+        with open(localFilename, 'wb') as localFile:
+            localFile.write(response.content)
+    serial = time.time() - start
+
+    downloader = ResultDownloader(filesUrl, maxConnections=4)
+    start = time.time()
+    manifest = downloader.download(fileList, expectedSha256=checksums)
+    concurrent = time.time() - start
+    assert all(entry['status'] == 'ok' for entry in manifest), manifest
+
+    # Every file drops its connection halfway through the first attempt
+    for remoteFilename, localFilename in fileList:
+        os.remove(localFilename)
+        server.addFile(remoteFilename, server._files[remoteFilename], dropAfter=sizeMB * 1024 * 1024 // 2)
+    start = time.time()
+    resumed = downloader.download(fileList, expectedSha256=checksums)
+    resumedTime = time.time() - start
+    assert all(entry['status'] == 'ok' and entry['resumedFrom'] > 0 for entry in resumed), resumed
+
+    # The server file changed after the interruption: If-Range gets the whole new file
+    remoteFilename, localFilename = fileList[0]
+    os.remove(localFilename)
+    server.addFile(remoteFilename, server._files[remoteFilename], dropAfter=1024 * 1024)
+    assert ResultDownloader(filesUrl, retries=1).download([fileList[0]])[0]['status'] == 'failed'
+    assert os.path.exists(localFilename + '.part.validator')
+    changed = os.urandom(1024 * 1024) * 2
+    server.addFile(remoteFilename, changed)
+    entry = downloader.downloadOne(remoteFilename, localFilename)
+    assert entry['resumedFrom'] == 0 and entry['sha256'] == hashlib.sha256(changed).hexdigest(), entry
+
+    # A part file without a validator is not resumed without a checksum
+    with open(localFilename + '.part', 'wb') as partFile:
+        partFile.write(b'stale')
+    entry = downloader.downloadOne(remoteFilename, localFilename)
+    assert entry['resumedFrom'] == 0 and entry['sha256'] == hashlib.sha256(changed).hexdigest(), entry
+    assert not os.path.exists(localFilename + '.part.validator')
+
+    # Two files for one local path are refused before anything is downloaded
+    try:
+        downloader.download([fileList[0], (fileList[1][0], fileList[0][1])])
+    except DownloadError:
+        pass
+    else:
+        raise AssertionError('Two downloads to one local file were accepted')
+
+    server.stop()
+    shutil.rmtree(destination)
+
+    print('Files:                     {} x {} MB, {:.0f} ms latency'.format(files, sizeMB, latency * 1000))
+    print('One at a time:             {:.2f}s'.format(serial))
+    print('ResultDownloader (4 conn): {:.2f}s'.format(concurrent))
+    print('Interrupted and resumed:   {:.2f}s, resumed from {} MB on average'.format(
+        resumedTime, sum(entry['resumedFrom'] for entry in resumed) / len(resumed) / 1024 / 1024))
@@ -0,0 +1,140 @@
+"""
+benchSessionPool.py
+
+Description
+   Compare the per-test startup of a new session per test, like the samples do with
+   SessionAssistant(..., ClearConfig=True) and session.Session.remove(), with sessionPool.SessionPool.
+
+   An in-memory test platform stands in for the API server.  Creating a session, NewConfig and
+   removing a session take the seconds given on the command line.  The defaults are a model, not a
+   measurement: tune them to the server you compare with.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchSessionPool.py [tests] [testSeconds] [createSeconds] [newConfigSeconds] [removeSeconds]
+"""
+
+import sys, time, threading
+
+from sessionPool import SessionPool
+
+tests = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+testSeconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+createSeconds = float(sys.argv[3]) if len(sys.argv) > 3 else 1.5
+newConfigSeconds = float(sys.argv[4]) if len(sys.argv) > 4 else 0.3
+removeSeconds = float(sys.argv[5]) if len(sys.argv) > 5 else 0.2
+
+
+class FakeIxnetwork(object):
+    def __init__(self, id):
+        self.href = '/api/v1/sessions/{}/ixnetwork'.format(id)
+
+    def NewConfig(self):
+        time.sleep(newConfigSeconds)
+
+
+class FakeSession(object):
+    def __init__(self, sessions, id, name):
+        self._sessions = sessions
+        self.Id = id
+        self.Name = name
+        self.State = 'ACTIVE'
+
+    @property
+    def Ixnetwork(self):
+        return FakeIxnetwork(self.Id)
+
+    def refresh(self):
+        return self
+
+    def remove(self):
+        time.sleep(removeSeconds)
+        self._sessions.remove(self)
+
+
+class FakeSessions(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._lastId = 0
+
+    def add(self, ApplicationType='ixnrest', Name=None):
+        time.sleep(createSeconds)
+        with self._lock:
+            self._lastId += 1
+            session = FakeSession(self, self._lastId, Name)
+            self._sessions[session.Id] = session
+        return session
+
+    def remove(self, session):
+        with self._lock:
+            del self._sessions[session.Id]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class FakeTestPlatform(object):
+    def __init__(self):
+        self.Sessions = FakeSessions()
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+def newSessionPerTest(testPlatform):
+    startups = []
+    for test in range(tests):
+        start = time.time()
+        session = testPlatform.Sessions.add('ixnrest')
+        session.Ixnetwork.NewConfig()
+        startups.append(time.time() - start)
+        time.sleep(testSeconds)
+        session.remove()
+    return startups
+
+
+def pooled(testPlatform):
+    start = time.time()
+    pool = SessionPool(testPlatform, size=2, logger=Quiet()).start(wait=True)
+    print('   Pool warm-up, once per run: {:.2f}s'.format(time.time() - start))
+    startups = []
+    for test in range(tests):
+        start = time.time()
+        with pool.lease() as session:
+            startups.append(time.time() - start)
+            time.sleep(testSeconds)
+
+    # A test that raises gives its session back to be removed, not cleared and reused
+    try:
+        with pool.lease() as session:
+            raise RuntimeError('Test failed')
+    except RuntimeError:
+        pass
+    pool.stop()
+    assert pool.stats['recycled'] == tests, pool.stats
+    return startups, pool.stats
+
+
+if __name__ == '__main__':
+    print('{} tests of {}s, session create {}s, NewConfig {}s, remove {}s'.format(
+        tests, testSeconds, createSeconds, newConfigSeconds, removeSeconds))
+
+    testPlatform = FakeTestPlatform()
+    start = time.time()
+    perTest = newSessionPerTest(testPlatform)
+    perTestSeconds = time.time() - start
+
+    start = time.time()
+    pool, stats = pooled(testPlatform)
+    poolSeconds = time.time() - start
+
+    for description, startups, seconds in (('New session', perTest, perTestSeconds), ('Session pool', pool, poolSeconds)):
+        print('   {:13} startup mean {:6.3f}s max {:6.3f}s  total {:7.2f}s'.format(
+            description + ':', sum(startups) / len(startups), max(startups), seconds))
+    print('   Pool stats: {}'.format(stats))
+    print('   Sessions left on the server: {}'.format(len(testPlatform.Sessions)))
@@ -0,0 +1,109 @@
+"""
+benchSessionReaper.py
+
+Description
+   Compare removing abandoned sessions one at a time, like manageSessions.py does, with
+   sessionReaper.SessionReaper and its concurrent removals.
+
+   An in-memory test platform stands in for the API server.  Removing a session takes
+   'removeSeconds', the time the server takes to stop it.  The default is a model, not a
+   measurement: tune it to the server you compare with.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchSessionReaper.py [sessions] [removeSeconds] [workers]
+"""
+
+import sys, time, threading
+
+from sessionReaper import SessionReaper, sessionInfo
+
+sessionCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+removeSeconds = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+workers = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+
+
+class FakeSession(object):
+    def __init__(self, sessions, properties):
+        self._sessions = sessions
+        self._properties = properties
+
+    @property
+    def Id(self):
+        return self._properties['id']
+
+    def remove(self):
+        time.sleep(removeSeconds)
+        self._sessions.delete(self.Id)
+
+
+class FakeSessions(object):
+    def __init__(self, count):
+        self._lock = threading.Lock()
+        now = time.time()
+        self._sessions = {}
+        for sessionId in range(1, count + 1):
+            # Every fourth session is in use, the others were abandoned a day ago
+            abandoned = sessionId % 4 != 0
+            self._sessions[sessionId] = {
+                'id': sessionId, 'userName': 'admin' if sessionId % 3 else 'ci', 'state': 'active',
+                'sessionName': 'debugMode-{}'.format(sessionId),
+                'lastActivityOn': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - (86400 if abandoned else 60)))}
+
+    def find(self, Id=None):
+        with self._lock:
+            return [FakeSession(self, dict(properties)) for sessionId, properties in sorted(self._sessions.items())
+                    if Id is None or sessionId == Id]
+
+    def delete(self, sessionId):
+        with self._lock:
+            del self._sessions[sessionId]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class FakeTestPlatform(object):
+    def __init__(self, count):
+        self.Sessions = FakeSessions(count)
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+def oneAtATime(testPlatform, sessionIds):
+    """manageSessions.py: testPlatform.Sessions.find(Id=id).remove() for each session"""
+    for sessionId in sessionIds:
+        for session in testPlatform.Sessions.find(Id=sessionId):
+            session.remove()
+
+
+if __name__ == '__main__':
+    print('{} sessions, {}s per removal, {} workers'.format(sessionCount, removeSeconds, workers))
+
+    testPlatform = FakeTestPlatform(sessionCount)
+    dryRun = SessionReaper(testPlatform, idleSeconds=8 * 3600, dryRun=True, logger=Quiet()).reap()
+    abandoned = [entry['id'] for entry in dryRun['sessions'] if entry['action'] == 'would remove']
+    print('   Dry run: {} of {} sessions idle for more than 8 hours, {:.3f}s'.format(len(abandoned), dryRun['total'], dryRun['seconds']))
+
+    start = time.time()
+    oneAtATime(testPlatform, abandoned)
+    serialSeconds = time.time() - start
+    print('   One at a time:  {:7.2f}s  {} sessions left'.format(serialSeconds, len(testPlatform.Sessions)))
+
+    testPlatform = FakeTestPlatform(sessionCount)
+    report = SessionReaper(testPlatform, idleSeconds=8 * 3600, workers=workers, logger=Quiet()).reap()
+    print('   SessionReaper:  {:7.2f}s  {} sessions left, {} removed, {} failed'.format(
+        report['seconds'], len(testPlatform.Sessions), report['removed'], report['failed']))
+    print('   Speedup: {:.1f}x'.format(serialSeconds / report['seconds']))
+
+    # Without a last activity, the start time makes only sessions that are not ACTIVE idle
+    dayAgo = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(time.time() - 86400))
+    reaper = SessionReaper(testPlatform, idleSeconds=8 * 3600)
+    assert not reaper.matches(sessionInfo({'id': 1, 'state': 'active', 'startedOn': dayAgo}))
+    assert reaper.matches(sessionInfo({'id': 2, 'state': 'stopped', 'startedOn': dayAgo}))
+    print('   An ACTIVE soak test started a day ago is not idle: OK')
@@ -0,0 +1,101 @@
+"""
+benchStatsRecorder.py
+
+Description
+   Measure whether statsRecorder.StatsRecorder keeps up with 1 Hz sampling of a large view.
+
+   The mock REST server in mockRestServer.py serves a Flow Statistics style view with
+   'rows' rows whose frame counters grow with time.  The recorder samples it over HTTP for
+   'duration' seconds, and the script reports the sample time, the missed ticks, the file
+   size per sample and the read back time.  Then a recording fed with record() checks that
+   chunks respect chunkCells and that a view without rows does not break series().
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchStatsRecorder.py [rows] [duration]
+"""
+
+import os, sys, time, tempfile
+
+from mockRestServer import MockRestServer, MockConnection
+from statsRecorder import StatsRecorder, StatsRecording
+
+rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+duration = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+interval = 1
+
+columns = ['Tx Port', 'Rx Port', 'Traffic Item', 'Flow Group', 'Tx Frames', 'Rx Frames', 'Frames Delta', 'Loss %',
+           'Tx Frame Rate', 'Rx Frame Rate', 'Store-Forward Avg Latency (ns)']
+
+
+class MockStatsServer(MockRestServer):
+    """Serves one view whose rows are generated from the time since start"""
+    viewHref = '/api/v1/sessions/1/ixnetwork/statistics/view/1/data'
+
+    def dispatch(self, method, path, payload):
+        if method == 'GET' and path == self.viewHref:
+            elapsed = int((time.time() - self.started) * 1000)
+            pageValues = []
+            for index in range(rows):
+                txFrames = elapsed * (index % 7 + 1)
+                rxFrames = txFrames - index % 3
+                pageValues.append(['Port_1', 'Port_2', 'Traffic Item 1', 'Flow Group {}'.format(index),
+                                   str(txFrames), str(rxFrames), str(txFrames - rxFrames),
+                                   '{:.3f}'.format((txFrames - rxFrames) * 100.0 / txFrames if txFrames else 0),
+                                   str((index % 7 + 1) * 1000), str((index % 7 + 1) * 1000),
+                                   str(800 + index % 50)])
+            return 200, {'columnCaptions': columns, 'pageValues': pageValues}
+
+        return MockRestServer.dispatch(self, method, path, payload)
+
+
+if __name__ == '__main__':
+    server = MockStatsServer()
+    server.started = time.time()
+    server.start()
+    connection = MockConnection(server)
+    fetchTimes = []
+
+    def sample():
+        start = time.time()
+        data = connection._read(MockStatsServer.viewHref)
+        fetchTimes.append(time.time() - start)
+        return data['columnCaptions'], data['pageValues']
+
+    filename = os.path.join(tempfile.mkdtemp(), 'flowStatistics.stats')
+    recorder = StatsRecorder(sample, filename, interval=interval, keyColumns=['Tx Port', 'Rx Port', 'Traffic Item', 'Flow Group'],
+                             viewName='Flow Statistics')
+    recorder.start()
+    time.sleep(duration)
+    recorder.stop()
+    server.stop()
+
+    sampleTimes = recorder.sampleTimes
+    encodeTimes = [total - fetch for total, fetch in zip(sampleTimes, fetchTimes)]
+    print('Rows per sample:          {}'.format(rows))
+    print('Samples / missed ticks:   {} / {}'.format(recorder.samples, recorder.missedTicks))
+    print('Sample time avg/max:      {:.3f}s / {:.3f}s  (HTTP+JSON {:.3f}s, encode {:.3f}s avg)'.format(
+        sum(sampleTimes) / len(sampleTimes), max(sampleTimes),
+        sum(fetchTimes) / len(fetchTimes), sum(encodeTimes) / len(encodeTimes)))
+    print('File size:                {:.1f} KB ({:.1f} KB per sample)'.format(
+        os.path.getsize(filename) / 1024.0, os.path.getsize(filename) / 1024.0 / recorder.samples))
+
+    start = time.time()
+    samples = sum(1 for sample in StatsRecording(filename).samples())
+    print('Read back:                {} samples in {:.3f}s'.format(samples, time.time() - start))
+    os.remove(filename)
+
+    # 10 rows x 2 value columns per sample: 3 samples per chunk of 60 cells. The view is empty at first.
+    recorder = StatsRecorder(None, filename, keyColumns=['Traffic Item'], chunkCells=60)
+    recorder.record(0, ['Traffic Item', 'Tx Frames', 'Rx Frames'], [])
+    for second in range(1, 8):
+        recorder.record(second, ['Traffic Item', 'Tx Frames', 'Rx Frames'],
+                        [['Item {}'.format(row), str(second * 100), str(second * 99)] for row in range(10)])
+    recorder.close()
+    recording = StatsRecording(filename)
+    assert [len(timestamps) for timestamps, keys, columns in recording.chunks()] == [1, 3, 3, 1]
+    assert recording.series('Rx Frames') == [(second, second * 99) for second in range(1, 8)]
+    print('Chunk cell budget and a view without rows: OK')
+    os.remove(filename)
@@ -0,0 +1,122 @@
+"""
+benchTopologyBuilder.py
+
+Description
+   Compare building BGP topologies with a chain of single-object calls, like bgpNgpf.py does,
+   with topologyBuilder.TopologyBuilder.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  The single-object
+   calls are replayed as the requests restpy sends for them: a POST and a GET per add, a GET for
+   Vlan.find and a PATCH per multivalue pattern, 25 requests per topology.  Both sides are
+   charged 'nodeCost' seconds per node or multivalue the server creates, plus the request latency.
+   The default costs are a model, not a measurement: tune them to the server you compare with.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchTopologyBuilder.py [topologies] [latency] [nodeCost]
+"""
+
+import sys, json, time
+
+from mockRestServer import MockRestServer, MockConnection
+from topologyBuilder import TopologyBuilder, buildConfig
+from incrementalConfigLoader import flattenConfig
+
+topologyCount = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+nodeCost = float(sys.argv[3]) if len(sys.argv) > 3 else 0.0005
+
+addedNodes = ['topology', 'deviceGroup', 'ethernet', 'ipv4', 'bgpIpv4Peer', 'networkGroup', 'ipv4PrefixPools']
+patterns = ['mac', 'enableVlans', 'vlanId', 'address', 'gatewayIp', 'dutIp', 'type', 'localAs2Bytes', 'networkAddress', 'prefixLength']
+
+
+def bgpSpec(count):
+    """The two topologies of bgpNgpf.py, repeated"""
+    return {'topology': {
+        'count': count, 'name': 'Topo{t}', 'ports': ['Port_{t}'],
+        'deviceGroup': {
+            'name': 'DG{t}', 'multiplier': 1,
+            'ethernet': {
+                'name': 'Eth{t}', 'enableVlans': True,
+                'mac': {'start': '00:01:01:00:00:01', 'step': '00:00:00:00:00:01', 'topologyStep': '00:00:00:01:00:00'},
+                'vlan': {'vlanId': {'start': 103, 'step': 0}},
+                'ipv4': {
+                    'name': 'Ipv4-{t}',
+                    'address': {'start': '1.1.0.1', 'step': '0.0.0.1', 'topologyStep': '0.0.1.0'},
+                    'gatewayIp': {'start': '1.1.0.2', 'step': '0.0.0.0', 'topologyStep': '0.0.1.0'},
+                    'bgpIpv4Peer': {
+                        'name': 'Bgp{t}', 'type': 'internal',
+                        'dutIp': {'start': '1.1.0.2', 'step': '0.0.0.0', 'topologyStep': '0.0.1.0'},
+                        'localAs2Bytes': {'start': 101, 'step': 0}}}},
+            'networkGroup': {
+                'name': 'BGP-Routes{t}', 'multiplier': 100,
+                'ipv4PrefixPools': {'numberOfAddresses': 1, 'prefixLength': 32,
+                                    'networkAddress': {'start': '10.0.0.1', 'step': '0.0.0.1', 'topologyStep': '0.1.0.0'}}}}}}
+
+
+class NgpfServer(MockRestServer):
+    """Charges nodeCost per node created by an add, a pattern or an importConfig"""
+    def __init__(self, **kwargs):
+        super(NgpfServer, self).__init__(**kwargs)
+        self.nodesCreated = 0
+
+    def _create(self, count):
+        self.nodesCreated += count
+        time.sleep(count * nodeCost)
+
+    def operation_add(self, href, payload):
+        self._create(1)
+
+    def operation_setpattern(self, href, payload):
+        self._create(1)
+
+    def operation_importconfig(self, href, payload):
+        self._create(len(flattenConfig({'topology': json.loads(payload['arg2'])})))
+
+
+def singleObjectCalls(uhd, count):
+    """The requests of the Topology.add ... PrefixLength.Single chain of bgpNgpf.py, per topology"""
+    for topology in range(count):
+        for nodeType in addedNodes:
+            uhd._connection._execute('{}/operations/add'.format(uhd.href), {'type': nodeType})
+            uhd._connection._read(uhd.href)
+            if nodeType == 'ethernet':
+                # Vlan.find()
+                uhd._connection._read(uhd.href)
+        for pattern in patterns:
+            uhd._connection._execute('{}/operations/setpattern'.format(uhd.href), {'pattern': pattern})
+
+
+def newServer():
+    server = NgpfServer(latency=latency)
+    server.start()
+    for index in range(1, topologyCount + 1):
+        server.add(server.root, 'vport', name='Port_{}'.format(index))
+    return server
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+if __name__ == '__main__':
+    spec = bgpSpec(topologyCount)
+    topologies, build = buildConfig(spec, dict(('Port_{}'.format(index), '/vport[{}]'.format(index)) for index in range(1, topologyCount + 1)))
+    print('{} BGP topologies, {} nodes and multivalues, latency {}s, {}s per node created'.format(
+        topologyCount, build.nodes, latency, nodeCost))
+
+    server = newServer()
+    start = time.time()
+    singleObjectCalls(MockConnection(server).Ixnetwork, topologyCount)
+    serialSeconds = time.time() - start
+    print('   Single-object calls: {:8.2f}s {:6} requests'.format(serialSeconds, server.requestCount))
+    server.stop()
+
+    server = newServer()
+    result = TopologyBuilder(MockConnection(server).Ixnetwork, logger=Quiet()).build(spec)
+    print('   TopologyBuilder:     {:8.2f}s {:6} requests {:6} nodes imported'.format(result['seconds'], server.requestCount, server.nodesCreated))
+    server.stop()
+    print('   Speedup: {:.1f}x'.format(serialSeconds / result['seconds']))
@@ -0,0 +1,135 @@
+"""
+benchTrafficLifecycle.py
+
+Description
+   Compare test iterations that generate every traffic item, apply and start, like the samples
+   do for one traffic item, with trafficLifecycle.TrafficLifecycle, which only generates the
+   traffic items that changed.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  Generate costs
+   'generateCost' seconds per traffic item, apply and start a fixed time, and the first packet
+   of a traffic item is received a short time after the start.  Every iteration changes the
+   frame size of a few traffic items.  The costs are a model, not a measurement: tune them to
+   the server you compare with.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchTrafficLifecycle.py [trafficItems] [iterations] [changedPerIteration]
+"""
+
+import sys, time
+
+from mockRestServer import MockRestServer, MockConnection
+from batchSelect import select
+from trafficLifecycle import TrafficLifecycle
+
+trafficItemCount = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+changedPerIteration = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+latency = 0.005
+generateCost = 0.02
+applyCost = 0.5
+startCost = 0.3
+firstPacketDelay = 0.2
+
+
+class TrafficServer(MockRestServer):
+    """Traffic items that take time to generate, apply and start"""
+    def operation_generate(self, href, payload):
+        time.sleep(generateCost * len(payload['arg1']))
+        self.node('{}/traffic'.format(self.root['href']))['state'] = 'unapplied'
+
+    def operation_apply(self, href, payload):
+        time.sleep(applyCost)
+        self.node(href)['state'] = 'stopped'
+
+    def operation_startstatelesstrafficblocking(self, href, payload):
+        time.sleep(startCost)
+        for trafficItemHref in payload['arg1']:
+            self.node(trafficItemHref)['startedAt'] = time.time()
+
+    def rxFrames(self):
+        """The Rx Frames of the Traffic Item Statistics view"""
+        now = time.time()
+        return dict((trafficItem['name'], 1000 if now - trafficItem.get('startedAt', now) > firstPacketDelay else 0)
+                    for trafficItem in self.root['_children']['traffic'][0]['_children']['trafficItem'])
+
+    def _properties(self, node, properties):
+        result = super(TrafficServer, self)._properties(node, properties)
+        result.pop('startedAt', None)
+        return result
+
+
+def newServer():
+    server = TrafficServer(latency=latency)
+    server.start()
+    traffic = server.addSingleton(server.root, 'traffic', state='unapplied')
+    for index in range(1, trafficItemCount + 1):
+        trafficItem = server.add(traffic, 'trafficItem', name='Traffic {}'.format(index), enabled=True,
+                                 trafficType='ipv4', biDirectional=False, errors=[], state='unapplied')
+        server.add(trafficItem, 'endpointSet', sources=['/topology[1]'], destinations=['/topology[2]'])
+        configElement = server.add(trafficItem, 'configElement')
+        server.add(configElement, 'frameRate', type='percentLineRate', rate=1)
+        server.add(configElement, 'frameSize', type='fixed', fixedSize=128)
+        server.add(trafficItem, 'tracking', trackBy=['flowGroup0'])
+    return server
+
+
+def changeTrafficItems(uhd, iteration):
+    """Change the frame size of a few traffic items, like a test iteration would"""
+    for index in range(changedPerIteration):
+        number = (iteration * changedPerIteration + index) % trafficItemCount + 1
+        frameSizeHref = '{}/traffic/trafficItem/{}/configElement/1/frameSize/1'.format(uhd.href, number)
+        uhd._connection._update(frameSizeHref, {'fixedSize': 128 + iteration})
+
+
+def generateAll(uhd, server):
+    """TrafficItem.find().Generate(), Traffic.Apply() and StartStatelessTrafficBlocking()"""
+    hrefs = [trafficItem['href'] for trafficItem in
+             select(uhd, fromHref='{}/traffic'.format(uhd.href), children=[{'child': '^trafficItem$', 'properties': [], 'filters': []}])['trafficItem']]
+    uhd._connection._execute('{}/traffic/trafficItem/operations/generate'.format(uhd.href), {'arg1': hrefs})
+    uhd._connection._execute('{}/traffic/operations/apply'.format(uhd.href), {'arg1': '{}/traffic'.format(uhd.href)})
+    uhd._connection._execute('{}/traffic/trafficItem/operations/startstatelesstrafficblocking'.format(uhd.href), {'arg1': hrefs})
+    while min(server.rxFrames().values()) == 0:
+        time.sleep(0.05)
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+if __name__ == '__main__':
+    print('{} traffic items, {} iterations changing {} of them, generate {}s per traffic item, apply {}s, start {}s'.format(
+        trafficItemCount, iterations, changedPerIteration, generateCost, applyCost, startCost))
+
+    server = newServer()
+    uhd = MockConnection(server).Ixnetwork
+    start = time.time()
+    for iteration in range(iterations):
+        if iteration > 0:
+            changeTrafficItems(uhd, iteration)
+        generateAll(uhd, server)
+    allSeconds = time.time() - start
+    server.stop()
+    print('   Generate all every iteration: {:7.2f}s'.format(allSeconds))
+
+    server = newServer()
+    uhd = MockConnection(server).Ixnetwork
+    lifecycle = TrafficLifecycle(uhd, pollInterval=0.05, statsReader=server.rxFrames, logger=Quiet())
+    start = time.time()
+    print('   TrafficLifecycle:')
+    print('   {:>9} {:>9} {:>8} {:>8} {:>8} {:>11}'.format('Iteration', 'Generated', 'Generate', 'Apply', 'Start', 'FirstPacket'))
+    for iteration in range(iterations):
+        if iteration > 0:
+            changeTrafficItems(uhd, iteration)
+        timings = lifecycle.run()
+        assert len(timings['generated']) == (trafficItemCount if iteration == 0 else changedPerIteration)
+        print('   {:>9} {:>9} {:8.2f} {:8.2f} {:8.2f} {:11.2f}'.format(iteration + 1, len(timings['generated']), timings['generate'],
+                                                                 timings['apply'], timings['start'], timings['firstPacket']))
+    lifecycleSeconds = time.time() - start
+    server.stop()
+    print('   TrafficLifecycle total:       {:7.2f}s'.format(lifecycleSeconds))
+    print('   Speedup: {:.1f}x'.format(allSeconds / lifecycleSeconds))
@@ -0,0 +1,156 @@
+"""
+benchWriteBatch.py
+
+Description
+   Compare configuring the fields of a raw traffic item with one PATCH per attribute, like
+   restpy attribute assignments, with writeBatch.WriteBatch.
+
+   The mock REST server in mockRestServer.py stands in for the API server.  A raw traffic item has
+   'stacks' stacks of 'fields' fields each, and every field gets ValueType, StartValue, StepValue
+   and CountValue.  The batch also sets the frame size and rate and adds an endpoint set.  Then a
+   batch with an invalid value checks that the error names the line that wrote it, and a batch with
+   an error that names no xpath checks that every write is reported and nothing is sent again.
+
+Requirements:
+   - Python 3
+
+Usage:
+   - Enter: python benchWriteBatch.py [stacks] [fields] [latency]
+"""
+
+import sys, json, time, linecache
+
+from mockRestServer import MockRestServer, MockConnection
+from writeBatch import WriteBatch, WriteBatchError
+
+stackCount = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+fieldCount = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+latency = float(sys.argv[3]) if len(sys.argv) > 3 else 0.005
+valueTypes = ('singleValue', 'increment', 'decrement', 'valueList', 'random')
+
+
+class ImportServer(MockRestServer):
+    """importConfig by xpath, creating the nodes that do not exist yet"""
+    def operation_importconfig(self, href, payload):
+        byXpath = dict((node['xpath'], node) for node in list(self._nodes.values()))
+        self.imported = json.loads(payload['arg2'])
+        for change in self.imported:
+            if change.get('valueType') == 'opaque':
+                raise KeyError('Invalid value')
+            if change.get('valueType', 'singleValue') not in valueTypes:
+                raise KeyError('Invalid valueType {} at {}'.format(change['valueType'], change['xpath']))
+            node = byXpath.get(change['xpath'])
+            if node is None:
+                parentXpath, child = change['xpath'].rsplit('/', 1)
+                node = self.add(byXpath[parentXpath], child.split('[')[0])
+                byXpath[node['xpath']] = node
+            node.update(dict((key, value) for key, value in change.items() if key != 'xpath'))
+
+
+def newServer():
+    server = ImportServer(latency=latency)
+    server.start()
+    vport = server.add(server.root, 'vport', name='Port_1')
+    server.add(server.root, 'vport', name='Port_2')
+    traffic = server.addSingleton(server.root, 'traffic')
+    trafficItem = server.add(traffic, 'trafficItem', name='Raw packet', trafficType='raw')
+    configElement = server.add(trafficItem, 'configElement')
+    server.addSingleton(configElement, 'frameSize', fixedSize=64)
+    server.addSingleton(configElement, 'frameRate', type='framesPerSecond', rate=100)
+    fieldHrefs = []
+    for stackIndex in range(stackCount):
+        stack = server.add(configElement, 'stack', displayName='Stack {}'.format(stackIndex))
+        for fieldIndex in range(fieldCount):
+            fieldHrefs.append(server.add(stack, 'field', valueType='singleValue', singleValue='0')['href'])
+    return server, trafficItem['href'], configElement['href'], fieldHrefs, vport['href']
+
+
+def fieldValues(index):
+    return {'valueType': 'increment', 'startValue': str(index), 'stepValue': '1', 'countValue': 10}
+
+
+def perAttribute(uhd, configElementHref, fieldHrefs):
+    """field.ValueType = ..., field.StartValue = ..., one PATCH per attribute"""
+    uhd._connection._update('{}/frameSize'.format(configElementHref), {'fixedSize': 128})
+    uhd._connection._update('{}/frameRate'.format(configElementHref), {'type': 'percentLineRate'})
+    uhd._connection._update('{}/frameRate'.format(configElementHref), {'rate': 50})
+    for index, fieldHref in enumerate(fieldHrefs):
+        for name, value in fieldValues(index).items():
+            uhd._connection._update(fieldHref, {name: value})
+
+
+def batched(uhd, trafficItemHref, configElementHref, fieldHrefs, vportHref):
+    with WriteBatch(uhd, logger=Quiet()) as batch:
+        configElement = batch.node(configElementHref)
+        configElement.child('FrameSize').FixedSize = 128
+        configElement.child('FrameRate').update(Type='percentLineRate', Rate=50)
+        for index, fieldHref in enumerate(fieldHrefs):
+            batch.node(fieldHref).update(**dict((name[0].upper() + name[1:], value) for name, value in fieldValues(index).items()))
+        batch.node(trafficItemHref).add('EndpointSet', Sources=[vportHref + '/protocols'], Name='EP1')
+
+
+def measure(server, function, *args):
+    server.resetCounters()
+    start = time.time()
+    function(*args)
+    return server.requestCount, time.time() - start
+
+
+class Quiet(object):
+    def info(self, message):
+        pass
+
+
+if __name__ == '__main__':
+    print('{} fields of a raw traffic item, 4 attributes each, latency {}s'.format(stackCount * fieldCount, latency))
+
+    server, trafficItemHref, configElementHref, fieldHrefs, vportHref = newServer()
+    uhd = MockConnection(server).Ixnetwork
+    requests, seconds = measure(server, perAttribute, uhd, configElementHref, fieldHrefs)
+    server.stop()
+    print('   One PATCH per attribute: {:6} requests {:7.2f}s'.format(requests, seconds))
+
+    server, trafficItemHref, configElementHref, fieldHrefs, vportHref = newServer()
+    server.addSingleton(server.node(vportHref), 'protocols')
+    uhd = MockConnection(server).Ixnetwork
+    batchRequests, batchSeconds = measure(server, batched, uhd, trafficItemHref, configElementHref, fieldHrefs, vportHref)
+    print('   WriteBatch:              {:6} requests {:7.2f}s  {:.1f}x'.format(batchRequests, batchSeconds, seconds / batchSeconds))
+    assert [server.node(href)['startValue'] for href in fieldHrefs] == [str(index) for index in range(len(fieldHrefs))]
+    assert server.node('{}/configElement/1/frameSize'.format(trafficItemHref))['fixedSize'] == 128
+    endpointSet = server.node('{}/endpointSet/1'.format(trafficItemHref))
+    assert endpointSet['sources'] == ['/vport[1]/protocols'] and endpointSet['name'] == 'EP1'
+
+    # An invalid value is reported with the line that wrote it
+    try:
+        with WriteBatch(uhd, logger=Quiet()) as batch:
+            batch.node(fieldHrefs[0]).ValueType = 'increment'
+            batch.node(fieldHrefs[1]).ValueType = 'nonsense'
+    except WriteBatchError as errMsg:
+        print('\n   {}'.format(errMsg).replace('\n\t', '\n\t   '))
+        filename, line = errMsg.failures[0]['origin'].rsplit(':', 1)
+        assert len(errMsg.failures) == 1 and 'nonsense' in linecache.getline(filename, int(line))
+    else:
+        raise AssertionError('The invalid valueType was not reported')
+
+    # An error without an xpath reports the whole batch, without sending the writes one at a time
+    server.resetCounters()
+    try:
+        with WriteBatch(uhd, logger=Quiet()) as batch:
+            batch.node(fieldHrefs[0]).ValueType = 'increment'
+            batch.node(fieldHrefs[1]).ValueType = 'opaque'
+    except WriteBatchError as errMsg:
+        assert len(errMsg.failures) == 2 and server.requestCount == 2
+        print('   An error that names no xpath reports all {} writes in {} requests'.format(len(errMsg.failures), server.requestCount))
+    else:
+        raise AssertionError('The error was not reported')
+
+    # Writes to a node made after writes to another node are sent after them
+    with WriteBatch(uhd, logger=Quiet()) as batch:
+        batch.node(fieldHrefs[0]).ValueType = 'increment'
+        batch.node(fieldHrefs[0]).StartValue = '7'
+        batch.node(fieldHrefs[1]).ValueType = 'decrement'
+        batch.node(fieldHrefs[0]).ValueType = 'random'
+    assert [sorted(change) for change in server.imported] == [['startValue', 'valueType', 'xpath'], ['valueType', 'xpath'], ['valueType', 'xpath']]
+    assert server.imported[0]['xpath'] == server.imported[2]['xpath'] and server.node(fieldHrefs[0])['valueType'] == 'random'
+    print('   Writes are sent in the order they were made: OK')
+    server.stop()
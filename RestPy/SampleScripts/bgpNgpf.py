@@ -33,28 +33,22 @@ Usage:
 
 import json, sys, os, time, traceback
 from uhd_restpy import SessionAssistant
+from protocolWaiter import waitForSessionsUp
+from statSnapshot import StatViewSnapshot
+from portConnector import PortConnector, printTimings
+from trafficLifecycle import TrafficLifecycle
+from writeBatch import WriteBatch
+from findIndex import getFindIndex
 
 try:
     from tabulate import tabulate
 
     # function to print a stat view in a table format
     def printStat(statView, transpose=True):
-        data = statView.Rows.RawData
-        columnCaptions = statView.ColumnHeaders
-        cheader = columnCaptions[:]
-        rows = []
-
-        for row in data:
-            tmp = [row[columnCaptions.index(col)] for col in cheader]
-            rows.append(tmp[:])
-
-        if transpose:
-            # transpose the table
-            rows.insert(0,cheader)
-            rows = list(zip(*rows))
-            cheader=[]
-            
-        print(tabulate(rows,headers=cheader,tablefmt="psql"))
+        # One snapshot of the view, transposed once into columns
+        snapshot = StatViewSnapshot(statView)
+        cheader = [] if transpose else snapshot.columns
+        print(tabulate(snapshot.table(transpose), headers=cheader, tablefmt="psql"))
 except:
     pass
 
@@ -85,19 +79,27 @@ try:
 
     uhd = session.Ixnetwork
     uhd.info("Session ID/Session Name: {} {}".format(session.Session.Id,session.Session.Name))
-    uhd.info('Adding Required Virtual Ports')
-    vports = []
-    for i in range(1,len(portList)+1):
-        uhd.Vport.add(Name='Port_%d' %i)
     uhd.info('Assigning Ports')
-    portmap = session.PortMapAssistant()  
-    for i,port in enumerate(portList):
-        portmap.Map(Location=port, Name='Port_%d' %(i+1))
-
-    portmap.Connect(ForceOwnership=True) 
+    # Creates the vports, maps and connects all ports at once and times each port
+    portConnector = PortConnector(uhd)
+    portReport = portConnector.connect([(port, 'Port_%d' %(i+1)) for i,port in enumerate(portList)],
+                                       forceOwnership=forceTakePortOwnership, deadline=300)
+    printTimings(portReport)
+
+    # Every call below is at least one request, about 25 per topology.
+    # To build many topologies from a compact spec with a constant number of requests (see topologyBuilder.py):
+    #    spec = {'topology': {'count': 256, 'name': 'Topo{t}', 'ports': ['Port_{t}'],
+    #            'deviceGroup': {'name': 'DG{t}', 'multiplier': 1,
+    #                'ethernet': {'mac': {'start': '00:01:01:00:00:01', 'step': '00:00:00:00:00:01', 'topologyStep': '00:00:00:01:00:00'},
+    #                    'ipv4': {'address': {'start': '1.1.0.1', 'step': '0.0.0.1', 'topologyStep': '0.0.1.0'},
+    #                             'bgpIpv4Peer': {'type': 'internal', 'localAs2Bytes': 101}}}}}}
+    #    TopologyBuilder(uhd).build(spec)
+
+    # The vports are read with one select and found by name in-process (see findIndex.py)
+    findIndex = getFindIndex(uhd)
 
     uhd.info('Creating Topology Group 1')
-    topology1 = uhd.Topology.add(Name='Topo1', Vports=uhd.Vport.find(Name='^Port_1$'))
+    topology1 = uhd.Topology.add(Name='Topo1', Vports=findIndex.find(uhd.Vport, Name='^Port_1$'))
     deviceGroup1 = topology1.DeviceGroup.add(Name='DG1', Multiplier='1')
     ethernet1 = deviceGroup1.Ethernet.add(Name='Eth1')
     ethernet1.Mac.Increment(start_value='00:01:01:01:00:01', step_value='00:00:00:00:00:01')
@@ -124,7 +126,7 @@ try:
     ipv4PrefixPool.PrefixLength.Single(32)
 
     uhd.info('Creating Topology Group 2')
-    topology2 = uhd.Topology.add(Name='Topo2', Vports=uhd.Vport.find(Name='^Port_2$'))
+    topology2 = uhd.Topology.add(Name='Topo2', Vports=findIndex.find(uhd.Vport, Name='^Port_2$'))
     deviceGroup2 = topology2.DeviceGroup.add(Name='DG2', Multiplier='1')
 
     ethernet2 = deviceGroup2.Ethernet.add(Name='Eth2')
@@ -153,21 +155,15 @@ try:
 
     uhd.StartAllProtocols(Arg1='sync')
     
-    i = 0
-    while i < protocolTimeout:
-        sessionStatusLists = [protocolObj.refresh().SessionStatus for protocolObj in [bgp1,bgp2]]
-        sessionsStatusList = [s for l in sessionStatusLists for s in l]
-        if len(set(sessionsStatusList)) == 1 and sessionsStatusList[0] == 'up':
-            uhd.info('{} protocol sessions are up'.format(','.join([p.DescriptiveName for p in [bgp1,bgp2]])))
-            break
-
-        time.sleep(1)
-        i += 1
-
-    if i == protocolTimeout:
-        uhd.error('FAIL Session up status not reached in {} secs'.format(protocolTimeout))
+    # One batched SessionStatus read per poll, returns as soon as all sessions are up.
+    sessionsUp = waitForSessionsUp([bgp1, bgp2], timeout=protocolTimeout)
+    if sessionsUp['allUp'] == False:
+        uhd.error('FAIL Session up status not reached in {} secs: {}'.format(protocolTimeout, ','.join(sessionsUp['down'])))
         exit()
 
+    for peer in sessionsUp['peers']:
+        uhd.info('{} protocol sessions are up. Time to up: {}'.format(peer['name'], peer['timeToUp']))
+
     uhd.info('Verify protocol sessions\n')
     protocolSummary = session.StatViewAssistant('Protocols Summary')
     protocolSummary.CheckCondition('Sessions Not Started', protocolSummary.EQUAL, 0)
@@ -189,17 +185,35 @@ try:
     #       Therefore, ConfigElement is a list.
     uhd.info('Configuring config elements')
     configElement = trafficItem.ConfigElement.find()[0]
-    configElement.FrameRate.update(Type='percentLineRate', Rate=50)
-    configElement.FrameRateDistribution.PortDistribution = 'splitRateEvenly'
-    configElement.FrameSize.FixedSize = 128
-    trafficItem.Tracking.find()[0].TrackBy = ['flowGroup0']
-
-    trafficItem.Generate()
-    uhd.Traffic.Apply()
-    uhd.Traffic.StartStatelessTrafficBlocking()
+    # The writes are recorded and sent with one importConfig at the end of the batch (see writeBatch.py)
+    with WriteBatch(uhd) as batch:
+        configElementNode = batch.node(configElement)
+        configElementNode.child('FrameRate').update(Type='percentLineRate', Rate=50)
+        configElementNode.child('FrameRateDistribution').PortDistribution = 'splitRateEvenly'
+        configElementNode.child('FrameSize').FixedSize = 128
+        # The batch reads the xpath of the tracking node from the server: /traffic/trafficItem[1]/tracking
+        batch.node(trafficItem.Tracking.find()[0]).TrackBy = ['flowGroup0']
+
+    # Generate the traffic items that changed since the last run, apply once and start all of them.
+    # run() logs the seconds of every phase. waitFirstPacket=False returns once the traffic is started, like
+    # StartStatelessTrafficBlocking(), instead of waiting up to 60 seconds for every traffic item to receive a frame.
+    TrafficLifecycle(uhd).run(waitFirstPacket=False)
+
+    # To record a per-second time series of the stats for the whole traffic run (see statsRecorder.py):
+    #    recorder = StatsRecorder.fromStatView(session.StatViewAssistant('Traffic Item Statistics'), 'trafficItem.stats', interval=1)
+    #    recorder.start()
+    #    ... wait for the traffic run to end ...
+    #    recorder.stop()
 
     flowStatistics = session.StatViewAssistant('Flow Statistics')
 
+    # With per-flow tracking the view can hold hundreds of thousands of rows.
+    # To stream it in fixed-size batches with constant memory instead (see statViewPager.py):
+    #    flowPager = StatViewPager(uhd, 'Flow Statistics', PageSize=1000)
+    #    flowPager.AddRowFilter('Tx Frames', flowPager.GREATER_THAN, 0)
+    #    for rows in flowPager.Batches():
+    #        ...
+
     # StatViewAssistant could also filter by REGEX, LESS_THAN, GREATER_THAN, EQUAL. 
     # Examples:
     #    flowStatistics.AddRowFilter('Port Name', flowStatistics.REGEX, '^Port 1$')
@@ -0,0 +1,213 @@
+"""
+configIndex.py
+
+Description
+   Query an exported JSON config, such as bgp.json or bgp_ngpf_8.50.json, without an API server.
+
+   An exported config is a tree of nodes that each have an xpath.  Multivalue attributes are
+   inlined under the attribute they belong to, with an xpath that names their owner:
+
+      "mac": {"xpath": "/multivalue[@source = '/topology[1]/deviceGroup[1]/ethernet[1] mac']",
+              "counter": {"start": "00:01:01:00:00:01", "step": "00:00:00:00:00:01", "direction": "increment"}}
+
+   ConfigIndex parses the file once and walks the tree once to build:
+      - xpath -> node
+      - xpath -> parent xpath
+      - node type -> xpaths, where the node type is the key of the node in its parent. Ex: deviceGroup, bgpIpv4Peer
+      - name -> xpaths
+      - multivalue xpath -> (owner xpath, attribute) and (owner xpath, attribute) -> multivalue xpath
+
+   The index holds references to the parsed nodes, it does not copy them.  Queries such as
+   "every deviceGroup with multiplier > 1" or "the dutIp pattern of every BGP peer" then run
+   in memory in microseconds.
+
+Requirements:
+   - Python 2.7 and 3+
+
+Usage:
+   from configIndex import ConfigIndex
+
+   config = ConfigIndex.fromFile('bgp_ngpf_8.50.json')
+   for deviceGroup in config.find('deviceGroup', multiplier=lambda multiplier: multiplier > 1):
+       print(deviceGroup['xpath'], deviceGroup['multiplier'])
+
+   for bgpPeer in config.find('bgpIpv4Peer'):
+       print(bgpPeer['name'], config.pattern(bgpPeer, 'dutIp'))
+"""
+
+import re, json
+
+from batchSelect import stringTypes
+
+# The xpath of an inlined multivalue: /multivalue[@source = '<owner xpath> <attribute>']
+multivalueXpathRegex = re.compile(r"^/multivalue\[@source = '(.+) ([^ ']+)'\]$")
+
+
+class ConfigIndex(object):
+    def __init__(self, config):
+        """
+        Parameters
+            config: (dict): A parsed JSON config.
+        """
+        self.config = config
+        self.nodes = {}
+        self.parents = {}
+        self.byType = {}
+        self.byName = {}
+        self.multivalueOwners = {}
+        self.multivalues = {}
+        self._regexCache = {}
+        self._build()
+
+    @classmethod
+    def fromFile(cls, filename):
+        with open(filename) as configFile:
+            return cls(json.load(configFile))
+
+    def _build(self):
+        # An explicit stack instead of recursion: scaled configs are deep and wide
+        stack = [(self.config, 'ixnetwork', None)]
+        while len(stack) > 0:
+            node, nodeType, parentXpath = stack.pop()
+            xpath = node.get('xpath')
+            if xpath is not None:
+                match = multivalueXpathRegex.match(xpath) if xpath.startswith('/multivalue') else None
+                if match is not None:
+                    nodeType = 'multivalue'
+                    self.multivalueOwners[xpath] = (match.group(1), match.group(2))
+                    self.multivalues[(match.group(1), match.group(2))] = xpath
+
+                self.nodes[xpath] = node
+                self.parents[xpath] = parentXpath
+                self.byType.setdefault(nodeType, []).append(xpath)
+                name = node.get('name')
+                if name is not None and not isinstance(name, (dict, list)):
+                    self.byName.setdefault(name, []).append(xpath)
+                parentXpath = xpath
+
+            # Push in reverse so that nodes are visited in config order
+            for key, value in reversed(list(node.items())):
+                if isinstance(value, dict):
+                    stack.append((value, key, parentXpath))
+                elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+                    for child in reversed(value):
+                        stack.append((child, key, parentXpath))
+
+    def node(self, xpath):
+        return self.nodes[xpath]
+
+    def parent(self, node):
+        """The parent node of a node or xpath, or None for the root"""
+        parentXpath = self.parents[self._xpath(node)]
+        return self.nodes[parentXpath] if parentXpath is not None else None
+
+    def ancestor(self, node, nodeType):
+        """The closest ancestor of a given type. Ex: config.ancestor(bgpPeer, 'deviceGroup')"""
+        xpath = self.parents[self._xpath(node)]
+        while xpath is not None:
+            if self._type(xpath) == nodeType:
+                return self.nodes[xpath]
+            xpath = self.parents[xpath]
+        return None
+
+    def types(self):
+        return sorted(self.byType.keys())
+
+    def find(self, nodeType, under=None, **filters):
+        """
+        Description
+            Find the nodes of one type, the way restpy find() does on a live session.
+
+        Parameters
+            nodeType: (str): The key of the node in its parent. Ex: topology, deviceGroup, ethernet, bgpIpv4Peer, vport
+            under: (node|str): Only nodes below this node or xpath. Ex: '/topology' for the nodes of all topologies,
+                   which leaves out the protocol settings under '/globals'.
+            filters: attribute=value pairs. A string value is a regex searched in the attribute,
+                     a callable is a predicate on the attribute, anything else is compared with ==.
+                     Ex: find('deviceGroup', name='^DG', multiplier=lambda multiplier: multiplier > 1)
+
+        Return
+            A list of nodes in config order.
+        """
+        xpaths = self.byType.get(nodeType, [])
+        if under is not None:
+            prefix = self._xpath(under)
+            xpaths = [xpath for xpath in xpaths if xpath.startswith(prefix) and xpath[len(prefix):len(prefix) + 1] in ('/', '[')]
+
+        if len(filters) == 0:
+            return [self.nodes[xpath] for xpath in xpaths]
+
+        tests = [(attribute, self._test(value)) for attribute, value in filters.items()]
+        matches = []
+        for xpath in xpaths:
+            node = self.nodes[xpath]
+            for attribute, test in tests:
+                if attribute not in node or not test(node[attribute]):
+                    break
+            else:
+                matches.append(node)
+        return matches
+
+    def findByName(self, name):
+        """All nodes with this exact name"""
+        return [self.nodes[xpath] for xpath in self.byName.get(name, [])]
+
+    def multivalue(self, node, attribute):
+        """The multivalue node of an attribute, or None if the attribute is not a multivalue"""
+        xpath = self.multivalues.get((self._xpath(node), attribute))
+        return self.nodes[xpath] if xpath is not None else None
+
+    def owner(self, multivalue):
+        """(owner node, attribute) of a multivalue node or xpath"""
+        ownerXpath, attribute = self.multivalueOwners[self._xpath(multivalue)]
+        return self.nodes.get(ownerXpath), attribute
+
+    def pattern(self, node, attribute):
+        """
+        Description
+            Describe the value of an attribute. For a multivalue this is its pattern.
+
+        Return
+            {'pattern': 'singleValue', 'value': ...}
+            {'pattern': 'counter', 'start': ..., 'step': ..., 'direction': ...}
+            {'pattern': 'valueList', 'values': [...]}
+            {'pattern': <other pattern name>, ...the pattern node attributes}
+            {'pattern': 'value', 'value': ...} for an attribute that is not a multivalue.
+        """
+        multivalue = self.multivalue(node, attribute)
+        if multivalue is None:
+            return {'pattern': 'value', 'value': self._node(node).get(attribute)}
+
+        for key, value in multivalue.items():
+            if key in ('xpath', 'clearOverlays', 'nest', 'overlay') or not isinstance(value, dict):
+                continue
+            description = dict((name, cell) for name, cell in value.items() if name != 'xpath')
+            if key == 'singleValue':
+                return {'pattern': 'singleValue', 'value': description.get('value')}
+            if key == 'valueList':
+                return {'pattern': 'valueList', 'values': description.get('values')}
+            description['pattern'] = key
+            return description
+
+        return {'pattern': 'unknown'}
+
+    def _test(self, value):
+        if callable(value):
+            return value
+        if isinstance(value, stringTypes):
+            regex = self._regexCache.get(value)
+            if regex is None:
+                regex = self._regexCache[value] = re.compile(value)
+            return lambda cell: isinstance(cell, stringTypes) and regex.search(cell) is not None
+        return lambda cell: cell == value
+
+    def _xpath(self, node):
+        return node['xpath'] if isinstance(node, dict) else node
+
+    def _node(self, node):
+        return node if isinstance(node, dict) else self.nodes[node]
+
+    def _type(self, xpath):
+        if xpath in self.multivalueOwners:
+            return 'multivalue'
+        return re.sub(r'\[.*$', '', xpath.rsplit('/', 1)[-1])
@@ -0,0 +1,452 @@
+"""
+configStream.py
+
+Description
+   Read, transform and write exported JSON configs, such as bgp.json, without loading them.
+
+   json.load() of a scaled config with thousands of device groups and route pools holds the
+   whole tree in memory, several times the size of the file.  configStream reads the file in
+   fixed-size chunks and never holds more than the chunk plus the nodes on the current path:
+   memory is bounded by the depth of the tree, not by the size of the file.
+
+   There are three layers:
+      - iterEvents(file): The file as a stream of events: start_map, map_key, end_map,
+        start_array, end_array and value.
+      - ConfigWriter(file): Writes events, or whole values, back out as JSON.  The output of an
+        unchanged config is the same as json.dump(config, indent=2).
+      - ConfigStream: Calls visitors for the nodes of a node type or with an xpath that matches
+        a regex, and writes the result.
+
+   A visitor gets the node as an OrderedDict of its attributes and modifies it in place, or
+   returns DROP to leave the node and its subtree out.  By default the node only holds the
+   attributes up to its first child node, since its children can be arbitrarily large.  In an
+   exported config the xpath always comes first, but some attributes follow the multivalues of
+   the node.  Ex: the name of a deviceGroup.  Attributes the visitor sets that are not in the
+   node replace the streamed value when it comes by, or are appended at the end of the node.
+   Register a visitor with subtree=True to get the whole node with its children instead, for
+   nodes known to be small such as vport or multivalue.
+
+Requirements:
+   - Python 2.7 and 3+
+
+Usage:
+   from configStream import ConfigStream, DROP
+
+   def rewriteConnectedTo(vport):
+       vport['connectedTo'] = vport['connectedTo'].replace('192.168.70.11', '10.36.78.190')
+
+   def scaleMultiplier(deviceGroup):
+       deviceGroup['multiplier'] *= 10
+
+   stream = ConfigStream()
+   stream.on(rewriteConnectedTo, nodeType='vport')
+   stream.on(scaleMultiplier, xpath=r'^/topology\[\d+\]/deviceGroup\[\d+\]$')
+   stream.on(lambda node: DROP, nodeType='quickTest')
+   stream.transform('scaled.json', 'scaled_lab2.json')
+"""
+
+import re, json, time
+from collections import OrderedDict
+from json.decoder import scanstring
+
+# Returned by a visitor to leave the node and its subtree out
+DROP = object()
+
+_tokenRegex = re.compile(r'[ \t\n\r]*(?:([{}\[\],:])|(")|(-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?)|(true|false|null))')
+_literals = {'true': True, 'false': False, 'null': None}
+
+
+def iterEvents(fileObj, chunkSize=1024 * 1024):
+    """
+    Description
+        Tokenize a JSON file into events, reading it chunkSize characters at a time.
+        The file is expected to be well formed, as exported by the API server.
+
+    Parameters
+        fileObj: A file object opened for reading.
+        chunkSize: (int): The number of characters to read at a time.
+
+    Return
+        A generator of (event, value):
+           ('start_map', None), ('map_key', key), ('end_map', None),
+           ('start_array', None), ('end_array', None), ('value', value)
+    """
+    buffer = fileObj.read(chunkSize)
+    position = 0
+    offset = 0
+    eof = len(buffer) == 0
+    # True for a map, False for an array
+    stack = []
+    expectKey = False
+
+    while True:
+        match = _tokenRegex.match(buffer, position)
+        # A token near the end of the buffer may continue in the next chunk. Ex: 1.5 read as 1 and .5
+        if not eof and (match is None or len(buffer) - match.end() < 64):
+            chunk = fileObj.read(chunkSize)
+            eof = len(chunk) == 0
+            offset += position
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+
+        if match is None:
+            if buffer[position:].strip() == '':
+                return
+            raise ValueError('Invalid JSON at offset {}: {}'.format(offset + position, buffer[position:position + 40]))
+
+        position = match.end()
+        punctuation, quote, number, fraction, exponent, literal = match.groups()
+        if punctuation is not None:
+            if punctuation == ',':
+                expectKey = stack[-1]
+            elif punctuation == '{':
+                stack.append(True)
+                expectKey = True
+                yield 'start_map', None
+            elif punctuation == '}':
+                stack.pop()
+                expectKey = False
+                yield 'end_map', None
+            elif punctuation == '[':
+                stack.append(False)
+                yield 'start_array', None
+            elif punctuation == ']':
+                stack.pop()
+                yield 'end_array', None
+        elif quote is not None:
+            while True:
+                try:
+                    value, position = scanstring(buffer, position)
+                    break
+                except ValueError:
+                    # The string continues in the next chunk
+                    chunk = fileObj.read(chunkSize)
+                    if len(chunk) == 0:
+                        raise
+                    buffer += chunk
+            if expectKey:
+                expectKey = False
+                yield 'map_key', value
+            else:
+                yield 'value', value
+        elif number is not None:
+            yield 'value', float(number) if fraction is not None or exponent is not None else int(number)
+        else:
+            yield 'value', _literals[literal]
+
+
+def buildValue(events, event, value):
+    """Build the Python value that starts with event from the rest of the events"""
+    if event == 'value':
+        return value
+    if event == 'start_map':
+        node = OrderedDict()
+        for event, key in events:
+            if event == 'end_map':
+                return node
+            event, value = next(events)
+            node[key] = buildValue(events, event, value)
+    values = []
+    for event, value in events:
+        if event == 'end_array':
+            return values
+        values.append(buildValue(events, event, value))
+
+
+class ConfigWriter(object):
+    def __init__(self, fileObj, indent=2):
+        """
+        Parameters
+            fileObj: A file object opened for writing.
+            indent: (int): Spaces per level as in json.dump. None writes everything on one line.
+        """
+        self._file = fileObj
+        self._indent = indent
+        # Per open container: True until its first member is written
+        self._empty = []
+        self._pendingKey = None
+
+    def _prefix(self):
+        parts = []
+        if len(self._empty) > 0:
+            if not self._empty[-1]:
+                parts.append(',')
+            self._empty[-1] = False
+            if self._indent is not None:
+                parts.append('\n' + ' ' * (self._indent * len(self._empty)))
+        if self._pendingKey is not None:
+            parts.append(json.dumps(self._pendingKey))
+            parts.append(': ' if self._indent is not None else ':')
+            self._pendingKey = None
+        if len(parts) > 0:
+            self._file.write(''.join(parts))
+
+    def _close(self, character):
+        empty = self._empty.pop()
+        if not empty and self._indent is not None:
+            self._file.write('\n' + ' ' * (self._indent * len(self._empty)))
+        self._file.write(character)
+
+    def key(self, key):
+        """The key of the next value. It is only written with the value"""
+        self._pendingKey = key
+
+    def discardKey(self):
+        self._pendingKey = None
+
+    def startMap(self):
+        self._prefix()
+        self._file.write('{')
+        self._empty.append(True)
+
+    def endMap(self):
+        self._close('}')
+
+    def startArray(self):
+        self._prefix()
+        self._file.write('[')
+        self._empty.append(True)
+
+    def endArray(self):
+        self._close(']')
+
+    def value(self, value):
+        self._prefix()
+        self._file.write(json.dumps(value))
+
+    def event(self, event, value):
+        """Write one event of iterEvents()"""
+        if event == 'map_key':
+            self.key(value)
+        elif event == 'value':
+            self.value(value)
+        else:
+            getattr(self, {'start_map': 'startMap', 'end_map': 'endMap',
+                           'start_array': 'startArray', 'end_array': 'endArray'}[event])()
+
+    def write(self, value):
+        """Write a whole value"""
+        if isinstance(value, dict):
+            self.startMap()
+            for key, member in value.items():
+                self.key(key)
+                self.write(member)
+            self.endMap()
+        elif isinstance(value, list):
+            self.startArray()
+            for member in value:
+                self.write(member)
+            self.endArray()
+        else:
+            self.value(value)
+
+
+class _NullWriter(ConfigWriter):
+    """Discards everything, for ConfigStream.visit()"""
+    def __init__(self):
+        ConfigWriter.__init__(self, None)
+
+    def _prefix(self):
+        self._pendingKey = None
+
+    def _close(self, character):
+        self._empty.pop()
+
+    def startMap(self):
+        self._empty.append(True)
+
+    def startArray(self):
+        self._empty.append(True)
+
+    def value(self, value):
+        pass
+
+    def write(self, value):
+        self._pendingKey = None
+
+
+class ConfigStream(object):
+    def __init__(self, chunkSize=1024 * 1024):
+        """
+        Parameters
+            chunkSize: (int): The number of characters read from the file at a time.
+        """
+        self._chunkSize = chunkSize
+        self._rules = []
+        self._counters = {}
+
+    def on(self, visitor, nodeType=None, xpath=None, subtree=False):
+        """
+        Description
+            Register a visitor for matching nodes.  Visitors are called in registration order.
+
+        Parameters
+            visitor: A function(node). It modifies the node in place or returns DROP.
+            nodeType: (str): The key of the node in its parent, or 'multivalue'. Ex: vport, deviceGroup, bgpIpv4Peer
+            xpath: (str): A regex searched in the xpath of the node. Ex: r'^/topology\\[1\\]/deviceGroup\\[\\d+\\]$'
+            subtree: (bool): Pass the whole node with its children instead of its leading attributes.
+        """
+        self._rules.append((nodeType, re.compile(xpath) if xpath is not None else None, visitor, subtree))
+        return self
+
+    def transform(self, source, destination, indent=2):
+        """
+        Description
+            Stream a config from source to destination through the visitors.
+
+        Parameters
+            source: (str|file): The config filename or a file object.
+            destination: (str|file): The output filename or a file object.
+            indent: (int): See ConfigWriter.
+
+        Return
+            {'nodes': nodes streamed, 'visited': visitor calls, 'dropped': nodes dropped, 'seconds': float}
+            The children of a node passed whole to a subtree visitor are not counted in nodes.
+        """
+        if not hasattr(destination, 'write'):
+            with open(destination, 'w') as destinationFile:
+                return self.transform(source, destinationFile, indent)
+        return self._run(source, ConfigWriter(destination, indent))
+
+    def visit(self, source):
+        """Stream a config through the visitors without writing anything. Returns the same counters as transform()"""
+        return self._run(source, _NullWriter())
+
+    def _run(self, source, writer):
+        if not hasattr(source, 'read'):
+            with open(source) as sourceFile:
+                return self._run(sourceFile, writer)
+
+        start = time.time()
+        self._counters = {'nodes': 0, 'visited': 0, 'dropped': 0}
+        events = iterEvents(source, self._chunkSize)
+        for event, value in events:
+            self._value(events, event, value, 'ixnetwork', writer)
+        self._counters['seconds'] = time.time() - start
+        return self._counters
+
+    def _value(self, events, event, value, nodeType, writer):
+        if event == 'start_map':
+            self._map(events, nodeType, writer)
+        elif event == 'start_array':
+            writer.startArray()
+            self._arrayRest(events, nodeType, writer)
+        else:
+            writer.value(value)
+
+    def _arrayRest(self, events, nodeType, writer):
+        for event, value in events:
+            if event == 'end_array':
+                writer.endArray()
+                return
+            self._value(events, event, value, nodeType, writer)
+
+    def _skip(self, events, depth):
+        for event, value in events:
+            if event == 'start_map' or event == 'start_array':
+                depth += 1
+            elif event == 'end_map' or event == 'end_array':
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _map(self, events, nodeType, writer):
+        # Read the attributes up to the first child node: the start of a map or of a list of maps
+        node = OrderedDict()
+        firstChild = None
+        for event, key in events:
+            if event == 'end_map':
+                break
+            event, value = next(events)
+            if event == 'value':
+                node[key] = value
+                continue
+            if event == 'start_array':
+                event, value = next(events)
+                if event != 'start_map':
+                    # A list of values is an attribute
+                    node[key] = [] if event == 'end_array' else [buildValue(events, event, value)] + buildValue(events, 'start_array', None)
+                    continue
+                firstChild = (key, 'array')
+            else:
+                firstChild = (key, 'map')
+            break
+
+        xpath = node.get('xpath')
+        rules = []
+        if xpath is not None:
+            self._counters['nodes'] += 1
+            if xpath.startswith('/multivalue'):
+                nodeType = 'multivalue'
+            rules = [rule for rule in self._rules
+                     if (rule[0] is None or rule[0] == nodeType) and (rule[1] is None or rule[1].search(xpath) is not None)]
+
+        if any(rule[3] for rule in rules):
+            # Read the whole node
+            if firstChild is not None:
+                key, kind = firstChild
+                node[key] = buildValue(events, 'start_map', None)
+                if kind == 'array':
+                    node[key] = [node[key]] + buildValue(events, 'start_array', None)
+                for event, key in events:
+                    if event == 'end_map':
+                        break
+                    event, value = next(events)
+                    node[key] = buildValue(events, event, value)
+            if self._callVisitors(rules, node) is DROP:
+                writer.discardKey()
+                return
+            writer.write(node)
+            return
+
+        leadingKeys = set(node)
+        if self._callVisitors(rules, node) is DROP:
+            writer.discardKey()
+            if firstChild is not None:
+                # Inside this map and the child map, plus the child list
+                self._skip(events, 2 if firstChild[1] == 'map' else 3)
+            return
+
+        overrides = dict((key, value) for key, value in node.items() if key not in leadingKeys)
+        writer.startMap()
+        for key, value in node.items():
+            if key not in overrides:
+                writer.key(key)
+                writer.write(value)
+
+        if firstChild is not None:
+            key, kind = firstChild
+            writer.key(key)
+            if kind == 'array':
+                writer.startArray()
+                self._map(events, key, writer)
+                self._arrayRest(events, key, writer)
+            else:
+                self._map(events, key, writer)
+
+            for event, key in events:
+                if event == 'end_map':
+                    break
+                event, value = next(events)
+                writer.key(key)
+                if key in overrides:
+                    # Set by a visitor before it was read
+                    if event != 'value':
+                        self._skip(events, 1)
+                    writer.write(overrides.pop(key))
+                else:
+                    self._value(events, event, value, key, writer)
+
+        for key, value in overrides.items():
+            writer.key(key)
+            writer.write(value)
+        writer.endMap()
+
+    def _callVisitors(self, rules, node):
+        for nodeType, xpath, visitor, subtree in rules:
+            self._counters['visited'] += 1
+            if visitor(node) is DROP:
+                self._counters['dropped'] += 1
+                return DROP
+        return None
@@ -0,0 +1,255 @@
+"""
+configUploadCache.py
+
+Description
+   Upload config files to the API server once per content, instead of once per load.
+
+   uhd.LoadConfig(Files(configFile, local_file=True)) uploads the file every time.  CI loads the
+   same 150-900 KB configs thousands of times a day.
+
+   ConfigUploadCache names the uploaded file after the SHA-256 of its content, such as
+   uhdConfig-3af17740e041ad11a4faa2c4.ixncfg, and keeps a local index of the files each API
+   server session is known to have:
+      - In the index: nothing is uploaded or checked, the config is loaded by its remote name
+        with LoadConfig(Files(remoteFilename, local_file=False)).  If the load fails because the
+        file is gone, the entry is dropped and the file is uploaded and loaded again.
+      - Not in the index: one GET of the server file list checks for the file.  It is only
+        uploaded if it is missing or has a different size.
+
+   The index is a JSON file shared by all scripts of the user.  It keeps the most recently used
+   'maxEntries' files per session and evicts the least recently used ones.  With removeEvicted
+   the evicted files are also removed from the server.  The SHA-256 of a local file is
+   recomputed only when its size or modification time changes.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from configUploadCache import getUploadCache
+
+   getUploadCache().loadConfig(uhd, 'ospf.ixncfg')
+
+   # Or only upload, and load the remote file yourself
+   remoteFilename = getUploadCache().upload(uhd, 'ospf.ixncfg')
+   uhd.LoadConfig(Files(remoteFilename, local_file=False))
+"""
+
+import os, json, time, hashlib, threading
+from collections import OrderedDict
+
+try:
+    from urllib.parse import quote
+except ImportError:
+    from urllib import quote
+
+from batchSelect import rootHref
+from attributeCache import invalidateAttributeCache
+from findIndex import invalidateFindIndex
+
+defaultIndexFile = os.path.join(os.path.expanduser('~'), '.uhdConfigUploadIndex.json')
+
+_lock = threading.RLock()
+_uploadCache = None
+
+
+def getUploadCache():
+    """The process-wide ConfigUploadCache with the default index file"""
+    global _uploadCache
+    with _lock:
+        if _uploadCache is None:
+            _uploadCache = ConfigUploadCache()
+        return _uploadCache
+
+
+def loadRemoteConfig(uhd, remoteFilename):
+    """The default load: LoadConfig of a file already on the server"""
+    from uhd_restpy import Files
+    uhd.LoadConfig(Files(remoteFilename, local_file=False))
+
+
+class ConfigUploadCache(object):
+    def __init__(self, indexFile=defaultIndexFile, maxEntries=256, removeEvicted=False, logger=None):
+        """
+        Parameters
+            indexFile: (str): The JSON index of the files known to be on each server session. None keeps it in memory only.
+            maxEntries: (int): The number of files kept in the index per server session.
+            removeEvicted: (bool): Remove the evicted files from the server.
+            logger: An object with an info() method. Defaults to the uhd object of each call.
+        """
+        self.indexFile = indexFile
+        self.maxEntries = maxEntries
+        self.removeEvicted = removeEvicted
+        self._logger = logger
+        # {server key: OrderedDict({remoteFilename: size})}, least recently used first
+        self._index = {}
+        # {local path: (size, mtime, sha256)}
+        self._hashes = {}
+        self._lock = threading.RLock()
+        self.stats = {'indexHits': 0, 'serverHits': 0, 'uploads': 0, 'bytesUploaded': 0, 'bytesSkipped': 0}
+
+    def _serverKey(self, uhd):
+        connection = uhd._connection
+        return '{}:{}{}'.format(getattr(connection, '_hostname', ''), getattr(connection, '_rest_port', ''), rootHref(uhd.href))
+
+    def sha256(self, filename):
+        """The SHA-256 of a local file, recomputed only when its size or modification time changed"""
+        path = os.path.abspath(filename)
+        status = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached is not None and cached[0] == status.st_size and cached[1] == status.st_mtime:
+                return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as localFile:
+            for chunk in iter(lambda: localFile.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[path] = (status.st_size, status.st_mtime, digest.hexdigest())
+        return digest.hexdigest()
+
+    def remoteFilename(self, filename):
+        """The content-addressed name of a local file on the server. The extension is kept for LoadConfig"""
+        return 'uhdConfig-{}{}'.format(self.sha256(filename)[:24], os.path.splitext(filename)[1])
+
+    def _readIndex(self):
+        # Other processes update the file too: merge it before every change
+        if self.indexFile is None or not os.path.exists(self.indexFile):
+            return
+        try:
+            with open(self.indexFile) as indexFile:
+                index = json.load(indexFile)
+        except ValueError:
+            return
+        self._index = dict((server, OrderedDict(entries)) for server, entries in index.items())
+
+    def _writeIndex(self):
+        if self.indexFile is None:
+            return
+        # Write a temporary file first so a concurrent reader never sees half a file
+        temporaryFile = '{}.{}.tmp'.format(self.indexFile, os.getpid())
+        with open(temporaryFile, 'w') as indexFile:
+            json.dump(dict((server, list(entries.items())) for server, entries in self._index.items()), indexFile)
+        if hasattr(os, 'replace'):
+            os.replace(temporaryFile, self.indexFile)
+        elif os.name != 'nt':
+            os.rename(temporaryFile, self.indexFile)
+        else:
+            # Python 2 on Windows cannot rename onto an existing file. A reader may briefly find no index
+            if os.path.exists(self.indexFile):
+                os.remove(self.indexFile)
+            os.rename(temporaryFile, self.indexFile)
+
+    def _isIndexed(self, uhd, remoteFilename):
+        with self._lock:
+            if self._serverKey(uhd) not in self._index:
+                self._readIndex()
+            return remoteFilename in self._index.get(self._serverKey(uhd), {})
+
+    def _touch(self, uhd, remoteFilename, size):
+        with self._lock:
+            self._readIndex()
+            entries = self._index.setdefault(self._serverKey(uhd), OrderedDict())
+            entries.pop(remoteFilename, None)
+            entries[remoteFilename] = size
+            evicted = []
+            while len(entries) > self.maxEntries:
+                evicted.append(entries.popitem(last=False)[0])
+            self._writeIndex()
+
+        for evictedFilename in evicted:
+            if self.removeEvicted:
+                self._log(uhd, 'ConfigUploadCache: Removing evicted {} from the server'.format(evictedFilename))
+                try:
+                    uhd._connection._delete_file(rootHref(uhd.href), evictedFilename)
+                except Exception as errMsg:
+                    self._log(uhd, 'ConfigUploadCache: Could not remove {}: {}'.format(evictedFilename, errMsg))
+
+    def forget(self, uhd, remoteFilename):
+        """Drop a file from the index of a server session"""
+        with self._lock:
+            self._readIndex()
+            self._index.get(self._serverKey(uhd), OrderedDict()).pop(remoteFilename, None)
+            self._writeIndex()
+
+    def _remoteSize(self, uhd, remoteFilename):
+        """The size of a file on the server, or None if it is not there"""
+        response = uhd._connection._read('{}/files?filter={}'.format(rootHref(uhd.href), quote(remoteFilename)))
+        for remoteFile in (response or {}).get('files', []):
+            if remoteFile.get('name') == remoteFilename:
+                return remoteFile.get('length')
+        return None
+
+    def _log(self, uhd, message):
+        (self._logger if self._logger is not None else uhd).info(message)
+
+    def upload(self, uhd, filename, verify=False):
+        """
+        Description
+            Make sure a local file is on the server under its content-addressed name.
+
+        Parameters
+            uhd: The session.Ixnetwork object.
+            filename: (str): The local config file.
+            verify: (bool): Check the server file list even if the index has the file.
+
+        Return
+            The remote filename to load with LoadConfig(Files(remoteFilename, local_file=False)).
+        """
+        remoteFilename = self.remoteFilename(filename)
+        size = os.path.getsize(filename)
+        if not verify and self._isIndexed(uhd, remoteFilename):
+            self.stats['indexHits'] += 1
+            self.stats['bytesSkipped'] += size
+        elif self._remoteSize(uhd, remoteFilename) == size:
+            self.stats['serverHits'] += 1
+            self.stats['bytesSkipped'] += size
+        else:
+            self._log(uhd, 'ConfigUploadCache: Uploading {} as {}'.format(filename, remoteFilename))
+            uhd._connection._put_file(rootHref(uhd.href), filename, remote_filename=remoteFilename)
+            self.stats['uploads'] += 1
+            self.stats['bytesUploaded'] += size
+
+        self._touch(uhd, remoteFilename, size)
+        return remoteFilename
+
+    def loadConfig(self, uhd, filename, load=loadRemoteConfig):
+        """
+        Description
+            Upload a config file if the server does not have it yet, and load it.
+
+        Parameters
+            uhd: The session.Ixnetwork object.
+            filename: (str): The local config file.
+            load: A function(uhd, remoteFilename) that loads a file from the server.
+                  Defaults to uhd.LoadConfig(Files(remoteFilename, local_file=False)).
+
+        Return
+            The remote filename.
+        """
+        start = time.time()
+        indexed = self._isIndexed(uhd, self.remoteFilename(filename))
+        remoteFilename = self.upload(uhd, filename)
+        try:
+            load(uhd, remoteFilename)
+        except Exception as errMsg:
+            if not indexed:
+                raise
+            # The index was stale: the server lost the file
+            self._log(uhd, 'ConfigUploadCache: Loading {} failed, uploading it again: {}'.format(remoteFilename, errMsg))
+            self.forget(uhd, remoteFilename)
+            remoteFilename = self.upload(uhd, filename, verify=True)
+            load(uhd, remoteFilename)
+        finally:
+            # The loaded config replaces every node
+            invalidateAttributeCache(uhd)
+            invalidateFindIndex(uhd)
+
+        self._log(uhd, 'ConfigUploadCache: Loaded {} in {:.2f}s'.format(filename, time.time() - start))
+        return remoteFilename
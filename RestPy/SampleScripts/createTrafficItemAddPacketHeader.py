@@ -25,6 +25,10 @@ import json, sys, os, time, traceback
 
 # Import the RestPy module
 from uhd_restpy import SessionAssistant
+from headerStackBuilder import HeaderStackBuilder
+from templateCache import getTemplateCache, defaultCacheFile
+from writeBatch import WriteBatch
+from findIndex import getFindIndex
 
 uhdIp = '10.36.78.190'
 portList = ['localuhd/1','localuhd/2']
@@ -43,47 +47,12 @@ forceTakePortOwnership = True
 # Test Variables
 protocolTimeout = 60
 
-
-try:
-    def createPacketHeader(trafficItemObj, packetHeaderToAdd=None, appendToStack=None): 
-        configElement = trafficItemObj.ConfigElement.find()
-
-        # Do the followings to add packet headers on the new traffic item
-
-        # Get a list of all the available protocol templates to create (packet headers)
-        availableProtocolTemplates = []
-        for protocolHeader in uhd.Traffic.ProtocolTemplate.find():
-            availableProtocolTemplates.append(protocolHeader.DisplayName)
-                     
-        packetHeaderProtocolTemplate = uhd.Traffic.ProtocolTemplate.find(DisplayName='^{}'.format(packetHeaderToAdd))
-        if len(packetHeaderProtocolTemplate) == 0:
-            uhd.info('{} protocol template not supported, skipping. Supported procotol templates: {}'.format(packetHeaderToAdd,
-                '|'.join(availableProtocolTemplates)))
-            return None
-        
-        # 2> Append the <new packet header> object after the specified packet header stack.
-        appendToStackObj = configElement.Stack.find(DisplayName='^{}'.format(appendToStack))
-        uhd.info('Adding protocolTemplate: {} on top of stack: {}'.format(packetHeaderProtocolTemplate.DisplayName,
-                        appendToStackObj.DisplayName))
-        if debugMode:                
-            uhd.info(format(packetHeaderProtocolTemplate))        
-            uhd.info(format(appendToStackObj))
-        appendToStackObj.Append(Arg2=packetHeaderProtocolTemplate)
-
-        # 3> Get the new packet header stack to use it for appending an IPv4 stack after it.
-        # Look for the packet header object and stack ID.
-        packetHeaderStackObj = configElement.Stack.find(DisplayName='^{}'.format(packetHeaderToAdd))
-        
-        # 4> In order to modify the fields, get the field object
-        packetHeaderFieldObj = packetHeaderStackObj.Field.find()
-        #uhd.info('packetHeaderFieldObj: {}'.format(packetHeaderFieldObj))
-        
-        # 5> Save the above configuration to the base config file.
-        #uhd.SaveConfig(Files('baseConfig.ixncfg', local_file=True))
-
-        return packetHeaderFieldObj
+# Protocol templates and field names are cached in this file per server build. Set to None to not use a file.
+# Warm it up once per build with: python templateCache.py <uhdIp>
+templateCacheFile = defaultCacheFile
 
 
+try:
     # LogLevel: none, info, warning, request, request_response, all
     session = SessionAssistant(IpAddress=uhdIp, RestPort=None, UserName=username, Password=password, 
                                SessionName=sessionName, SessionId=None, ApiKey=None,
@@ -105,127 +74,96 @@ try:
     uhd.info('Create a raw traffic item')
     rawTrafficItemObj = uhd.Traffic.TrafficItem.add(Name='Raw packet', BiDirectional=False, TrafficType='raw')
     uhd.info('Add source and destination endpoints')
-    rawTrafficItemObj.EndpointSet.add(Sources=uhd.Vport.find(Name='^Port_1$').Protocols.find(), Destinations=uhd.Vport.find(Name='^Port_2$').Protocols.find())
+    # The vports are read with one select and found by name in-process (see findIndex.py)
+    findIndex = getFindIndex(uhd)
+    rawTrafficItemObj.EndpointSet.add(Sources=findIndex.find(uhd.Vport, Name='^Port_1$').Protocols.find(), Destinations=findIndex.find(uhd.Vport, Name='^Port_2$').Protocols.find())
 
     configElement = rawTrafficItemObj.ConfigElement.find()[0]
-    configElement.FrameRate.update(Type='percentLineRate', Rate=50)
-    configElement.TransmissionControl.update(Type='fixedFrameCount', FrameCount=10000)
-    configElement.FrameSize.FixedSize = 128
+    # The writes are recorded and sent with one importConfig at the end of the batch (see writeBatch.py)
+    with WriteBatch(uhd) as batch:
+        configElementNode = batch.node(configElement)
+        configElementNode.child('FrameRate').update(Type='percentLineRate', Rate=50)
+        configElementNode.child('TransmissionControl').update(Type='fixedFrameCount', FrameCount=10000)
+        configElementNode.child('FrameSize').FixedSize = 128
   
-    # The Ethernet packet header doesn't need to be created.
-    # It is there by default. Just do a find for the Ethernet stack object.
-    ethernetStackObj = uhd.Traffic.TrafficItem.find(Name='Raw packet').ConfigElement.find()[0].Stack.find(DisplayName='Ethernet II')
-
-    # NOTE: If you are using virtual ports (IxVM), you must use the Destination MAC address of 
-    #       the IxVM port from your virtual host (ESX-i host or KVM)
-    uhd.info('Configuring Ethernet packet header')
-    ethernetDstField = ethernetStackObj.Field.find(DisplayName='Destination MAC Address')
-    ethernetDstField.ValueType = 'increment'
-    ethernetDstField.StartValue = "00:0c:29:3a:8a:3a"
-    ethernetDstField.StepValue = "00:00:00:00:00:00"
-    ethernetDstField.CountValue = 1
-
-    ethernetSrcField = ethernetStackObj.Field.find(DisplayName='Source MAC Address')
-    ethernetSrcField.ValueType = 'increment'
-    ethernetSrcField.StartValue = "00:0c:29:86:ba:0e"
-    ethernetSrcField.StepValue = "00:00:00:00:00:00"
-    ethernetSrcField.CountValue = 1
-
-    # VLAN
-    vlanFieldObj = createPacketHeader(rawTrafficItemObj, packetHeaderToAdd='VLAN', appendToStack='Ethernet II')
-    if vlanFieldObj:
-        vlanField = vlanFieldObj.find(DisplayName='VLAN Priority')
-        vlanField.Auto = False
-        vlanField.SingleValue = 3
-
-    # IPv4
-    ipv4FieldObj = createPacketHeader(rawTrafficItemObj, packetHeaderToAdd='IPv4', appendToStack='VLAN')
-    if ipv4FieldObj:
-        ipv4SrcField = ipv4FieldObj.find(DisplayName='Source Address')
-        ipv4SrcField.ValueType = 'increment'
-        ipv4SrcField.StartValue = '1.1.1.1'
-        ipv4SrcField.StepValue = '0.0.0.1'
-        ipv4SrcField.CountValue = 1
-
-        # Example on how to create a custom list of ip addresses
-        ipv4DstField = ipv4FieldObj.find(DisplayName='Destination Address')
-        ipv4DstField.ValueType = 'valueList'
-        ipv4DstField.ValueList = ['1.1.1.2', '1.1.1.3', '1.1.1.4', '1.1.1.5']    
-
-        # DSCP configurations and references
-
-        # For IPv4 TOS/Precedence:  Field/4
-        #    000 Routine, 001 Priority, 010 Immediate, 011 Flash, 100 Flash Override,
-        #    101 CRITIC/ECP, 110 Internetwork Control, 111 Network Control
-        ipv4PrecedenceField = ipv4FieldObj.find(DisplayName='Precedence')
-        ipv4PrecedenceField.ActiveFieldChoice = True
-        ipv4PrecedenceField.FieldValue = '011 Flash'
-
-        # For IPv4 Raw priority: Field/3
-        #ipv4RawPriorityField = ipv4FieldObj.find(DisplayName='Raw priority')
-        #ipv4RawPriorityField.ActiveFieldChoice = True
-        #ipv4RawPriorityField.ValueType = 'increment'
-        #ipv4RawPriorityField.StartValue = 3
-        #ipv4RawPriorityField.StepValue = 1
-        #ipv4RawPriorityField.CountValue = 9
-
-        # For IPv4 Default PHB
-        #   Field/10: Default PHB
-        #   Field/12: Class selector PHB
-        #   Field/14: Assured forwarding PHB
-        #   Field/15: Expedited forwarding PHB
-        #
-        #   For Class selector, if singleValue: Goes by 8bits:
-        #       Precedence 1 = 8
-        #       Precedence 2 = 16
-        #       Precedence 3 = 24
-        #       Precedence 4 = 32
-        #       Precedence 5 = 40
-        #       Precedence 6 = 48
-        #       Precedence 7 = 56
-        #
-        # DisplayName options: 
-        #     'Default PHB' = Field/10 
-        #     'Class selector PHB' = Field/12
-        #     'Assured forwarding PHB" = Field/14
-        #     'Expedited forwarding PHB" = Field/16 
-        #ipv4DefaultPHBField = ipv4FieldObj.find(DisplayName='Class selector')
-        ipv4DefaultPHBField = ipv4FieldObj.find(DisplayName='Default PHB')
-
-        ipv4DefaultPHBField.ActiveFieldChoice = True
-        ipv4DefaultPHBField.ValueType = 'singleVaoue' ;# singleValue, increment
-        ipv4DefaultPHBField.SingleValue = 56
-        # Below is for increment 
-        #ipv4DefaultPHBField.StartValue = 3
-        #ipv4DefaultPHBField.StepValue = 1
-        #ipv4DefaultPHBField.CountValue = 9
-
-    # Example to show appending UDP after the IPv4 header
-    udpFieldObj = createPacketHeader(rawTrafficItemObj, packetHeaderToAdd='UDP', appendToStack='IPv4')
-    if udpFieldObj:
-        udpSrcField = udpFieldObj.find(DisplayName='UDP-Source-Port')
-        udpSrcField.Auto = False
-        udpSrcField.SingleValue = 1000
-
-        udpDstField = udpFieldObj.find(DisplayName='UDP-Dest-Port')
-        udpDstField.Auto = False
-        udpDstField.SingleValue = 1001
-
-    # Example to show appending TCP after the IPv4 header
-    tcpFieldObj = createPacketHeader(rawTrafficItemObj, packetHeaderToAdd='TCP', appendToStack='IPv4')
-    if tcpFieldObj:
-        tcpSrcField = tcpFieldObj.find(DisplayName='TCP-Source-Port')
-        tcpSrcField.Auto = False
-        tcpSrcField.ValueType = 'valueList'
-        tcpSrcField.ValueList = ['1002', '1005', '1007']
-
-        tcpDstField = tcpFieldObj.find(DisplayName='TCP-Dest-Port')
-        tcpDstField.Auto = False
-        tcpDstField.SingleValue = 1003
-
-    # Example to show appending ICMP after the IPv4 header
-    icmpFieldObj = createPacketHeader(rawTrafficItemObj, packetHeaderToAdd='ICMP Msg Type: 9', appendToStack='IPv4')
-
+    # The packet headers of the raw traffic item, in order, and their field values.
+    # The Ethernet packet header doesn't need to be created. It is there by default and is configured in place.
+    # Every other header is appended after the previous header, or after the header named by 'after'.
+    # Fields are looked up by DisplayName. Attributes are the Field attributes: ValueType, SingleValue,
+    # StartValue, StepValue, CountValue, ValueList, Auto, ActiveFieldChoice, FieldValue.
+    packetHeaders = [
+        # NOTE: If you are using virtual ports (IxVM), you must use the Destination MAC address of
+        #       the IxVM port from your virtual host (ESX-i host or KVM)
+        {'header': 'Ethernet II',
+         'fields': {'Destination MAC Address': {'ValueType': 'increment', 'StartValue': '00:0c:29:3a:8a:3a',
+                                                'StepValue': '00:00:00:00:00:00', 'CountValue': 1},
+                    'Source MAC Address': {'ValueType': 'increment', 'StartValue': '00:0c:29:86:ba:0e',
+                                           'StepValue': '00:00:00:00:00:00', 'CountValue': 1}}},
+
+        {'header': 'VLAN',
+         'fields': {'VLAN Priority': {'Auto': False, 'SingleValue': 3}}},
+
+        {'header': 'IPv4',
+         'fields': {'Source Address': {'ValueType': 'increment', 'StartValue': '1.1.1.1', 'StepValue': '0.0.0.1', 'CountValue': 1},
+                    # Example on how to create a custom list of ip addresses
+                    'Destination Address': {'ValueType': 'valueList', 'ValueList': ['1.1.1.2', '1.1.1.3', '1.1.1.4', '1.1.1.5']},
+
+                    # DSCP configurations and references
+
+                    # For IPv4 TOS/Precedence:  Field/4
+                    #    000 Routine, 001 Priority, 010 Immediate, 011 Flash, 100 Flash Override,
+                    #    101 CRITIC/ECP, 110 Internetwork Control, 111 Network Control
+                    'Precedence': {'ActiveFieldChoice': True, 'FieldValue': '011 Flash'},
+
+                    # For IPv4 Raw priority: Field/3
+                    #'Raw priority': {'ActiveFieldChoice': True, 'ValueType': 'increment', 'StartValue': 3, 'StepValue': 1, 'CountValue': 9},
+
+                    # For IPv4 Default PHB
+                    #   Field/10: Default PHB
+                    #   Field/12: Class selector PHB
+                    #   Field/14: Assured forwarding PHB
+                    #   Field/15: Expedited forwarding PHB
+                    #
+                    #   For Class selector, if singleValue: Goes by 8bits:
+                    #       Precedence 1 = 8
+                    #       Precedence 2 = 16
+                    #       Precedence 3 = 24
+                    #       Precedence 4 = 32
+                    #       Precedence 5 = 40
+                    #       Precedence 6 = 48
+                    #       Precedence 7 = 56
+                    #
+                    # DisplayName options:
+                    #     'Default PHB' = Field/10
+                    #     'Class selector PHB' = Field/12
+                    #     'Assured forwarding PHB" = Field/14
+                    #     'Expedited forwarding PHB" = Field/16
+                    # ValueType: singleValue, increment. For increment use StartValue, StepValue and CountValue.
+                    'Default PHB': {'ActiveFieldChoice': True, 'ValueType': 'singleValue', 'SingleValue': 56}}},
+
+        # Example to show appending UDP after the IPv4 header
+        {'header': 'UDP',
+         'fields': {'UDP-Source-Port': {'Auto': False, 'SingleValue': 1000},
+                    'UDP-Dest-Port': {'Auto': False, 'SingleValue': 1001}}},
+
+        # Example to show appending TCP after the IPv4 header
+        {'header': 'TCP', 'after': 'IPv4',
+         'fields': {'TCP-Source-Port': {'Auto': False, 'ValueType': 'valueList', 'ValueList': ['1002', '1005', '1007']},
+                    'TCP-Dest-Port': {'Auto': False, 'SingleValue': 1003}}},
+
+        # Example to show appending ICMP after the IPv4 header
+        {'header': 'ICMP Msg Type: 9', 'after': 'IPv4'},
+    ]
+
+    # Protocol templates and field names are read once per server build and kept in templateCacheFile.
+    # All field values are written with one request.
+    # optional=True: A header whose protocol template is not on the API server is skipped.
+    uhd.info('Configuring packet headers')
+    templateCache = getTemplateCache(uhd, filename=templateCacheFile)
+    stacks = HeaderStackBuilder(uhd, templateCache=templateCache).build(configElement, packetHeaders, optional=True)
+    if debugMode:
+        for stack in stacks:
+            uhd.info('{}: {}'.format(stack['header'], stack['href']))
 
     # Optional: Enable tracking to track your packet headers:
     #    
@@ -0,0 +1,260 @@
+"""
+findIndex.py
+
+Description
+   An opt-in index of node collections, to answer restpy find() filters in-process.
+
+   Every restpy find() is a select on the server, even right after the same collection was read:
+   uhd.Vport.find(Name='^Port_1$'), configElement.Stack.find(DisplayName='^IPv4') and
+   stack.Field.find(DisplayName='Source Address') are one request each.  A script that resolves
+   hundreds of named objects waits for hundreds of round trips.
+
+   FindIndex reads a whole collection, such as the vports or the stacks of a config element, with
+   one select the first time it is asked for.  Later finds in that collection are filtered locally:
+      - A string filter is a regex searched in the attribute, like the server does.  Each regex is
+        compiled once.  An anchored literal such as '^Port_1$' is looked up in a dict of the
+        attribute values instead of testing every node.
+      - Any other filter value is compared with ==.  A callable is a predicate on the attribute.
+   find() returns a restpy object, like the find() of the collection, that can be used as a value
+   of add() or update() and to reach the children of the nodes found.
+
+   add() and remove() through the index forget the collection and the collections below it.  The
+   stats of the index count the hits, the misses and the invalidations.
+
+   Note: Changes made without the index, by restpy or by another client, are not seen until the
+   collection is invalidated.  Appending a protocol stack renumbers the stacks: invalidate the
+   config element after an append.  A new config replaces every collection: invalidateFindIndex(uhd)
+   forgets the index of the session after NewConfig or LoadConfig.  SessionPool and the config
+   loaders of this directory call it.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from findIndex import getFindIndex
+
+   index = getFindIndex(uhd)
+   port1 = index.find(uhd.Vport, Name='^Port_1$')                   # One select of all the vports
+   port2 = index.find(uhd.Vport, Name='^Port_2$')                   # In-process
+   ipv4 = index.find(configElement.Stack, DisplayName='^IPv4')
+   sourceAddress = index.find(ipv4.Field, DisplayName='^Source Address$')
+   index.add(uhd.Vport, Name='Port_3')                              # restpy add() and invalidate the vports
+   index.invalidate(configElement.href)                             # After configElement.Stack appends
+"""
+
+import re, threading
+
+from batchSelect import rootHref, selectUrl, lowerCamel, stringTypes
+
+# A regex that matches one whole string and nothing else. Ex: ^Port_1$
+literalRegex = re.compile(r'^\^((?:[^\\.^$*+?()\[\]{}|]|\\[\\.^$*+?()\[\]{}| _/-])*)\$$')
+
+_lock = threading.Lock()
+# {ixnetwork root href: FindIndex}
+_indexes = {}
+
+
+def getFindIndex(uhd, **kwargs):
+    """The process-wide FindIndex of the session. kwargs are used when it is created"""
+    root = rootHref(uhd.href)
+    with _lock:
+        if root not in _indexes:
+            _indexes[root] = FindIndex(uhd, **kwargs)
+        return _indexes[root]
+
+
+def invalidateFindIndex(uhd):
+    """Forget every collection of the process-wide FindIndex of the session, such as after NewConfig or LoadConfig"""
+    with _lock:
+        index = _indexes.get(rootHref(uhd.href))
+    if index is not None:
+        index.invalidate()
+
+
+class _Collection(object):
+    """The nodes of one child name under some parents, and dicts of their attribute values"""
+    def __init__(self, nodes):
+        self.nodes = nodes
+        # {attribute: {str(value): [node, ...]}}
+        self._byValue = {}
+
+    def withValue(self, attribute, value):
+        byValue = self._byValue.get(attribute)
+        if byValue is None:
+            byValue = {}
+            for node in self.nodes:
+                if node.get(attribute) is not None:
+                    byValue.setdefault(str(node[attribute]), []).append(node)
+            self._byValue[attribute] = byValue
+        return byValue.get(value, [])
+
+
+class FindIndex(object):
+    def __init__(self, uhd, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._logger = logger if logger is not None else uhd
+        self._lock = threading.Lock()
+        # {(parent href, ...), childName): _Collection}
+        self._collections = {}
+        # {regex string: compiled regex}
+        self._regexCache = {}
+        # The number of invalidations, so that a select sent before one is not kept after it
+        self._generation = 0
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def collection(self, parents, childName):
+        """
+        Description
+            The nodes of a collection, read with one select the first time.
+
+        Parameters
+            parents: (str|list): The href of the parent node, or of every parent node.
+            childName: (str): The REST child name. Ex: vport, stack, field
+
+        Return
+            A list of property dicts, with the href of every node, in server order.
+        """
+        return self._collection(parents, childName).nodes
+
+    def _collection(self, parents, childName):
+        parents = (parents,) if isinstance(parents, stringTypes) else tuple(parents)
+        key = (parents, childName)
+        with self._lock:
+            collection = self._collections.get(key)
+            if collection is not None:
+                self.stats['hits'] += 1
+                return collection
+            self.stats['misses'] += 1
+            generation = self._generation
+
+        nodes = []
+        if len(parents) > 0:
+            selects = [{'from': parent, 'properties': [],
+                        'children': [{'child': '^{}$'.format(childName), 'properties': ['*'], 'filters': []}],
+                        'inlines': []} for parent in parents]
+            for response in self._uhd._connection._execute(selectUrl(parents[0]), {'selects': selects}):
+                children = response.get(childName, [])
+                nodes.extend(children if isinstance(children, list) else [children])
+        collection = _Collection(nodes)
+        with self._lock:
+            if self._generation == generation:
+                self._collections[key] = collection
+        return collection
+
+    def findProperties(self, parents, childName, **filters):
+        """
+        Description
+            Find nodes of a collection by their REST attributes, without a request once the
+            collection is read.
+
+        Parameters
+            parents: (str|list): The href of the parent node, or of every parent node.
+            childName: (str): The REST child name. Ex: vport
+            filters: REST attribute=value pairs. A string value is a regex searched in the attribute,
+                     a callable is a predicate on the attribute, anything else is compared with ==.
+                     Ex: findProperties(uhd.href, 'vport', name='^Port_1$')
+
+        Return
+            A list of property dicts in server order.
+        """
+        collection = self._collection(parents, childName)
+        if len(filters) == 0:
+            return list(collection.nodes)
+
+        # Start from the nodes of an anchored literal, looked up by value
+        candidates = collection.nodes
+        tests = []
+        for attribute, value in filters.items():
+            match = literalRegex.match(value) if isinstance(value, stringTypes) else None
+            if match is not None and candidates is collection.nodes:
+                candidates = collection.withValue(attribute, re.sub(r'\\(.)', r'\1', match.group(1)))
+            else:
+                tests.append((attribute, self._test(value)))
+
+        matches = []
+        for node in candidates:
+            for attribute, test in tests:
+                if node.get(attribute) is None or not test(node[attribute]):
+                    break
+            else:
+                matches.append(node)
+        return matches
+
+    def _test(self, value):
+        if callable(value):
+            return value
+        if isinstance(value, stringTypes):
+            regex = self._regexCache.get(value)
+            if regex is None:
+                regex = self._regexCache[value] = re.compile(value)
+            return lambda cell: regex.search(str(cell)) is not None
+        return lambda cell: cell == value
+
+    def find(self, collection, **filters):
+        """
+        Description
+            The same as collection.find(**filters), answered from the index.
+
+        Parameters
+            collection: A restpy collection that has not been found yet. Ex: uhd.Vport, configElement.Stack
+            filters: restpy attribute=value pairs. Ex: Name='^Port_1$'
+
+        Return
+            A restpy object of the class of the collection with the nodes found.
+        """
+        attributeMap = getattr(collection, '_SDM_ATT_MAP', {})
+        nodes = self.findProperties([parent.href for parent in collection._parent], collection._SDM_NAME,
+                                    **dict((attributeMap.get(name, lowerCamel(name)), value) for name, value in filters.items()))
+        result = collection.__class__(collection._parent)
+        for node in nodes:
+            result._set_properties(dict(node))
+        return result
+
+    def add(self, collection, **kwargs):
+        """collection.add(**kwargs), and forget the collection. Ex: index.add(uhd.Vport, Name='Port_3')"""
+        try:
+            return collection.add(**kwargs)
+        finally:
+            for parent in collection._parent:
+                self.invalidate(parent.href, collection._SDM_NAME)
+
+    def remove(self, nodes):
+        """nodes.remove(), and forget their collection and the collections below them"""
+        hrefs = [node.href for node in nodes]
+        try:
+            return nodes.remove()
+        finally:
+            for href in hrefs:
+                parent, childName = href.rsplit('/', 2)[0:2]
+                self.invalidate(parent, childName)
+
+    def invalidate(self, href=None, childName=None):
+        """
+        Description
+            Forget collections, to read them again on the next find.
+
+        Parameters
+            href: (str): Forget the collections under this node. None forgets every collection.
+            childName: (str): Only the collection of this child name under href, and the collections
+                       below its nodes. Ex: invalidate(uhd.href, 'vport')
+        """
+        prefix = href if childName is None else '{}/{}'.format(href, childName)
+        with self._lock:
+            self.stats['invalidations'] += 1
+            self._generation += 1
+            for key in list(self._collections):
+                parents, name = key
+                if href is None or any(parent.startswith(prefix + '/') for parent in parents) or \
+                        (href in parents and (childName is None or name == childName)):
+                    del self._collections[key]
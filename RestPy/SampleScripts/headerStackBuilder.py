@@ -0,0 +1,198 @@
+"""
+headerStackBuilder.py
+
+Description
+   Build the packet header stacks of a raw Traffic Item from a declarative description.
+
+   createPacketHeader() in createTrafficItemAddPacketHeader.py reads every protocol template to
+   build an error message, finds the template, the stack to append to, the new stack and its
+   fields, and then sets every field attribute with its own PATCH.  A raw Traffic Item with ten
+   headers took about a hundred requests.
+
+   HeaderStackBuilder takes the headers as data:
+
+      [{'header': 'Ethernet II', 'fields': {'Destination MAC Address': {'ValueType': 'increment', 'StartValue': '00:0c:29:3a:8a:3a'}}},
+       {'header': 'VLAN',        'fields': {'VLAN Priority': {'Auto': False, 'SingleValue': 3}}},
+       {'header': 'IPv4',        'fields': {'Source Address': {'ValueType': 'increment', 'StartValue': '1.1.1.1'}}},
+       {'header': 'UDP',         'after': 'IPv4'}]
+
+   A header that already exists in the config element, such as Ethernet II, is configured in
+   place.  Any other header is appended after the previous header, or after the header named by
+   'after'.  Set 'append': True to add a second stack of a header that already exists.
+
+   The protocol templates and the field names of each template are looked up in the process-wide
+   TemplateCache of templateCache.py, so they are read from the server at most once per build.  Stack hrefs are positional: appending a stack renumbers
+   the stacks after it, so the builder mirrors the stack order locally instead of finding the
+   stacks again after every append.  When all headers are appended, one select with xpaths
+   verifies the stack order, and all field values of all stacks are written with one importConfig.
+   Ten headers take the ten appends plus about four requests.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from headerStackBuilder import HeaderStackBuilder
+
+   configElement = rawTrafficItemObj.ConfigElement.find()[0]
+   HeaderStackBuilder(uhd).build(configElement, packetHeaders)
+
+   # Resolve templates and fields from a cache file after the first run
+   HeaderStackBuilder(uhd, templateCache=getTemplateCache(uhd, filename=defaultCacheFile)).build(configElement, packetHeaders)
+"""
+
+from batchSelect import select, importConfig, lowerCamel, stringTypes
+from templateCache import getTemplateCache
+
+
+class HeaderStackBuilder(object):
+    def __init__(self, uhd, templateCache=None, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            templateCache: (TemplateCache): Where protocol templates and field names are looked up.
+                           Defaults to the process-wide cache of the server build, kept in memory only.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._templateCache = templateCache
+        self._logger = logger if logger is not None else uhd
+
+    @property
+    def templateCache(self):
+        if self._templateCache is None:
+            self._templateCache = getTemplateCache(self._uhd)
+        return self._templateCache
+
+    def templateNames(self):
+        """The DisplayName of every protocol template"""
+        return self.templateCache.templateNames(self._uhd)
+
+    def template(self, displayName):
+        """
+        Description
+            Look up a protocol template by DisplayName. See TemplateCache.template().
+
+        Return
+            {'href', 'displayName', 'stackTypeId'}
+        """
+        return self.templateCache.template(self._uhd, displayName)
+
+    def fieldAliases(self, templateDisplayNames):
+        """
+        Description
+            Get the field aliases of protocol templates. See TemplateCache.fieldAliases().
+
+        Return
+            {templateDisplayName: {fieldDisplayName or fieldTypeId: fieldAlias}}
+        """
+        return self.templateCache.fieldAliases(self._uhd, templateDisplayNames)
+
+    def _selectStacks(self, configElementHref, xpath=False):
+        response = select(self._uhd, configElementHref, xpath=xpath,
+                          children=[{'child': '^stack$', 'properties': ['displayName', 'stackTypeId'], 'filters': []}])
+        return response.get('stack', [])
+
+    def build(self, configElement, headers, optional=False):
+        """
+        Description
+            Append and configure the packet headers of one config element.
+
+        Parameters
+            configElement: The ConfigElement object or its href.
+            headers: (list): One dict per header:
+                       header: (str): The protocol template DisplayName. Ex: 'IPv4'
+                       fields: (dict): {field DisplayName or fieldTypeId: {Attribute: value}}.
+                               Attributes are the Field attributes: ValueType, SingleValue, StartValue, StepValue,
+                               CountValue, ValueList, Auto, ActiveFieldChoice, FieldValue ...
+                       after: (str): Append after the last stack with this DisplayName. Defaults to the previous header.
+                       append: (bool): Force appending even if the header already exists.
+                       optional: (bool): Skip the header if the server has no protocol template for it.
+                                 Defaults to the optional parameter.
+            optional: (bool): Skip every header whose protocol template is missing, unless its spec says otherwise.
+                      False raises ValueError for a missing template.
+
+        Return
+            A list of {'header', 'href', 'xpath'} in the order of headers. href and xpath are None for a skipped header.
+        """
+        configElementHref = configElement if isinstance(configElement, stringTypes) else configElement.href
+        # Mirror of the server's stack order: [displayName, ...]. Stack n is {configElement}/stack/{n + 1}
+        order = [stack['displayName'] for stack in self._selectStacks(configElementHref)]
+        claimed = set()
+        positions = []
+        previous = None
+
+        for spec in headers:
+            name = spec['header']
+            existing = [index for index, displayName in enumerate(order) if displayName == name and index not in claimed]
+            if spec.get('append') is not True and len(existing) > 0:
+                position = existing[0]
+            else:
+                try:
+                    template = self.template(name)
+                except ValueError as errMsg:
+                    if spec.get('optional', optional) is not True:
+                        raise
+                    self._logger.info('{}, skipping'.format(errMsg))
+                    positions.append(None)
+                    continue
+
+                after = spec.get('after')
+                if after is not None:
+                    afterPositions = [index for index, displayName in enumerate(order) if displayName == after]
+                    if len(afterPositions) == 0:
+                        raise ValueError('Cannot append {} after {}. Stacks: {}'.format(name, after, ', '.join(order)))
+                    afterPosition = afterPositions[-1]
+                elif previous is not None:
+                    afterPosition = positions[previous]
+                else:
+                    afterPosition = 0
+
+                self._logger.info('Adding protocolTemplate: {} on top of stack: {}'.format(template['displayName'], order[afterPosition]))
+                afterHref = '{}/stack/{}'.format(configElementHref, afterPosition + 1)
+                self._uhd._connection._execute('{}/operations/append'.format(afterHref), {'arg1': afterHref, 'arg2': template['href']})
+
+                position = afterPosition + 1
+                order.insert(position, template['displayName'])
+                positions = [index + 1 if index is not None and index >= position else index for index in positions]
+                claimed = set(index + 1 if index >= position else index for index in claimed)
+
+            claimed.add(position)
+            positions.append(position)
+            previous = len(positions) - 1
+
+        # One select verifies the mirrored order and returns the stack xpaths
+        stacks = self._selectStacks(configElementHref, xpath=True)
+        if [stack['displayName'] for stack in stacks] != order:
+            raise Exception('The stacks of {} are {}, expected {}'.format(
+                configElementHref, ', '.join(stack['displayName'] for stack in stacks), ', '.join(order)))
+
+        aliases = self.fieldAliases([stacks[position]['displayName'] for spec, position in zip(headers, positions)
+                                     if position is not None and spec.get('fields')])
+        config = []
+        for spec, position in zip(headers, positions):
+            if position is None:
+                continue
+            stack = stacks[position]
+            for fieldName, attributes in (spec.get('fields') or {}).items():
+                fieldAliases = aliases[stack['displayName']]
+                if fieldName not in fieldAliases:
+                    raise ValueError('{} has no field {}. Fields: {}'.format(stack['displayName'], fieldName, ', '.join(sorted(fieldAliases))))
+
+                field = {'xpath': "{}/field[@alias = '{}']".format(stack['xpath'], fieldAliases[fieldName])}
+                for attribute, value in attributes.items():
+                    field[lowerCamel(attribute)] = value
+                config.append(field)
+
+        if len(config) > 0:
+            importConfig(self._uhd, config)
+
+        return [{'header': spec['header'],
+                 'href': stacks[position]['href'] if position is not None else None,
+                 'xpath': stacks[position]['xpath'] if position is not None else None}
+                for spec, position in zip(headers, positions)]
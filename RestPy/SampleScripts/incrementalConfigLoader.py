@@ -0,0 +1,203 @@
+"""
+incrementalConfigLoader.py
+
+Description
+   Load a JSON config into a session by sending only what changed since the last load.
+
+   loadJsonConfigFile.py uploads and loads the whole bgp_ngpf_8.50.json with uhd.LoadConfig()
+   every time, even when a test iteration only changes a few attributes.
+
+   IncrementalConfigLoader remembers the config it last applied to the session, flattened to
+   {xpath: attributes}.  On the next load it compares the new config with it by xpath:
+      - Same xpaths, some attributes changed: only the changed attributes of the changed nodes
+        are sent with one resourceManager importConfig.  Multivalue patterns are nodes of their
+        own, so changing a counter start only sends that counter.
+      - Nodes or attributes were added or removed: the structure changed and the config is
+        loaded in full with LoadConfig.
+      - Nothing changed: nothing is sent.
+
+   The last applied config can be kept in a state file, so a later script run against the same
+   session continues incrementally.  Changes made to the session by other means are not seen:
+   call reset() to force the next load to be a full load.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from incrementalConfigLoader import IncrementalConfigLoader
+
+   loader = IncrementalConfigLoader(uhd)
+   loader.load('bgp_ngpf_8.50.json')           # A full load the first time
+   config = json.load(open('bgp_ngpf_8.50.json'))
+   config['topology'][0]['deviceGroup'][0]['multiplier'] = 10
+   result = loader.load(config)                # Sends one node
+"""
+
+import os, copy, json, time, tempfile
+from collections import OrderedDict
+
+from batchSelect import importConfig
+from attributeCache import invalidateAttributeCache
+from findIndex import invalidateFindIndex
+
+
+def flattenConfig(config):
+    """
+    Description
+        Flatten a JSON config into {xpath: {attribute: value}} in config order.
+        Child nodes are left out of the attributes of their parent. A list of values,
+        such as the ports of a topology, is an attribute.
+    """
+    nodes = OrderedDict()
+    stack = [config]
+    while len(stack) > 0:
+        node = stack.pop()
+        attributes = {}
+        children = []
+        for key, value in node.items():
+            if isinstance(value, dict):
+                children.append(value)
+            elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+                children.extend(value)
+            elif isinstance(value, list):
+                # A copy, so that a list changed in place after the load is seen as a change
+                attributes[key] = copy.deepcopy(value)
+            elif key != 'xpath':
+                attributes[key] = value
+
+        if 'xpath' in node:
+            nodes[node['xpath']] = attributes
+        stack.extend(reversed(children))
+    return nodes
+
+
+class IncrementalConfigLoader(object):
+    def __init__(self, uhd, stateFile=None, fullLoad=None, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            stateFile: (str): Keep the last applied config in this file.
+            fullLoad: A function(uhd, filename) that loads a whole JSON config file.
+                      Defaults to configUploadCache.getUploadCache().loadConfig(uhd, filename).
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._stateFile = stateFile
+        self._fullLoad = fullLoad if fullLoad is not None else loadConfigFile
+        self._logger = logger if logger is not None else uhd
+        self._applied = None
+        self._readState()
+
+    def _readState(self):
+        if self._stateFile is None or not os.path.exists(self._stateFile):
+            return
+        with open(self._stateFile) as stateFile:
+            state = json.load(stateFile, object_pairs_hook=OrderedDict)
+        # The state is only valid for the session it was written for
+        if state.get('session') == self._uhd.href:
+            self._applied = state['nodes']
+
+    def _writeState(self):
+        if self._stateFile is None:
+            return
+        with open(self._stateFile, 'w') as stateFile:
+            json.dump({'session': self._uhd.href, 'nodes': self._applied}, stateFile)
+
+    def reset(self):
+        """Forget the last applied config. The next load is a full load."""
+        self._applied = None
+        if self._stateFile is not None and os.path.exists(self._stateFile):
+            os.remove(self._stateFile)
+
+    def diff(self, config):
+        """
+        Description
+            Compare a config with the last applied config.
+
+        Parameters
+            config: (dict): A parsed JSON config.
+
+        Return
+            (nodes, changes): The flattened config, and a list of importConfig entries
+            {'xpath': xpath, attribute: value, ...} or None if the structure changed.
+        """
+        nodes = flattenConfig(config)
+        if self._applied is None or len(nodes) != len(self._applied):
+            return nodes, None
+
+        changes = []
+        for xpath, attributes in nodes.items():
+            applied = self._applied.get(xpath)
+            if applied is None or set(applied) != set(attributes):
+                return nodes, None
+            if applied != attributes:
+                change = OrderedDict([('xpath', xpath)])
+                for attribute, value in attributes.items():
+                    if applied[attribute] != value:
+                        change[attribute] = value
+                changes.append(change)
+        return nodes, changes
+
+    def load(self, config):
+        """
+        Description
+            Load a config with as little as possible sent to the session.
+
+        Parameters
+            config: (str|dict): A JSON config filename or a parsed JSON config.
+
+        Return
+            {'mode': 'full'|'partial'|'unchanged', 'changedNodes': int, 'seconds': float}
+        """
+        start = time.time()
+        filename = None
+        if not isinstance(config, dict):
+            filename = config
+            with open(filename) as configFile:
+                config = json.load(configFile)
+
+        nodes, changes = self.diff(config)
+        if changes is None:
+            self._logger.info('IncrementalConfigLoader: Structure changed or nothing applied yet. Loading the whole config')
+            if filename is None:
+                # LoadConfig needs a file
+                handle, filename = tempfile.mkstemp(suffix='.json')
+                with os.fdopen(handle, 'w') as configFile:
+                    json.dump(config, configFile)
+                try:
+                    self._fullLoad(self._uhd, filename)
+                finally:
+                    os.remove(filename)
+            else:
+                self._fullLoad(self._uhd, filename)
+            mode = 'full'
+            changedNodes = len(nodes)
+        elif len(changes) == 0:
+            mode = 'unchanged'
+            changedNodes = 0
+        else:
+            self._logger.info('IncrementalConfigLoader: Importing {} changed nodes'.format(len(changes)))
+            importConfig(self._uhd, changes)
+            mode = 'partial'
+            changedNodes = len(changes)
+
+        if mode != 'unchanged':
+            # Read the changed nodes from the session again
+            invalidateAttributeCache(self._uhd)
+            invalidateFindIndex(self._uhd)
+
+        self._applied = nodes
+        self._writeState()
+        return {'mode': mode, 'changedNodes': changedNodes, 'seconds': time.time() - start}
+
+
+def loadConfigFile(uhd, filename):
+    """The default full load: upload the file unless the server already has it, and LoadConfig it"""
+    from configUploadCache import getUploadCache
+    getUploadCache().loadConfig(uhd, filename)
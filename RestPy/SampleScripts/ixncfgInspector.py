@@ -0,0 +1,395 @@
+"""
+ixncfgInspector.py
+
+Description
+   Inspect .ixncfg config files locally, before anything is uploaded to the API server.
+
+   An .ixncfg file is a zip archive with one member: the config in the IxNetwork streaming
+   format.  The streaming format is a sequence of blocks, one per module: ConfigSummaryModule,
+   ports, protocols, QTTimeline, traffic, ScenarioModule ...  Each block starts with a header
+   that holds its length and module name, so a block can be found without decoding the ones
+   before it.
+
+   IxncfgArchive memory-maps the archive and reads members and blocks lazily from the map.
+   Nothing is extracted to disk, and a member is only decompressed up to the last block read.
+   The summary block is at the start of the config, so a summary reads a few KB of it.
+
+   inspectConfig() returns a summary of the config:
+      - The IxNetwork version the config was saved with
+      - The port count, and the name and binding of every port
+      - The topology and device group counts, and the protocols enabled
+      - The traffic item count
+      - The QuickTest tests, with their type
+   Summaries are cached by the SHA-256 of the archive in memory and in a JSON file, so a test
+   harness can check many configs on every run for the cost of hashing them.
+
+   Traffic item and topology names are in the serialized objects of the traffic and
+   ScenarioModule blocks, which this module does not decode.  The summary has their counts as
+   recorded by the summary module.  Some versions do not record the topology count: it is None.
+
+Requirements:
+   - Python 2.7 and 3+
+
+Usage:
+   from ixncfgInspector import inspectConfig, checkCompatible, portMap
+
+   summary = inspectConfig('ngpfQuickTest2ports_8.50.ixncfg')
+   problems = checkCompatible(summary, portList=portList, serverVersion='9.10')
+   if problems:
+       print('Skipping: {}'.format(', '.join(problems)))
+   for location, name in portMap(summary, portList):
+       portmap.Map(Location=location, Name=name)
+
+   - Or enter: python ixncfgInspector.py <file.ixncfg> [<file.ixncfg> ...]
+"""
+
+import os, re, sys, json, mmap, struct, hashlib, zipfile, threading
+
+defaultCacheFile = os.path.join(os.path.expanduser('~'), '.ixncfgSummaryCache.json')
+
+# Bump when the summary changes, to ignore the summaries cached by older versions
+summaryVersion = 1
+
+_blockMarker = b'\xaa\xaa\xaa\xaa'
+_endMarker = b'\xcc\xcc\xcc\xcc'
+# Marker, format version, header length, block length
+_blockHeader = struct.Struct('<4siqq')
+
+_lock = threading.RLock()
+# {sha256: summary}
+_summaries = {}
+_loadedCacheFiles = set()
+
+
+def _readString(data, position):
+    """Read a string with a 7-bit encoded length prefix. Returns (string, next position)"""
+    length = 0
+    shift = 0
+    while True:
+        byte = bytearray(data[position:position + 1])[0]
+        position += 1
+        length |= (byte & 0x7f) << shift
+        shift += 7
+        if byte < 0x80:
+            break
+    return data[position:position + length].decode('utf-8', 'replace'), position + length
+
+
+class _MappedFile(object):
+    """The file API zipfile needs, over a memory map"""
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = len(self._mapped) - self._mapped.tell()
+        return self._mapped.read(size)
+
+    def seek(self, offset, whence=0):
+        return self._mapped.seek(offset, whence)
+
+    def tell(self):
+        return self._mapped.tell()
+
+    def seekable(self):
+        return True
+
+
+class IxncfgArchive(object):
+    def __init__(self, filename):
+        """
+        Parameters
+            filename: (str): The .ixncfg file.
+        """
+        self.filename = filename
+        self._file = open(filename, 'rb')
+        self._mapped = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._zip = zipfile.ZipFile(_MappedFile(self._mapped))
+
+    def close(self):
+        self._zip.close()
+        self._mapped.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def sha256(self):
+        """The SHA-256 of the archive, read from the memory map"""
+        digest = hashlib.sha256()
+        chunkSize = 16 * 1024 * 1024
+        for offset in range(0, len(self._mapped), chunkSize):
+            digest.update(self._mapped[offset:offset + chunkSize])
+        return digest.hexdigest()
+
+    def members(self):
+        """[{'name', 'size', 'compressedSize'}] of the archive members"""
+        return [{'name': info.filename, 'size': info.file_size, 'compressedSize': info.compress_size}
+                for info in self._zip.infolist()]
+
+    def open(self, member=None):
+        """A file object of a member, decompressed as it is read. Defaults to the first member"""
+        return self._zip.open(member if member is not None else self._zip.namelist()[0])
+
+    def blocks(self, member=None):
+        """
+        Description
+            Walk the blocks of a config member, skipping their payloads.
+
+        Return
+            A generator of {'name', 'label', 'version', 'offset', 'headerLength', 'length', 'stream'}.
+            label is the version string of the block. In the file header at offset 0, it is the
+            IxNetwork version the config was saved with. Ex: 9.00.1915.16:9.00.1907.75:IxNetwork-9.00-Update(1)
+            Read the payload with readPayload(block) before advancing the generator.
+        """
+        stream = self.open(member)
+        offset = 0
+        try:
+            while True:
+                header = stream.read(_blockHeader.size)
+                if len(header) < _blockHeader.size:
+                    return
+                marker, version, headerLength, length = _blockHeader.unpack(header)
+                if marker != _blockMarker:
+                    raise ValueError('{}: No block at offset {}, not a streaming config'.format(self.filename, offset))
+
+                strings = stream.read(headerLength - _blockHeader.size)
+                label, position = _readString(strings, 0)
+                name = _readString(strings, position)[0]
+                block = {'name': name, 'label': label, 'version': version, 'offset': offset,
+                         'headerLength': headerLength, 'length': length, 'stream': stream, 'read': False}
+                yield block
+
+                if not block['read']:
+                    remaining = length - headerLength
+                    while remaining > 0:
+                        skipped = len(stream.read(min(remaining, 1024 * 1024)))
+                        if skipped == 0:
+                            return
+                        remaining -= skipped
+                offset += length
+        finally:
+            stream.close()
+
+    def readPayload(self, block):
+        """The payload of a block yielded by blocks(), between its header and its end marker"""
+        block['read'] = True
+        payload = block['stream'].read(block['length'] - block['headerLength'])
+        if payload.endswith(_endMarker):
+            payload = payload[:-len(_endMarker)]
+        return payload
+
+    def readBlocks(self, names, member=None):
+        """
+        Description
+            Read the payloads of the named blocks, decompressing the member only up to the last of them.
+
+        Return
+            {name: payload} of the blocks found, and {'header': label} with the label of the file header.
+        """
+        names = set(names)
+        payloads = {}
+        for block in self.blocks(member):
+            if block['offset'] == 0:
+                payloads['header'] = block['label']
+            elif block['name'] in names:
+                payloads[block['name']] = self.readPayload(block)
+                if names.issubset(payloads):
+                    break
+        return payloads
+
+
+def _parseModuleSummary(payload):
+    """{module: {key: value}} from the ConfigSummaryModule CSV"""
+    text = payload.decode('utf-8', 'replace')
+    text = text[text.find('Module,'):]
+    modules = {}
+    cells = text.split(',')
+    index = 0
+    current = None
+    while index < len(cells):
+        if cells[index] == 'Module' and index + 1 < len(cells):
+            current = modules.setdefault(cells[index + 1], {})
+            index += 2
+            continue
+        if current is not None and index + 1 < len(cells):
+            current[cells[index]] = cells[index + 1]
+        index += 2
+    return modules
+
+
+def _parsePorts(payload):
+    """[{'name', 'binding'}] from the ports block"""
+    ports = []
+    for match in re.finditer(br'IxNetwork\.PortManager\.MWPort\x00{5}\x02[0-9]{2}', payload):
+        # Port index, then the lag id in newer versions
+        position = match.end() + 8
+        if payload[position:position + 8] == b'\x00' * 8:
+            position += 8
+        name, position = _readString(payload, position)
+        binding, position = _readString(payload, position)
+        ports.append({'name': name, 'binding': binding if binding else None})
+    return ports
+
+
+def summarize(archive):
+    """
+    Description
+        Build the summary of an archive. See inspectConfig().
+    """
+    payloads = archive.readBlocks(['IxNetwork.ConfigSummaryModule', 'ports', 'QTTimeline'])
+    header = payloads.get('header', '')
+    modules = _parseModuleSummary(payloads.get('IxNetwork.ConfigSummaryModule', b''))
+
+    # Ex: 9.00.1915.16:9.00.1907.75:IxNetwork-9.00-Update(1)
+    versionMatch = re.search(r'([0-9]+\.[0-9]+\.[0-9]+\.[0-9]+):([0-9.]+|None)', header)
+    ports = _parsePorts(payloads.get('ports', b''))
+    portCount = modules.get('Port Properties', {}).get('Port count')
+
+    ngpf = modules.get('NextGen Framework Properties', {})
+    scenario = re.search(r'Topology # ([0-9]+); Device Group # ([0-9]+)', ngpf.get('Scenario Elements', ''))
+    protocols = []
+    for module in ('Routing/Bridging Properties', 'NextGen Framework Properties'):
+        for protocol in modules.get(module, {}).get('Protocols enabled', '').split('#'):
+            protocol = protocol.strip()
+            if protocol and not protocol.startswith('QuickTest timeline') and protocol not in protocols:
+                protocols.append(protocol)
+
+    quickTests = []
+    for quickTestType, quickTestId in re.findall(br'/quickTest/([A-Za-z0-9]+):([0-9]+)', payloads.get('QTTimeline', b'')):
+        quickTest = {'type': quickTestType.decode('ascii'), 'id': int(quickTestId)}
+        if quickTest not in quickTests:
+            quickTests.append(quickTest)
+
+    trafficItemCount = modules.get('Traffic Properties', {}).get('Traffic-Item count')
+    return {'summaryVersion': summaryVersion,
+            'members': archive.members(),
+            'version': versionMatch.group(1) if versionMatch else None,
+            'update': versionMatch.group(2) if versionMatch and versionMatch.group(2) != 'None' else None,
+            'portCount': int(portCount) if portCount is not None else len(ports),
+            'ports': ports,
+            'topologyCount': int(scenario.group(1)) if scenario else None,
+            'deviceGroupCount': int(scenario.group(2)) if scenario else None,
+            'protocols': protocols,
+            'trafficItemCount': int(trafficItemCount) if trafficItemCount is not None else None,
+            'quickTests': quickTests,
+            'modules': modules}
+
+
+def _readCacheFile(cacheFile):
+    """The summaries of the current summaryVersion in cacheFile, or {}"""
+    if not os.path.exists(cacheFile):
+        return {}
+    try:
+        with open(cacheFile) as summaryCacheFile:
+            summaries = json.load(summaryCacheFile)
+    except (IOError, OSError, ValueError):
+        return {}
+    return dict((sha256, summary) for sha256, summary in summaries.items()
+                if summary.get('summaryVersion') == summaryVersion)
+
+
+def _loadCacheFile(cacheFile):
+    if cacheFile is None or cacheFile in _loadedCacheFiles:
+        return
+    _loadedCacheFiles.add(cacheFile)
+    for sha256, summary in _readCacheFile(cacheFile).items():
+        _summaries.setdefault(sha256, summary)
+
+
+def _saveCacheFile(cacheFile):
+    # Another process may have added summaries since the file was loaded: keep them
+    for sha256, summary in _readCacheFile(cacheFile).items():
+        _summaries.setdefault(sha256, summary)
+
+    # Write a temporary file first so a concurrent reader never sees half a file
+    temporaryFile = '{}.{}.tmp'.format(cacheFile, os.getpid())
+    with open(temporaryFile, 'w') as summaryCacheFile:
+        json.dump(_summaries, summaryCacheFile)
+    if hasattr(os, 'replace'):
+        os.replace(temporaryFile, cacheFile)
+    elif os.name != 'nt':
+        os.rename(temporaryFile, cacheFile)
+    else:
+        # Python 2 on Windows cannot rename onto an existing file. A reader may briefly find no cache file
+        if os.path.exists(cacheFile):
+            os.remove(cacheFile)
+        os.rename(temporaryFile, cacheFile)
+
+
+def inspectConfig(filename, cacheFile=defaultCacheFile):
+    """
+    Description
+        Summarize an .ixncfg file, from the cache if the same content was summarized before.
+
+    Parameters
+        filename: (str): The .ixncfg file.
+        cacheFile: (str): The JSON file summaries are cached in. None caches in memory only.
+
+    Return
+        {'file', 'sha256', 'size', 'cached': bool, 'members': [{'name', 'size', 'compressedSize'}],
+         'version': '8.50.1501.9', 'update': '8.50.1912.37' or None,
+         'portCount': int, 'ports': [{'name': 'Ethernet - 001', 'binding': '192.168.70.11;1;1' or None}],
+         'topologyCount': int or None, 'deviceGroupCount': int or None, 'protocols': [str],
+         'trafficItemCount': int or None, 'quickTests': [{'type': 'rfc2544throughput', 'id': 1}],
+         'modules': {summary module: {key: value}}}
+    """
+    with IxncfgArchive(filename) as archive:
+        sha256 = archive.sha256()
+        with _lock:
+            _loadCacheFile(cacheFile)
+            summary = _summaries.get(sha256)
+            cached = summary is not None
+            if summary is None:
+                summary = summarize(archive)
+                _summaries[sha256] = summary
+                if cacheFile is not None:
+                    _saveCacheFile(cacheFile)
+
+    result = dict(summary)
+    result.update({'file': filename, 'sha256': sha256, 'size': os.path.getsize(filename), 'cached': cached})
+    return result
+
+
+def checkCompatible(summary, portList=None, serverVersion=None):
+    """
+    Description
+        Check a config summary against the ports and the server of a test run.
+
+    Parameters
+        summary: (dict): The summary returned by inspectConfig().
+        portList: (list): The port locations available to the test.
+        serverVersion: (str): The API server version. Ex: '9.10.2007.7'. A config saved with a
+                       newer major.minor version than the server cannot be loaded.
+
+    Return
+        A list of problems. Empty if the config can be loaded.
+    """
+    problems = []
+    if portList is not None and summary['portCount'] > len(portList):
+        problems.append('{} needs {} ports, {} available'.format(summary['file'], summary['portCount'], len(portList)))
+
+    if serverVersion is not None and summary['version'] is not None:
+        configRelease = tuple(int(number) for number in summary['version'].split('.')[:2])
+        serverRelease = tuple(int(number) for number in serverVersion.split('.')[:2])
+        if configRelease > serverRelease:
+            problems.append('{} was saved with {}, newer than the server {}'.format(summary['file'], summary['version'], serverVersion))
+    return problems
+
+
+def portMap(summary, portList):
+    """[(location, port name)] pairing the port locations with the ports of the config, in order"""
+    return list(zip(portList, [port['name'] for port in summary['ports']]))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit('Usage: python ixncfgInspector.py <file.ixncfg> [<file.ixncfg> ...]')
+
+    for configFile in sys.argv[1:]:
+        summary = inspectConfig(configFile)
+        summary.pop('modules')
+        print(json.dumps(summary, indent=2))
@@ -34,26 +34,19 @@ try:
 
     # function to print a sta view in a table format
     def printStat(statView, transpose=True):
-        data = statView.Rows.RawData
-        columnCaptions=statView.ColumnHeaders
-        cheader = columnCaptions[:]
-        rows = []
-        for row in data:
-            tmp = [row[columnCaptions.index(col)] for col in cheader]
-            rows.append(tmp[:])
-
-        if transpose:
-            # transpose the table
-            rows.insert(0,cheader)
-            rows = list(zip(*rows))
-            cheader = []           
-
-        print(tabulate(rows,headers=cheader,tablefmt="psql"))
+        # One snapshot of the view, transposed once into columns
+        snapshot = StatViewSnapshot(statView)
+        cheader = [] if transpose else snapshot.columns
+        print(tabulate(snapshot.table(transpose), headers=cheader, tablefmt="psql"))
 except:
     pass
 
 # Import the RestPy module
-from uhd_restpy import SessionAssistant, Files
+from uhd_restpy import SessionAssistant
+from statSnapshot import StatViewSnapshot
+from ixncfgInspector import inspectConfig, checkCompatible, portMap
+from configUploadCache import getUploadCache
+from trafficLifecycle import TrafficLifecycle
 
 uhdIp = '10.36.78.190'
 portList = ['localuhd/1','localuhd/2','localuhd/3','localuhd/4']
@@ -73,6 +66,12 @@ configFile = 'ospf.ixncfg'
 
 
 try:
+    # Check the config locally before creating a session: the summary is cached by content hash
+    configSummary = inspectConfig(configFile)
+    problems = checkCompatible(configSummary, portList=portList)
+    if problems:
+        raise Exception('Cannot load {}: {}'.format(configFile, ', '.join(problems)))
+
     # LogLevel: none, info, warning, request, request_response, all
     session = SessionAssistant(IpAddress=uhdIp, RestPort=None, UserName=username, Password=password, 
                                SessionName=sessionName, SessionId=None, ApiKey=None,
@@ -82,12 +81,13 @@ try:
     uhd.info("Session ID/Session Name: {} {}".format(session.Session.Id,session.Session.Name))
 
     uhd.info('Loading config file: {0}'.format(configFile))
-    uhd.LoadConfig(Files(configFile, local_file=True))
+    # Uploads the file only if this API server does not have the same content yet
+    getUploadCache().loadConfig(uhd, configFile)
 
     uhd.info('Assigning Ports')
     portmap = session.PortMapAssistant()  
-    for i,port in enumerate(portList):
-        portmap.Map(Location=port, Name='Ethernet - 00%d' %(i+1))
+    for port, portName in portMap(configSummary, portList):
+        portmap.Map(Location=port, Name=portName)
 
     portmap.Connect(ForceOwnership=True) 
 
@@ -104,12 +104,10 @@ try:
     else:
         uhd.info(protocolSummary)
 
-    # Get the Traffic Item name for getting Traffic Item statistics.
-    trafficItem = uhd.Traffic.TrafficItem.find()[0]
-
-    trafficItem.Generate()
-    uhd.Traffic.Apply()
-    uhd.Traffic.StartStatelessTrafficBlocking()
+    # Generate the traffic items that changed since the last run, apply once and start all of them.
+    # run() logs the seconds of every phase. waitFirstPacket=False returns once the traffic is started, like
+    # StartStatelessTrafficBlocking(), instead of waiting up to 60 seconds for every traffic item to receive a frame.
+    TrafficLifecycle(uhd).run(waitFirstPacket=False)
 
     trafficItemStatistics = session.StatViewAssistant('Traffic Item Statistics')
 
@@ -124,10 +122,14 @@ try:
     else:
         uhd.info(trafficItemStatistics)
 
-    # Get the statistic values
-    txFrames = trafficItemStatistics.Rows['Tx Frames']
-    rxFrames = trafficItemStatistics.Rows['Rx Frames']
-    uhd.info('\nTraffic Item Stats:\n\tTxFrames: {}  RxFrames: {}\n'.format(txFrames, rxFrames))
+    # Get the statistic values from one snapshot of the view: one row per traffic item, then the totals
+    trafficItemSnapshot = StatViewSnapshot(trafficItemStatistics)
+    for trafficItem, txFrames, rxFrames in zip(trafficItemSnapshot.raw('Traffic Item'), trafficItemSnapshot.raw('Tx Frames'),
+                                               trafficItemSnapshot.raw('Rx Frames')):
+        uhd.info('\nTraffic Item Stats: {}\n\tTxFrames: {}  RxFrames: {}\n'.format(trafficItem, txFrames, rxFrames))
+
+    uhd.info('\nAll Traffic Items:\n\tTotal TxFrames: {}  Total RxFrames: {}  Loss: {:.3f}%\n'.format(
+        trafficItemSnapshot.sum('Tx Frames'), trafficItemSnapshot.sum('Rx Frames'), trafficItemSnapshot.lossPercent()))
 
     uhd.Traffic.StopStatelessTrafficBlocking()
 
@@ -36,28 +36,19 @@ try:
     from tabulate import tabulate
     # function to print a sta view in a table format
     def printStat(statView, transpose=True):
-        data = statView.Rows.RawData
-        columnCaptions = statView.ColumnHeaders
-        cheader = columnCaptions[:]
-        rows = []
-        
-        for row in data:
-            tmp = [row[columnCaptions.index(col)] for col in cheader]
-            rows.append(tmp[:])
-            
-        if transpose:
-            # transpose the table
-            rows.insert(0,cheader)
-            rows = list(zip(*rows))
-            cheader = []
-            
-        print(tabulate(rows,headers=cheader,tablefmt="psql"))
+        # One snapshot of the view, transposed once into columns
+        snapshot = StatViewSnapshot(statView)
+        cheader = [] if transpose else snapshot.columns
+        print(tabulate(snapshot.table(transpose), headers=cheader, tablefmt="psql"))
 except:
     pass
 
 
 # Import the RestPy module
-from uhd_restpy import SessionAssistant, Files
+from uhd_restpy import SessionAssistant
+from statSnapshot import StatViewSnapshot
+from incrementalConfigLoader import IncrementalConfigLoader
+from trafficLifecycle import TrafficLifecycle
 
 uhdIp = '10.36.78.190'
 portList = ['localuhd/1','localuhd/2']
@@ -84,7 +75,16 @@ try:
     uhd.info("Session ID/Session Name: {} {}".format(session.Session.Id,session.Session.Name))
 
     uhd.info('Loading config file: {0}'.format(jsonConfigFile))
-    uhd.LoadConfig(Files(jsonConfigFile, local_file=True))
+    configLoader = IncrementalConfigLoader(uhd)
+    configLoader.load(jsonConfigFile)
+
+    # To sweep variations of the config, load each variation with the same loader.
+    # Only the nodes that changed since the previous load are sent (see incrementalConfigLoader.py):
+    #    config = json.load(open(jsonConfigFile))
+    #    for multiplier in range(1, 201):
+    #        config['topology'][0]['deviceGroup'][0]['multiplier'] = multiplier
+    #        configLoader.load(config)
+    #        ...
 
     uhd.info('Assigning Ports')
     portmap = session.PortMapAssistant()  
@@ -105,15 +105,20 @@ try:
     else:
         uhd.info(protocolSummary)
 
-    # Get the Traffic Item name for getting Traffic Item statistics.
-    trafficItem = uhd.Traffic.TrafficItem.find()[0]
-
-    trafficItem.Generate()
-    uhd.Traffic.Apply()
-    uhd.Traffic.StartStatelessTrafficBlocking()
+    # Generate the traffic items that changed since the last run, apply once and start all of them.
+    # run() logs the seconds of every phase. waitFirstPacket=False returns once the traffic is started, like
+    # StartStatelessTrafficBlocking(), instead of waiting up to 60 seconds for every traffic item to receive a frame.
+    TrafficLifecycle(uhd).run(waitFirstPacket=False)
 
     flowStatistics = session.StatViewAssistant('Flow Statistics')
 
+    # With per-flow tracking the view can hold hundreds of thousands of rows.
+    # To stream it in fixed-size batches with constant memory instead (see statViewPager.py):
+    #    flowPager = StatViewPager(uhd, 'Flow Statistics', PageSize=1000)
+    #    flowPager.AddRowFilter('Tx Frames', flowPager.GREATER_THAN, 0)
+    #    for rows in flowPager.Batches():
+    #        ...
+
     # StatViewAssistant could also filter by REGEX, LESS_THAN, GREATER_THAN, EQUAL. 
     # Examples:
     #    flowStatistics.AddRowFilter('Port Name', flowStatistics.REGEX, '^Port 1$')
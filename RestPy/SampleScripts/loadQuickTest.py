@@ -5,9 +5,10 @@ loadQuickTest.py:
 
    - Connect to UHD API server
    - Loads a saved Quick Test config file.
-     This script will run all the created Quick Tests in the saved config file one after another and
-     retrieve all of the csv result files with a timestamp on them so they don't overwrite your existing
-     result files.
+     This script will run all the created Quick Tests in the saved config file and retrieve all of the
+     csv result files with a timestamp on them so they don't overwrite your existing result files.
+     Quick Tests that do not share ports run at the same time, and the result files are downloaded
+     while the next Quick Tests run.  See quickTestScheduler.py.
 
    - Optional: Assign ports or use the ports that are in the saved config file.
    - Start all protocols
@@ -40,27 +41,20 @@ try:
     from tabulate import tabulate
     # function to print a sta view in a table format
     def printStat(statView, transpose=True):
-        data = statView.Rows.RawData
-        columnCaptions = statView.ColumnHeaders
-        cheader = columnCaptions[:]
-        rows = []
-        
-        for row in data:
-            tmp = [row[columnCaptions.index(col)] for col in cheader]
-            rows.append(tmp[:])
-            
-        if transpose:
-            # transpose the table
-            rows.insert(0,cheader)
-            rows = list(zip(*rows))
-            cheader = []
-            
-        print(tabulate(rows,headers=cheader,tablefmt="psql"))
+        # One snapshot of the view, transposed once into columns
+        snapshot = StatViewSnapshot(statView)
+        cheader = [] if transpose else snapshot.columns
+        print(tabulate(snapshot.table(transpose), headers=cheader, tablefmt="psql"))
 except:
     pass
 
 # Import the RestPy module
-from uhd_restpy import SessionAssistant, Files
+from uhd_restpy import SessionAssistant
+from statSnapshot import StatViewSnapshot
+from quickTestScheduler import QuickTestScheduler
+from resultDownloader import ResultDownloader
+from quickTestMonitor import QuickTestMonitor
+from configUploadCache import getUploadCache
 
 uhdIp = '10.36.78.190'
 portList = ['localuhd/1','localuhd/2','localuhd/3','localuhd/4']
@@ -104,6 +98,8 @@ def addTimestampToFile(rfcTest, filename):
     """
     Add a timestamp to a file to avoid overwriting existing files.
     Replace default PDF file name Test_Report to the Quick Test RFC test name.
+    Other files keep their name after the RFC test name, so that the result files of one test
+    downloaded together do not overwrite each other. Ex: rfc2544throughput_AggregateResults_<timestamp>.csv
 
     If a path is included, it will yank out the file from the path.
     """
@@ -116,7 +112,10 @@ def addTimestampToFile(rfcTest, filename):
 
     newFilename = filename.split('.')[0]
     newFileExtension = filename.split('.')[1]
-    newFileWithTimestamp = '{}_{}.{}'.format(rfcTest, currentTimestamp,  newFileExtension)
+    if newFilename == 'Test_Report':
+        newFileWithTimestamp = '{}_{}.{}'.format(rfcTest, currentTimestamp,  newFileExtension)
+    else:
+        newFileWithTimestamp = '{}_{}_{}.{}'.format(rfcTest, newFilename, currentTimestamp,  newFileExtension)
     return newFileWithTimestamp
 
     uhdVersion = uhd.Globals.BuildNumber
@@ -151,178 +150,48 @@ def addTimestampToFile(rfcTest, filename):
 
 def getQuickTestCurrentAction(quickTestHandle):
     """
-    Get the Quick Test current progress.
+    Get the Quick Test current progress with one request.
     """
-    timer = 10
-    for counter in range(1,timer+1):
-        currentActions = quickTestHandle.Results.CurrentActions
-
-        uhd.info('\n\ngetQuickTestCurrentAction:\n')
-        for eachCurrentAction in quickTestHandle.Results.CurrentActions:
-            uhd.info('\t{}'.format(eachCurrentAction['arg2']))
-
-        uhd.info('\n')
-
-        if counter < timer and currentActions == []:
-            uhd.info('\n\ngetQuickTestCurrentAction is empty. Waiting %s/%s\n\n' % (counter, timer))
-            time.sleep(1)
-            continue
-
-        if counter < timer and currentActions != []:
-            break
+    return QuickTestMonitor(quickTestHandle).poll().currentAction
 
-        if counter == timer and currentActions == []:
-            raise Exception('\n\ngetQuickTestCurrentActions: Has no action')
 
-    return currentActions[-1]['arg2']
-
-
-def verifyQuickTestInitialization(quickTestHandle):
+def verifyQuickTestInitialization(quickTestHandle, monitor=None):
     """
     Verify quick test initialization stages.
-    """
-    for timer in range(1,30+1):
-        currentAction = getQuickTestCurrentAction(quickTestHandle)
-        uhd.info('\n\nverifyQuickTestInitialization currentAction: {}\n'.format(currentAction))
-        if currentAction == 'TestEnded':
-            raise Exception('VerifyQuickTestInitialization: QuickTest failed during initialization: {}'.format(quickTestHandle.Results.Status))
-
-        if timer < 30 and currentAction == 'None':
-            uhd.info('\n\nverifyQuickTestInitialization CurrentState = %s\n\tWaiting %s/30 seconds to change state\n' % (currentAction, timer))
-            time.sleep(1)
-            continue
-        else:
-            break
-
-        if timer == 20 and currentAction == 'None':
-            raise Exception('\n\nQuick Test is stuck.')
-
-    successStatusList = ['TransmittingComplete', 'TransmittingFrames', 'WaitingForStats', 'CollectingStats', 'TestEnded']
-    quickTestApplyStates = ['InitializingTest', 'ApplyFlowGroups', 'SetupStatisticsCollection']
-    ixNetworkVersion = uhd.Globals.BuildNumber
-    match = re.match('([0-9]+)\.[^ ]+ *', ixNetworkVersion)
-    ixNetworkVersion = int(match.group(1))
-
-    applyQuickTestCounter = 120
-    for counter in range(1,applyQuickTestCounter+1):
-        currentAction = getQuickTestCurrentAction(quickTestHandle)
-        uhd.info('\n\nverifyQuickTestInitialization: CurrentState: %s  Expecting: TransmittingFrames\n\tWaiting %s/%s seconds\n' % (currentAction, counter, applyQuickTestCounter))
-     
-        if currentAction == 'TestEnded':
-            raise Exception('\n\nVerifyQuickTestInitialization: QuickTest failed!!: {}'.format(quickTestHandle.Results.Status))
-
-        if currentAction == None:
-            currentAction = 'ApplyingAndInitializing'
-
-
-        if counter < applyQuickTestCounter and currentAction not in successStatusList:
-            time.sleep(1)
-            continue
-
-        if counter < applyQuickTestCounter and currentAction in successStatusList:
-            uhd.info('\n\nVerifyQuickTestInitialization is done applying configuration and has started transmitting frames\n')
-            break
-
 
-        if counter == applyQuickTestCounter:
-            if ixNetworkVersion >= 8 and currentAction not in successStatusList:
-                if currentAction == 'ApplyFlowGroups':
-                    uhd.info('\n\nVerifyQuickTestInitialization: IxNetwork is stuck on Applying Flow Groups. You need to go to the session to FORCE QUIT it.\n')
-
-                raise Exception('\n\nVerifyQuickTestInitialization is stuck on %s. Waited %s/%s seconds' % (
-                        currentAction, counter, applyQuickTestCounter))
-
-            if ixNetworkVersion < 8 and currentAction != 'Trial':
-                raise Exception('\n\nVerifyQuickTestInitialization is stuck on %s. Waited %s/%s seconds' % (
-                        currentAction, counter, applyQuickTestCounter))
+    Polls the Quick Test results with one request per poll until the test transmits frames.
+    Raises an exception if the test ends or is stuck while initializing.
+    """
+    if monitor is None:
+        monitor = QuickTestMonitor(quickTestHandle, logger=uhd)
+    return monitor.waitForInitialization(timeout=150)
 
-def monitorQuickTestRunningProgress(quickTestHandle, getProgressInterval=10):
+def monitorQuickTestRunningProgress(quickTestHandle, getProgressInterval=10, monitor=None):
     """
     Description
         monitor the Quick Test running progress.
 
     Parameters
         quickTestHandle: /api/v1/sessions/{id}/ixnetwork/quickTest/rfc2544throughput/{id}
+        getProgressInterval: (int): Seconds between polls while the test is transmitting.
+        monitor: (QuickTestMonitor): Continue with the state history of an existing monitor.
     """
-    isRunningBreakFlag = 0
-    trafficStartedFlag = 0
-    waitForRunningProgressCounter = 0
-    counter = 1
-    connectionFailureCounter = 0
-    maxRetries = 10
-
-    while True:
-        # This while loop was implemented because sometimes there could be failure to connect to the 
-        # API server.  It could be caused by many various issues not related to IxNetwork.
-        # Going to retry doing GETs up to 10 times.
-        connectedToApiServerFlag = False
-
-        while True:
-            try:
-                isRunning = quickTestHandle.Results.IsRunning
-                currentRunningProgress = quickTestHandle.Results.Progress
-                print('\nmonitorQuickTestRunningProgress: isRuning:', isRunning)
-                break
-            except:
-                uhd.debug('\n\nmonitorQuickTestRunningProgress: Failed to connect to API server {}/{} times\n'.format(connectionFailureCounter, maxRetries))
-                if connectionFailureCounter == maxRetries:
-                    raise Exception('\n\nmonitorQuickTestRunningProgress: Giving up trying to connecto the the API server after {} attempts\n'.format(maxRetries))
-
-                if connectionFailureCounter <= maxRetries:
-                    connectionFailureCounter += 1
-                    time.sleep(3)
-                    continue
-
-        uhd.info('\n\nmonitorQuickTestRunningProgress: isRunning: {}  CurrentRunningProgress: {}\n'.format(isRunning, currentRunningProgress))
-
-        if isRunning == True:
-            if bool(re.match('^Trial.*', currentRunningProgress)) == False:
-                if waitForRunningProgressCounter < 40:
-                    uhd.info('\n\nmonitorQuickTestRunningProgress: Waiting for trial runs {0}/30 seconds\n'.format(waitForRunningProgressCounter))
-                    waitForRunningProgressCounter += 1
-                    time.sleep(1)
-
-                if waitForRunningProgressCounter == 40:
-                    raise Exception('\n\nmonitorQuickTestRunningProgress: isRunning=True. QT is running, but no quick test iteration stats showing after 40 seconds.')
-            else:
-                # The test is running fine.  Keep running until isRunning == False.
-                trafficStartedFlag = 1
-                time.sleep(getProgressInterval)
-                continue
-        else:
-            if trafficStartedFlag == 1:
-                # We only care about traffic not running in the beginning.
-                # If traffic ran and stopped, then break out.
-                uhd.info('\n\nmonitorQuickTestRunningProgress: isRunning=False. Quick Test ran and is complete\n\n')
-                return True
-
-            if trafficStartedFlag == 0 and isRunningBreakFlag < 40:
-                uhd.info('\n\nmonitorQuickTestRunningProgress: isRunning=False. QT did not run yet. Wait {0}/40 seconds\n\n'.format(isRunningBreakFlag))
-                isRunningBreakFlag += 1
-                time.sleep(1)
-                continue
-
-            if trafficStartedFlag == 0 and isRunningBreakFlag == 40:
-                raise Exception('\n\nmonitorQuickTestRunningProgress: Quick Test failed to start:: {}'.format(quickTestHandle.Results.Status))
+    if monitor is None:
+        monitor = QuickTestMonitor(quickTestHandle, slowInterval=getProgressInterval, logger=uhd)
+    monitor.waitForCompletion(startTimeout=40)
+    return True
 
-def copyApiServerFileToLocalLinux(apiServerPathAndFileName, localPath, prependFilename=None, localPathOs='linux', includeTimestamp=False):
+def getLocalResultFilename(apiServerPathAndFileName, localPath, prependFilename=None, localPathOs='linux', includeTimestamp=False):
     """
     Description
-        Copy files from UHD API Server to a local Linux filesystem.
-        The source path could be any path in the API server.
-        The filename to be copied will remain the same filename unless you set renameDestinationFile to something else.
-        You could also append a timestamp for the destination file so the result files won't be overwritten.
+        Get the local path and filename to copy an API server file to.
 
     Parameters
-        apiServerPathAndFileName: (str): The full path and filename to retrieve from UHD API server.
-        localPath: (str): The Linux local filesystem path without the filename. Ex: /home/hgee/Results.
+        apiServerPathAndFileName: (str): The full path and filename in the UHD API server.
+        localPath: (str): The local filesystem path without the filename. Ex: /home/hgee/Results.
         prependFilename: (str): The rfc test name.  Ex: rfc2544throughput
         localPathOs: (str): The destination's OS.  linux or windows.
         includeTimestamp: (bool):  If False, each time you copy the same file will be overwritten.
-
-    Example:
-       apiServerPathAndFileName =  '/root/.local/share/Ixia/IxNetwork/data/result/DP.Rfc2544Tput/10694b39-6a8a-4e70-b1cd-52ec756910c3/Run0005/portMap.csv'
-       localPath = '/home/hgee/portMap.csv'
     """
     if '/' in apiServerPathAndFileName:
         fileName = apiServerPathAndFileName.split('/')[-1]
@@ -341,15 +210,41 @@ def copyApiServerFileToLocalLinux(apiServerPathAndFileName, localPath, prependFi
     if localPathOs == 'windows':
         destinationPath = '{}\\{}'.format(localPath, fileName)
 
+    return destinationPath
+
+def copyApiServerFileToLocalLinux(apiServerPathAndFileName, localPath, prependFilename=None, localPathOs='linux', includeTimestamp=False):
+    """
+    Description
+        Copy files from UHD API Server to a local Linux filesystem.
+        The source path could be any path in the API server.
+        The filename to be copied will remain the same filename unless you set renameDestinationFile to something else.
+        You could also append a timestamp for the destination file so the result files won't be overwritten.
+        The file is streamed to disk and an interrupted download is resumed. See resultDownloader.py.
+
+    Parameters
+        apiServerPathAndFileName: (str): The full path and filename to retrieve from UHD API server.
+        localPath: (str): The Linux local filesystem path without the filename. Ex: /home/hgee/Results.
+        prependFilename: (str): The rfc test name.  Ex: rfc2544throughput
+        localPathOs: (str): The destination's OS.  linux or windows.
+        includeTimestamp: (bool):  If False, each time you copy the same file will be overwritten.
+
+    Example:
+       apiServerPathAndFileName =  '/root/.local/share/Ixia/IxNetwork/data/result/DP.Rfc2544Tput/10694b39-6a8a-4e70-b1cd-52ec756910c3/Run0005/portMap.csv'
+       localPath = '/home/hgee/portMap.csv'
+
+    Return
+        The manifest entry of the file. Raises DownloadError if the download failed.
+    """
+    destinationPath = getLocalResultFilename(apiServerPathAndFileName, localPath, prependFilename=prependFilename,
+                                             localPathOs=localPathOs, includeTimestamp=includeTimestamp)
     uhd.info('\nCopying file from API server:{} -> {}'.format(apiServerPathAndFileName, destinationPath))
-    session.Session.DownloadFile(apiServerPathAndFileName, destinationPath)
+    return resultDownloader.downloadOne(apiServerPathAndFileName, destinationPath)
 
 def getQuickTestCsvFiles(quickTestHandle, copyToPath, csvFile='all', rfcTest=None, includeTimestamp=False):
     """
     Description
         Copy Quick Test CSV result files to a specified path on either Windows or Linux.
-        Note: Currently only supports copying from Windows.
-              Copy from Linux is coming in November.
+        All the files are downloaded at the same time. See resultDownloader.py.
 
     quickTestHandle: The Quick Test handle.
     copyToPath: The destination path to copy to.
@@ -360,6 +255,9 @@ def getQuickTestCsvFiles(quickTestHandle, copyToPath, csvFile='all', rfcTest=Non
              AggregateResults.csv, iteration.csv, results.csv, logFile.txt
     rfcTest: Ex: rfc2544throughput
     includeTimestamp: To append a timestamp on the result file.
+
+    Return
+        The download manifest: one entry per file with the local filename, size, sha256 and status.
     """
     resultsPath = quickTestHandle.Results.ResultPath
     uhd.info('\n\ngetQuickTestCsvFiles: %s\n' % resultsPath)
@@ -372,15 +270,19 @@ def getQuickTestCsvFiles(quickTestHandle, copyToPath, csvFile='all', rfcTest=Non
         else:
             getCsvFiles = csvFile
 
+    # Copy from UHD API server to Local Linux client filesystem.
+    files = []
     for eachCsvFile in getCsvFiles:
         linuxSource = resultsPath+'/{0}'.format(eachCsvFile)
+        files.append((linuxSource, getLocalResultFilename(linuxSource, copyToPath, prependFilename=rfcTest,
+                                                          localPathOs='linux', includeTimestamp=includeTimestamp)))
 
-        # Copy from UHD API server to Local Linux client filesystem.
-        try:
-            uhd.info('\n\nCopying file from UHD API server:{} to local Linux: {}\n'.format(linuxSource, eachCsvFile))
-            copyApiServerFileToLocalLinux(linuxSource, copyToPath, prependFilename=rfcTest, localPathOs='linux', includeTimestamp=includeTimestamp)
-        except Exception as errMsg:
-            uhd.warn('\n\ncopyApiServerFileToLocalLinux ERROR: {}\n'.format(errMsg))
+    manifest = resultDownloader.download(files)
+    for entry in manifest:
+        if entry['status'] != 'ok':
+            uhd.warn('\n\ngetQuickTestCsvFiles ERROR: {}: {}\n'.format(entry['remote'], entry['error']))
+
+    return manifest
 
 def verifyNgpfIsLayer3(topologyName):
     """
@@ -412,7 +314,11 @@ try:
     uhd = session.Ixnetwork
     uhd.info("Session ID/Session Name: {} {}".format(session.Session.Id,session.Session.Name))
 
-    uhd.LoadConfig(Files(configFile, local_file=True))
+    # Streams result files to disk, several at a time, and resumes interrupted downloads
+    resultDownloader = ResultDownloader.fromSession(session, maxConnections=4)
+
+    # Uploads the file only if this API server does not have the same content yet
+    getUploadCache().loadConfig(uhd, configFile)
 
     # Assign ports
     uhd.info('Assigning Ports')
@@ -439,48 +345,71 @@ try:
     # To append a timestamp in the CSV result files so existing result files won't get overwritten.
     timestamp = Timestamp()
 
+    def getRfcTestName(quickTestHandle):
+        match = re.search('/api/.*/quickTest/(.*)/[0-9]+', quickTestHandle.href)
+        return '{}_{}'.format(match.group(1), quickTestHandle.Name)
+
+    def runQuickTest(quickTestHandle):
+        uhd.info('\n\nExecuting Quick Test: {}\n'.format(getRfcTestName(quickTestHandle)))
+        # One monitor follows the test through all its state transitions, one request per poll
+        monitor = QuickTestMonitor(quickTestHandle, logger=uhd)
+        quickTestHandle.Apply()
+        quickTestHandle.Start()
+        verifyQuickTestInitialization(quickTestHandle, monitor=monitor)
+        monitorQuickTestRunningProgress(quickTestHandle, monitor=monitor)
+
+        # Examples to show how to stop and remove a quick test.
+        # Uncomment one or both if you want to use them.
+        #quickTestHandle.Stop()
+        #quickTestHandle.remove()
+
+    def getQuickTestResults(quickTestHandle):
+        # Runs on the scheduler's download thread while the next tests are running
+        rfcTest = getRfcTestName(quickTestHandle)
+        timestamp.now()
+
+        # Copy CSV  to local linux filesystem
+        manifest = getQuickTestCsvFiles(quickTestHandle, copyToPath=linuxDestinationFolder, rfcTest=rfcTest, includeTimestamp=True)
+
+        try:
+            pdfFile = quickTestHandle.GenerateReport()
+        except Exception:
+            # If using UHD API server, a PDF result file is not supported for all rfc tests.
+            uhd.warn('\n\nPDF for {} is not supported\n'.format(rfcTest))
+            pdfFile = None
+
+        try:
+            # A failed PDF download is raised and shows up as an error in the scheduler report
+            if pdfFile is not None:
+                uhd.info('Copying PDF results to: {}'.format(linuxDestinationFolder))
+                manifest.append(copyApiServerFileToLocalLinux(pdfFile, linuxDestinationFolder, prependFilename=rfcTest, includeTimestamp=True))
+        finally:
+            # What landed where, with sizes and SHA-256 checksums
+            resultDownloader.writeManifest(manifest, '{}/{}_{}_manifest.json'.format(linuxDestinationFolder, rfcTest, timestamp.get))
+
     # These are all the RFC tests to search for in the saved config file.
+    # If the loaded QT config file doesn't have an rfcTest created, find() returns nothing for it.
+    quickTestHandles = []
     for rfcTest in [uhd.QuickTest.Rfc2544frameLoss.find(),
                     uhd.QuickTest.Rfc2544throughput.find(),
                     uhd.QuickTest.Rfc2544back2back.find(),
                     ]:
-
-        if not rfcTest:
-            # If the loaded QT config file doesn't have rfcTest created, then skip it.
-            continue
-       
-        for quickTestHandle in rfcTest:
-            quickTestName = quickTestHandle.Name
-            uhd.info('\n\nQuickTestHandle: {}\n'.format(quickTestHandle))
-            match = re.search('/api/.*/quickTest/(.*)/[0-9]+', quickTestHandle.href)
-            rfc = match.group(1)
-            rfcTest = '{}_{}'.format(rfc, quickTestName)
-            uhd.info('\n\nExecuting Quick Test: {}\n'.format(rfcTest))
-
-            quickTestHandle.Apply()
-            quickTestHandle.Start()
-            verifyQuickTestInitialization(quickTestHandle)
-            monitorQuickTestRunningProgress(quickTestHandle)
-
-            timestamp.now()
-
-            # Copy CSV  to local linux filesystem
-            getQuickTestCsvFiles(quickTestHandle, copyToPath=linuxDestinationFolder, rfcTest=rfcTest, includeTimestamp=True)
-
-            try:
-                pdfFile = quickTestHandle.GenerateReport()
-                destPdfTestResult = addTimestampToFile(rfcTest=rfcTest, filename=pdfFile)
-                uhd.info('Copying PDF results to: {}'.format(linuxDestinationFolder+destPdfTestResult))
-                session.Session.DownloadFile(pdfFile, linuxDestinationFolder+'/'+destPdfTestResult)
-            except:
-                # If using UHD API server, a PDF result file is not supported for all rfc tests.
-                uhd.warn('\n\nPDF for {} is not supported\n'.format(rfc))
-
-
-            # Examples to show how to stop and remove a quick test.
-            # Uncomment one or both if you want to use them.
-            #quickTestHandle.Stop()
-            #quickTestHandle.remove()
+        quickTestHandles.extend(rfcTest)
+
+    # The tests run one after another and the results of a test are downloaded while the next test runs.
+    # IxNetwork does not generally run several Quick Tests at once in one session.  If your server does,
+    # set maxParallel=None to also run tests that share no ports at the same time.
+    scheduler = QuickTestScheduler(runTest=runQuickTest, collectResults=getQuickTestResults,
+                                   getName=getRfcTestName, maxParallel=1, logger=uhd)
+    report = scheduler.run(quickTestHandles)
+    scheduler.printReport(report)
+
+    failedTests = [result['name'] for result in report['tests'] if result['error'] is not None]
+    if failedTests:
+        for result in report['tests']:
+            if result['error'] is not None:
+                uhd.warn('\n{} failed:\n{}'.format(result['name'], result['error']))
+        raise Exception('Quick Tests failed: {}'.format(', '.join(failedTests)))
 
     if debugMode == False:
         session.Session.remove()
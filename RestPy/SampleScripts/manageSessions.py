@@ -3,6 +3,10 @@ manageSessions.py
 
    Connect to UHD
       - View or delete open sessions
+      - Remove the abandoned sessions, many at a time, with sessionReaper.SessionReaper:
+        the sessions idle for longer than idleHours, of the given users, whose name matches
+        namePattern and in the given states.  Set removeSessions = True to remove them,
+        otherwise only a report of what would be removed is shown.
 
 Requirements:
    - Minimum UHD 1.0
@@ -18,12 +22,21 @@ import os, sys, traceback
 
 # Import the RestPy module
 from uhd_restpy.testplatform.testplatform import TestPlatform
+from sessionReaper import SessionReaper, printReport
 
 uhdIp = '10.36.78.190'
 apiServerPort = 443
 username = 'admin'
 password = 'admin'
 
+# Session selection. None selects every session.
+# An ACTIVE session is idle only if the server reports its last activity (see sessionReaper.py).
+idleHours = 8
+userNames = None
+namePattern = None
+states = None
+removeSessions = False
+
 try:
     testPlatform = TestPlatform(uhdIp, rest_port=apiServerPort)
 
@@ -33,14 +46,14 @@ try:
     # authenticate with username and password
     testPlatform.Authenticate(username, password)
 
-    # Show all open sessions
-    for session in testPlatform.Sessions.find():
-        print(session)
+    # Show all open sessions, and remove the selected ones 8 at a time
+    reaper = SessionReaper(testPlatform, idleSeconds=None if idleHours is None else idleHours * 3600,
+                           userNames=userNames, namePattern=namePattern, states=states,
+                           workers=8, dryRun=not removeSessions)
+    printReport(reaper.reap(), showKept=True)
 
     # Delete a particular session ID
     #testPlatform.Sessions.find(Id=11).remove()
-    
-    testPlatform.Sessions.find(Id=1).remove()
 
 except Exception as errMsg:
     print('\n%s' % traceback.format_exc(None, errMsg))
@@ -0,0 +1,397 @@
+"""
+mockRestServer.py
+
+Description
+   A small in-memory stand-in for the UHD REST API, used by the bench*.py scripts to
+   count round trips and measure wall-clock time without a chassis.
+
+   It serves a tree of nodes under /api/v1/sessions/1/ixnetwork and understands:
+      - GET    <href>                         Read the properties of a node
+      - PATCH  <href>                         Update the properties of a node
+      - POST   <href>/operations/select       The select operation used by restpy find()/refresh()
+      - POST   <href>/operations/getvalues    Multivalue values, with start index and count
+      - GET    <href>/files?filename=<name>   File downloads added with addFile(), with Range and If-Range requests
+      - POST   <href>/files?filename=<name>   File uploads, stored like addFile()
+      - GET    <href>/files?filter=<name>     The file list, {'absolute': dir, 'files': [{'name', 'length'}]}
+      - DELETE <href>/files?filename=<name>   Remove a file
+
+   MockConnection talks to it over a keep-alive HTTP connection and exposes the same
+   _read/_create/_update/_delete/_execute methods as the restpy connection, so that
+   session.Ixnetwork can be replaced by MockConnection.Ixnetwork in a benchmark.
+
+   An optional per-request latency emulates a remote API server, and an optional bandwidth
+   in bytes per second the time a file upload takes on a slow link.
+
+Requirements:
+   - Python 3
+
+Usage:
+   server = MockRestServer(latency=0.005)
+   server.start()
+   topology = server.add(server.root, 'topology', name='Topo1')
+   uhd = MockConnection(server).Ixnetwork
+   ...
+   server.stop()
+"""
+
+import os, json, re, socket, hashlib, threading, time
+
+try:
+    from urllib.parse import urlparse, parse_qs, quote
+except ImportError:
+    from urlparse import urlparse, parse_qs
+    from urllib import quote
+
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MockRestServer(object):
+    """
+    An in-memory tree of REST nodes.  Every node is a dict of properties plus
+    the reserved keys 'href', 'xpath' and '_children' ({childName: [nodes]}).
+    """
+    def __init__(self, sessionId=1, latency=0, bandwidth=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.requestCount = 0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._nodes = {}
+        self._multivalueId = 0
+        self._files = {}
+        # {filename: ETag}, from the content of the file
+        self._etags = {}
+        self._dropAfter = {}
+        self.root = self._addNode('/api/v1/sessions/{}/ixnetwork'.format(sessionId), '')
+        self._httpd = None
+
+    def _addNode(self, href, xpath, **properties):
+        node = dict(properties)
+        node['href'] = href
+        node['xpath'] = xpath if xpath else '/'
+        node['_children'] = {}
+        self._nodes[href] = node
+        return node
+
+    def add(self, parent, childName, **properties):
+        """Add a child node and return it"""
+        siblings = parent['_children'].setdefault(childName, [])
+        index = len(siblings) + 1
+        xpath = '{}/{}[{}]'.format(parent['xpath'] if parent['xpath'] != '/' else '', childName, index)
+        node = self._addNode('{}/{}/{}'.format(parent['href'], childName, index), xpath, **properties)
+        siblings.append(node)
+        return node
+
+    def addSingleton(self, parent, childName, **properties):
+        """Add a child node without an index in its href, such as /traffic, and return it"""
+        xpath = '{}/{}'.format(parent['xpath'] if parent['xpath'] != '/' else '', childName)
+        node = self._addNode('{}/{}'.format(parent['href'], childName), xpath, **properties)
+        parent['_children'][childName] = [node]
+        return node
+
+    def addMultivalue(self, values):
+        """Add a /multivalue node that returns the given values and return its href"""
+        self._multivalueId += 1
+        href = '{}/multivalue/{}'.format(self.root['href'], self._multivalueId)
+        self._addNode(href, '/multivalue[{}]'.format(self._multivalueId), count=len(values), values=list(values))
+        return href
+
+    def addFile(self, filename, data, dropAfter=None):
+        """
+        Serve data as a file download. With dropAfter=n the first download of the file
+        closes the connection after n bytes, to test resumed downloads.
+        """
+        self._files[filename] = data
+        self._etags[filename] = '"{}"'.format(hashlib.md5(data).hexdigest())
+        if dropAfter is not None:
+            self._dropAfter[filename] = dropAfter
+
+    def _serveFile(self, handler):
+        filename = parse_qs(urlparse(handler.path).query).get('filename', [''])[0]
+        if filename not in self._files:
+            handler.send_response(404)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        data = self._files[filename]
+        etag = self._etags[filename]
+        first = 0
+        match = re.match(r'bytes=(\d+)-', handler.headers.get('Range', ''))
+        if match is not None and handler.headers.get('If-Range', etag) != etag:
+            # The file changed since the client's part was read: send the whole file
+            match = None
+        if match is not None:
+            first = int(match.group(1))
+            if first >= len(data):
+                handler.send_response(416)
+                handler.send_header('Content-Range', 'bytes */{}'.format(len(data)))
+                handler.send_header('Content-Length', '0')
+                handler.end_headers()
+                return
+            handler.send_response(206)
+            handler.send_header('Content-Range', 'bytes {}-{}/{}'.format(first, len(data) - 1, len(data)))
+        else:
+            handler.send_response(200)
+        handler.send_header('Content-Type', 'application/octet-stream')
+        handler.send_header('ETag', etag)
+        handler.send_header('Content-Length', str(len(data) - first))
+        handler.end_headers()
+
+        dropAfter = self._dropAfter.pop(filename, None)
+        end = len(data) if dropAfter is None else min(first + dropAfter, len(data))
+        for offset in range(first, end, 65536):
+            handler.wfile.write(data[offset:min(offset + 65536, end)])
+        if dropAfter is not None:
+            handler.close_connection = True
+
+    def _fileRequest(self, handler, method, body):
+        query = parse_qs(urlparse(handler.path).query)
+        filename = query.get('filename', [None])[0]
+        status = 200
+        response = None
+        if method == 'POST':
+            if self.bandwidth:
+                time.sleep(len(body) / float(self.bandwidth))
+            self.addFile(filename, body)
+            status = 201
+            response = {'name': filename, 'length': len(body)}
+        elif method == 'DELETE':
+            status = 204 if self._files.pop(filename, None) is not None else 404
+        else:
+            fileFilter = query.get('filter', [None])[0]
+            response = {'absolute': '/root/.local/share/Ixia/sdmStreamManager/common',
+                        'files': [{'name': name, 'length': len(data)} for name, data in sorted(self._files.items())
+                                  if fileFilter is None or fileFilter in name]}
+
+        data = json.dumps(response).encode('utf-8') if response is not None else b''
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def node(self, href):
+        return self._nodes[href.split('?')[0]]
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self._httpd.server_address[1])
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method):
+                length = int(self.headers.get('Content-Length', 0))
+                body = self.rfile.read(length) if length else b''
+                with server._lock:
+                    server.requestCount += 1
+                    server.requests.append((method, self.path))
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if method == 'GET' and '/files?filename=' in self.path:
+                    server._serveFile(self)
+                    return
+                if self.path.split('?')[0].endswith('/files'):
+                    server._fileRequest(self, method, body)
+                    return
+
+                payload = json.loads(body) if body else None
+
+                status, body = server.dispatch(method, self.path, payload)
+                data = json.dumps(body).encode('utf-8') if body is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_PATCH(self):
+                self._handle('PATCH')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=self._httpd.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def resetCounters(self):
+        with self._lock:
+            self.requestCount = 0
+            self.requests = []
+
+    def dispatch(self, method, path, payload):
+        try:
+            if method == 'POST' and '/operations/select' in path:
+                return 200, [self._select(eachSelect) for eachSelect in payload['selects']]
+
+            if method == 'POST' and path.endswith('/operations/getvalues'):
+                values = self.node(payload['arg1'])['values']
+                start = payload.get('arg2') or 0
+                count = payload.get('arg3')
+                return 200, values[start:] if count is None else values[start:start + count]
+
+            if method == 'POST' and '/operations/' in path:
+                href, operation = path.split('/operations/')
+                handler = getattr(self, 'operation_{}'.format(operation.split('?')[0]), None)
+                if handler is None:
+                    return 200, None
+                return 200, handler(href, payload)
+
+            if method == 'GET':
+                return 200, self._properties(self.node(path), ['*'])
+
+            if method == 'PATCH':
+                updates = payload if isinstance(payload, list) else [payload]
+                for update in updates:
+                    node = self.node(path) if 'id' not in update else self.node('{}/{}'.format(path, update['id']))
+                    node.update(dict((key, value) for key, value in update.items() if key != 'id'))
+                return 200, None
+
+            if method == 'DELETE':
+                self._nodes.pop(path.split('?')[0], None)
+                return 204, None
+        except KeyError as errMsg:
+            return 404, {'errors': ['Not found: {}'.format(errMsg)]}
+
+        return 405, None
+
+    def _properties(self, node, properties):
+        result = {'href': node['href'], 'xpath': node['xpath']}
+        for key, value in node.items():
+            if key.startswith('_') or key in result:
+                continue
+            if '*' in properties or key in properties:
+                result[key] = value
+        return result
+
+    def _select(self, eachSelect):
+        node = self.node(eachSelect['from'])
+        children = [dict(child, regex=re.compile(child['child'])) for child in eachSelect.get('children', [])]
+        return self._selectNode(node, eachSelect.get('properties', []), children)
+
+    def _selectNode(self, node, properties, children):
+        result = self._properties(node, properties)
+        for childName, childNodes in node['_children'].items():
+            for child in children:
+                if child['regex'].search(childName) is None:
+                    continue
+                matches = [childNode for childNode in childNodes if childNode['href'] in self._nodes and
+                           self._matchFilters(childNode, child.get('filters', []))]
+                result[childName] = [self._selectNode(childNode, child.get('properties', []), children)
+                                     for childNode in matches]
+                break
+        return result
+
+    def _matchFilters(self, node, filters):
+        for eachFilter in filters:
+            if re.search(str(eachFilter['regex']), str(node.get(eachFilter['property'], ''))) is None:
+                return False
+        return True
+
+
+class MockConnection(object):
+    """
+    The subset of the restpy connection API used by the helper modules, over one
+    keep-alive HTTP connection per thread.
+    """
+    def __init__(self, server):
+        self._server = server
+        self._host, self._port = server._httpd.server_address
+        self._local = threading.local()
+
+    @property
+    def Ixnetwork(self):
+        return MockNode(self, self._server.root['href'])
+
+    def _http(self):
+        if getattr(self._local, 'http', None) is None:
+            self._local.http = HTTPConnection(self._host, self._port)
+            self._local.http.connect()
+            self._local.http.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return self._local.http
+
+    def _send_recv(self, method, url, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        http = self._http()
+        http.request(method, url, body=body, headers={'Content-Type': 'application/json'})
+        response = http.getresponse()
+        data = response.read()
+        if response.status >= 400:
+            raise Exception('{} {} failed: {} {}'.format(method, url, response.status, data))
+        return json.loads(data) if data else None
+
+    def _read(self, url):
+        return self._send_recv('GET', url)
+
+    def _create(self, url, payload):
+        return self._send_recv('POST', url, payload)
+
+    def _update(self, url, payload):
+        return self._send_recv('PATCH', url, payload)
+
+    def _delete(self, url, payload=None):
+        return self._send_recv('DELETE', url, payload)
+
+    def _execute(self, url, payload):
+        return self._send_recv('POST', url, payload)
+
+    def _put_file(self, url, local_filename, remote_filename=None):
+        if remote_filename is None:
+            remote_filename = os.path.basename(local_filename)
+        with open(local_filename, 'rb') as localFile:
+            data = localFile.read()
+        http = self._http()
+        http.request('POST', '{}/files?filename={}'.format(url, quote(remote_filename)), body=data,
+                     headers={'Content-Type': 'application/octet-stream'})
+        response = http.getresponse()
+        body = response.read()
+        if response.status != 201:
+            raise Exception('Upload of {} failed: {} {}'.format(remote_filename, response.status, body))
+        return json.loads(body)
+
+    def _delete_file(self, url, remote_filename):
+        return self._send_recv('DELETE', '{}/files?filename={}'.format(url, quote(remote_filename)))
+
+
+class MockNode(object):
+    """Stands in for session.Ixnetwork: an href and a connection"""
+    def __init__(self, connection, href):
+        self._connection = connection
+        self.href = href
+
+    def info(self, message):
+        print(message)
+
+    def warn(self, message):
+        print(message)
+
+    def debug(self, message):
+        pass
@@ -0,0 +1,337 @@
+"""
+multivaluePattern.py
+
+Description
+   Compute the values of a multivalue on the client from its pattern.
+
+   Mac.Increment(), Address.Increment(), VlanId.Increment() and NetworkAddress.Increment() only
+   store a pattern on the server.  To learn the value of one device, scripts such as verifyArp.py
+   read Address.Values, every value of the multivalue.
+
+   MultivaluePattern holds the pattern and its count, and computes the value of any index in O(1),
+   or of a slice lazily, for integers, IPv4, IPv6 and MAC addresses:
+      - singleValue: the same value for every index
+      - counter:     start, step and direction
+      - valueList:   the values, repeated
+      - nested:      nested counters, [(step, count), ...] with the first one changing fastest.
+                     A custom pattern of the server with one increment per level is read as
+                     nested counters, the innermost increment changing fastest.
+   indexOf() does the opposite, the index of a value, in O(1) for counters.
+
+   The pattern is read from the server with one select for any number of multivalues, or taken
+   from a JSON config.  verify() reads some of the values from the server to check that the
+   local model computes the same ones.  The random, alternate and string patterns are not modeled.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from multivaluePattern import MultivaluePattern, readPatterns
+
+   address = readPatterns(uhd, [ipv4.Address.href])[0]
+   address[999999]                      # The address of the millionth device
+   address[10:20]                       # A list of 10 addresses
+   address.indexOf('1.1.16.66')         # The device with this address
+   address.verify(uhd, ipv4.Address.href)
+"""
+
+import socket, struct
+
+from batchSelect import selectUrl, getMultivalueValues
+
+# The bits of each kind of value. Counters wrap around at this width
+widths = {'ipv4': 32, 'ipv6': 128, 'mac': 48}
+
+
+def toNumber(value):
+    """Return (number, kind) for an integer, IPv4, IPv6 or MAC address. Kind is int, ipv4, ipv6 or mac"""
+    if isinstance(value, bool):
+        return int(value), 'bool'
+    if isinstance(value, int):
+        return value, 'int'
+    value = value.strip()
+    if ':' in value and len(value.split(':')) == 6 and '::' not in value and all(len(part) <= 2 for part in value.split(':')):
+        return int(value.replace(':', ''), 16), 'mac'
+    if ':' in value:
+        high, low = struct.unpack('!QQ', socket.inet_pton(socket.AF_INET6, value))
+        return (high << 64) | low, 'ipv6'
+    if '.' in value:
+        return struct.unpack('!I', socket.inet_aton(value))[0], 'ipv4'
+    if value in ('true', 'false'):
+        return int(value == 'true'), 'bool'
+    return int(value), 'int'
+
+
+def fromNumber(number, kind):
+    """The opposite of toNumber. IPv6 addresses are written like the server does, 2000:0:0:1:0:0:0:1"""
+    if kind in widths:
+        number %= 1 << widths[kind]
+    if kind == 'mac':
+        digits = '{:012x}'.format(number)
+        return ':'.join(digits[index:index + 2] for index in range(0, 12, 2))
+    if kind == 'ipv6':
+        return ':'.join('{:x}'.format((number >> shift) & 0xffff) for shift in range(112, -1, -16))
+    if kind == 'ipv4':
+        return socket.inet_ntoa(struct.pack('!I', number))
+    if kind == 'bool':
+        return 'true' if number else 'false'
+    return number
+
+
+def addStep(start, step, times):
+    """start + step * times for integers, IPv4, IPv6 and MAC addresses"""
+    if times == 0 or step is None:
+        return start
+    startNumber, kind = toNumber(start)
+    return fromNumber(startNumber + toNumber(step)[0] * times, kind)
+
+
+def normalize(value):
+    """A value in the form compared by verify() and indexOf(), such as 1:2:0:0:0:0:0:1 for 1:2::1"""
+    try:
+        return fromNumber(*toNumber(value))
+    except (ValueError, socket.error):
+        return value
+
+
+class MultivaluePattern(object):
+    def __init__(self, pattern, count, value=None, start=None, step=None, values=None, levels=None, direction='increment'):
+        """
+        Use the singleValue, counter, valueList, nested, fromConfig and readPatterns constructors.
+
+        Parameters
+            pattern: (str): singleValue, counter, valueList or nested.
+            count: (int): The number of values.
+        """
+        self.pattern = pattern
+        self.count = count
+        self.value = value
+        self.start = start
+        self.step = step
+        self.values = values
+        self.levels = levels
+        self.direction = direction
+        if pattern in ('singleValue', 'valueList'):
+            self.kind = None
+        elif pattern in ('counter', 'nested'):
+            self._start, self.kind = toNumber(start)
+            self._step = toNumber(step)[0] if step is not None else 0
+            if direction == 'decrement':
+                self._step = -self._step
+            # [(step, count, period)]: the step of a level is added once per 'period' indexes.
+            # A counter has no levels, its step is added once per index
+            self._levels = []
+            period = 1
+            for levelStep, levelCount in (levels or []):
+                self._levels.append((toNumber(levelStep)[0], levelCount, period))
+                period *= levelCount
+            self._period = period
+        else:
+            raise ValueError('Pattern {} is not modeled'.format(pattern))
+
+    @classmethod
+    def singleValue(cls, value, count):
+        return cls('singleValue', count, value=value)
+
+    @classmethod
+    def counter(cls, start, step, count, direction='increment'):
+        return cls('counter', count, start=start, step=step, direction=direction)
+
+    @classmethod
+    def valueList(cls, values, count=None):
+        return cls('valueList', len(values) if count is None else count, values=list(values))
+
+    @classmethod
+    def nested(cls, start, levels, count=None, step=0):
+        """
+        Parameters
+            start: The value of index 0.
+            levels: (list): (step, count) of each counter, the first one changing fastest.
+            count: (int): The number of values. Defaults to one full cycle of all counters.
+            step: Added once per full cycle of all counters.
+        """
+        cycle = 1
+        for levelStep, levelCount in levels:
+            cycle *= levelCount
+        return cls('nested', cycle if count is None else count, start=start, step=step, levels=list(levels))
+
+    @classmethod
+    def fromConfig(cls, multivalue, count):
+        """
+        Description
+            The pattern of a multivalue of a JSON config.
+
+        Parameters
+            multivalue: (dict): {'xpath': "/multivalue[@source = ...]", 'counter': {...}} or singleValue, valueList, custom.
+            count: (int): The number of values, the multiplier product of the owner.
+        """
+        if 'singleValue' in multivalue:
+            return cls.singleValue(multivalue['singleValue']['value'], count)
+        if 'counter' in multivalue:
+            counter = multivalue['counter']
+            return cls.counter(counter['start'], counter['step'], count, counter.get('direction', 'increment'))
+        if 'valueList' in multivalue:
+            return cls.valueList(multivalue['valueList']['values'], count)
+        if 'custom' in multivalue:
+            return cls._fromCustom(multivalue['custom'], count)
+        raise ValueError('{}: Pattern not modeled'.format(multivalue.get('xpath')))
+
+    @classmethod
+    def _fromCustom(cls, custom, count):
+        levels = []
+        increments = custom.get('increment', [])
+        while len(increments) > 0:
+            if len(increments) > 1:
+                raise ValueError('Custom patterns with several increments per level are not modeled')
+            levels.insert(0, (increments[0]['value'], int(increments[0]['count'])))
+            increments = increments[0].get('increment', [])
+        if len(levels) == 0:
+            return cls.counter(custom['start'], custom.get('step', 0), count)
+        return cls.nested(custom['start'], levels, count=count, step=custom.get('step', 0))
+
+    def __len__(self):
+        return self.count
+
+    def valueAt(self, index):
+        """The value of one index in O(1), or O(levels) for nested counters"""
+        if index < 0:
+            index += self.count
+        if index < 0 or index >= self.count:
+            raise IndexError('Index {} of a multivalue of {} values'.format(index, self.count))
+        if self.pattern == 'singleValue':
+            return self.value
+        if self.pattern == 'valueList':
+            return self.values[index % len(self.values)]
+        number = self._start + self._step * (index // self._period)
+        for levelStep, levelCount, period in self._levels:
+            number += levelStep * (index // period % levelCount)
+        return fromNumber(number, self.kind)
+
+    def iterValues(self, start=0, stop=None, step=1):
+        """Generate the values of a range of indexes, one at a time"""
+        for index in range(start, self.count if stop is None else min(stop, self.count), step):
+            yield self.valueAt(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self.iterValues(*index.indices(self.count)))
+        return self.valueAt(index)
+
+    def __iter__(self):
+        return self.iterValues()
+
+    def indexOf(self, value):
+        """
+        Description
+            The first index with this value, or None. O(1) for singleValue and counter patterns,
+            O(count) for the others.
+        """
+        if self.pattern == 'counter':
+            number, kind = toNumber(value)
+            difference = number - self._start
+            if kind in widths:
+                difference %= 1 << widths[kind]
+            if difference == 0 or self._step == 0:
+                return 0 if difference == 0 and self.count > 0 else None
+            if kind in widths and self._step < 0:
+                difference -= 1 << widths[kind]
+            if difference % self._step != 0:
+                return None
+            index = difference // self._step
+            return index if 0 <= index < self.count else None
+        if self.pattern == 'singleValue':
+            return 0 if normalize(value) == normalize(self.value) and self.count > 0 else None
+        wanted = normalize(value)
+        for index, each in enumerate(self.iterValues()):
+            if normalize(each) == wanted:
+                return index
+        return None
+
+    def verify(self, uhd, multivalueHref, indexes=None, samples=16):
+        """
+        Description
+            Compare local values with the values of the server.
+
+        Parameters
+            uhd: The session.Ixnetwork object.
+            multivalueHref: (str): The multivalue href.
+            indexes: (list): The indexes to compare. Defaults to 'samples' indexes spread over the count,
+                     including the first and the last one.
+            samples: (int): The number of indexes compared by default.
+
+        Return
+            A list of mismatches [{'index', 'local', 'server'}]. An empty list means the model is right.
+            One request per contiguous run of indexes.
+        """
+        if indexes is None:
+            if self.count <= samples:
+                indexes = list(range(self.count))
+            else:
+                indexes = sorted(set([self.count - 1] + [index * (self.count - 1) // (samples - 1) for index in range(samples)]))
+
+        mismatches = []
+        runStart = 0
+        for position in range(1, len(indexes) + 1):
+            if position < len(indexes) and indexes[position] == indexes[position - 1] + 1:
+                continue
+            first, last = indexes[runStart], indexes[position - 1]
+            serverValues = getMultivalueValues(uhd, multivalueHref, start=first, count=last - first + 1)
+            for index, serverValue in zip(range(first, last + 1), serverValues):
+                local = self.valueAt(index)
+                if normalize(local) != normalize(serverValue):
+                    mismatches.append({'index': index, 'local': local, 'server': serverValue})
+            runStart = position
+        return mismatches
+
+    def __str__(self):
+        if self.pattern == 'singleValue':
+            return 'singleValue {} x{}'.format(self.value, self.count)
+        if self.pattern == 'valueList':
+            return 'valueList of {} x{}'.format(len(self.values), self.count)
+        if self.pattern == 'counter':
+            return 'counter {} {} {} x{}'.format(self.start, self.direction, self.step, self.count)
+        return 'nested {} {} x{}'.format(self.start, self.levels, self.count)
+
+
+def readPatterns(uhd, multivalueHrefs, strict=True):
+    """
+    Description
+        Read the pattern of many multivalues with one select.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        multivalueHrefs: (list): Multivalue hrefs, such as ipv4.Address.href.
+        strict: (bool): True raises ValueError for a pattern that is not modeled, False returns None for it.
+
+    Return
+        A list of MultivaluePattern in the same order.
+    """
+    if len(multivalueHrefs) == 0:
+        return []
+
+    children = [{'child': '^(singleValue|counter|valueList|custom|increment)$', 'properties': ['*'], 'filters': []}]
+    selects = [{'from': href, 'properties': ['count', 'pattern'], 'children': children, 'inlines': []}
+               for href in multivalueHrefs]
+    responses = uhd._connection._execute(selectUrl(multivalueHrefs[0]), {'selects': selects})
+
+    patterns = []
+    for href, response in zip(multivalueHrefs, responses):
+        config = {'xpath': href}
+        for pattern in ('singleValue', 'counter', 'valueList', 'custom'):
+            if pattern == response.get('pattern') and pattern in response:
+                config[pattern] = response[pattern][0] if isinstance(response[pattern], list) else response[pattern]
+        try:
+            if len(config) == 1:
+                raise ValueError('{}: Pattern {} is not modeled'.format(href, response.get('pattern')))
+            patterns.append(MultivaluePattern.fromConfig(config, int(response['count'])))
+        except ValueError:
+            if strict:
+                raise
+            patterns.append(None)
+    return patterns
@@ -0,0 +1,216 @@
+"""
+portConnector.py
+
+Description
+   Map and connect many ports at once, and time every port through each phase.
+
+   The samples call PortMapAssistant.Map() in a loop, one or two requests per port, and then
+   Connect(ForceOwnership=True) as one blocking call.  When the connect is slow, because of an
+   ownership takeover or a link that takes long to come up, it does not tell which port held it up.
+
+   PortConnector:
+      - Maps all ports with one select of the vports and one importConfig that creates the
+        missing vports and sets the location of every vport.
+      - Takes over the ownership of each port with its own ConnectPorts request, 'workers' at a time.
+      - Polls the connectionState of all vports with one select per 'pollInterval' seconds.
+   For every port it reports the seconds spent in each phase:
+      - reserve:  mapping the port to its vport
+      - takeover: from the end of reserve until the port is connected
+      - linkUp:   from connected until the link is up
+   and the port state when it was last seen.
+
+   With requireAll=False the ports that are not ready by the deadline are reported and the test
+   goes on with the ports that are.  An onReady callback is called for each port as soon as it is
+   ready, so the test can start configuring it while the other ports are still coming up.
+
+   Note: Locations are UHD port locations such as localuhd/1.  For chassis;card;port locations of
+   chassis not added to the session yet, use PortMapAssistant.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from portConnector import PortConnector, printTimings
+
+   connector = PortConnector(uhd)
+   report = connector.connect([('localuhd/1', 'Port_1'), ('localuhd/2', 'Port_2')],
+                              forceOwnership=True, deadline=300, requireAll=False)
+   printTimings(report)
+   readyPorts = report['ready']
+"""
+
+import time, threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from batchSelect import select, importConfig
+
+connectedStates = ('connectedLinkUp', 'connectedLinkDown')
+
+
+class PortConnector(object):
+    def __init__(self, uhd, workers=8, pollInterval=1, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            workers: (int): The most ConnectPorts requests at the same time.
+            pollInterval: (int): Seconds between reads of the port states.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._workers = workers
+        self._pollInterval = pollInterval
+        self._logger = logger if logger is not None else uhd
+
+    def _readVports(self):
+        response = select(self._uhd, children=[{'child': '^vport$',
+                                                'properties': ['name', 'location', 'connectionState', 'connectionStatus'],
+                                                'filters': []}])
+        return response.get('vport', [])
+
+    def _map(self, ports):
+        """Create the missing vports and set the location of all vports with one importConfig"""
+        vports = self._readVports()
+        byName = dict((vport['name'], vport) for vport in vports)
+        changes = []
+        nextIndex = len(vports) + 1
+        for location, name in ports:
+            if name in byName:
+                xpath = '/vport[{}]'.format(vports.index(byName[name]) + 1)
+            else:
+                xpath = '/vport[{}]'.format(nextIndex)
+                nextIndex += 1
+            if name not in byName or byName[name].get('location') != location:
+                changes.append({'xpath': xpath, 'name': name, 'location': location})
+        if len(changes) > 0:
+            importConfig(self._uhd, changes)
+        return dict((vport['name'], vport) for vport in self._readVports())
+
+    def _connectPorts(self, ports, forceOwnership):
+        """ConnectPorts for each port, 'workers' at a time"""
+        work = queue.Queue()
+        for port in ports:
+            work.put(port)
+        url = '{}/vport/operations/connectports'.format(self._uhd.href)
+
+        def worker():
+            while True:
+                try:
+                    port = work.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    self._uhd._connection._execute(url, {'arg1': [port['href']], 'arg2': forceOwnership})
+                except Exception as errMsg:
+                    port['error'] = str(errMsg)
+
+        for workerNumber in range(min(self._workers, len(ports))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+
+    def connect(self, ports, forceOwnership=True, deadline=300, requireAll=True, ignoreLinkUp=False, onReady=None):
+        """
+        Description
+            Map and connect ports, and wait until they are ready.
+
+        Parameters
+            ports: (list): (location, vportName) pairs, such as ('localuhd/1', 'Port_1').
+            forceOwnership: (bool): Take over the ports owned by other users. False connects only the free
+                            ports and reports the others as owned by another user.
+            deadline: (int): Seconds from the start to wait for the ports.
+            requireAll: (bool): True raises an exception if a port is not ready by the deadline.
+                                False returns with the ports that are ready.
+            ignoreLinkUp: (bool): A port is ready as soon as it is connected, link up or not.
+            onReady: A function(port) called for each port as soon as it is ready.
+
+        Return
+            A report dict:
+                {'ports': [{'name', 'location', 'href', 'state', 'status', 'ready', 'error',
+                            'reserve', 'takeover', 'linkUp', 'total'}, ...],
+                 'ready': [vport names], 'notReady': [vport names], 'seconds'}
+            The phase seconds of a port are None for the phases it did not reach.
+        """
+        started = time.time()
+        vports = self._map(ports)
+        reserved = time.time() - started
+        self._logger.info('PortConnector: Mapped {} ports in {:.2f}s'.format(len(ports), reserved))
+
+        results = []
+        for location, name in ports:
+            vport = vports[name]
+            results.append({'name': name, 'location': location, 'href': vport['href'],
+                            'state': vport.get('connectionState'), 'status': vport.get('connectionStatus'),
+                            'ready': False, 'error': None, 'reserve': reserved, 'takeover': None, 'linkUp': None,
+                            'total': None, 'connectedAt': None})
+        byHref = dict((port['href'], port) for port in results)
+
+        # Without forceOwnership, the ports owned by other users stay assignedInUseByOther
+        self._connectPorts(results, forceOwnership)
+
+        pending = list(results)
+        while True:
+            now = time.time() - started
+            for vport in self._readVports():
+                port = byHref.get(vport['href'])
+                if port is None or port['ready']:
+                    continue
+                port['state'] = vport.get('connectionState')
+                port['status'] = vport.get('connectionStatus')
+                if port['state'] == 'assignedInUseByOther' and not forceOwnership:
+                    port['error'] = 'Owned by another user'
+                    continue
+                if port['connectedAt'] is None and port['state'] in connectedStates:
+                    port['connectedAt'] = now
+                    port['takeover'] = now - reserved
+                if port['state'] == 'connectedLinkUp' or (ignoreLinkUp and port['state'] in connectedStates):
+                    port['ready'] = True
+                    port['linkUp'] = now - port['connectedAt']
+                    port['total'] = now
+                    self._logger.info('PortConnector: {} {} ready in {:.2f}s'.format(port['name'], port['location'], now))
+                    if onReady is not None:
+                        onReady(port)
+
+            pending = [port for port in results if not port['ready']]
+            if len([port for port in pending if port['error'] is None]) == 0 or now > deadline:
+                break
+            time.sleep(self._pollInterval)
+
+        # ConnectPorts requests still running past the deadline are left to finish on their own
+        for port in results:
+            del port['connectedAt']
+
+        report = {'ports': results,
+                  'ready': [port['name'] for port in results if port['ready']],
+                  'notReady': [port['name'] for port in pending],
+                  'seconds': time.time() - started}
+        if len(pending) > 0:
+            description = ', '.join('{} {} {}{}'.format(port['name'], port['location'], port['state'],
+                                                        ': ' + port['error'] if port['error'] else '') for port in pending)
+            if requireAll:
+                raise Exception('PortConnector: After {} seconds these ports are not ready: {}'.format(deadline, description))
+            self._logger.info('PortConnector: Going on without these ports: {}'.format(description))
+        return report
+
+
+def printTimings(report, limit=None):
+    """Print the phase seconds of every port, or of the 'limit' slowest ports, the slowest port first"""
+    def seconds(value):
+        return '{:8.2f}'.format(value) if value is not None else '       -'
+
+    print('\n{:16} {:14} {:>8} {:>8} {:>8} {:>8}  {}'.format('Port', 'Location', 'Reserve', 'Takeover', 'LinkUp', 'Total', 'State'))
+    ports = sorted(report['ports'], key=lambda port: -(port['total'] if port['total'] is not None else float('inf')))
+    for port in ports[:limit]:
+        print('{:16} {:14} {} {} {} {}  {}'.format(port['name'][:16], port['location'][:14], seconds(port['reserve']),
+                                                   seconds(port['takeover']), seconds(port['linkUp']),
+                                                   seconds(port['total']), port['state']))
+    print('{} of {} ports ready in {:.2f}s'.format(len(report['ready']), len(report['ports']), report['seconds']))
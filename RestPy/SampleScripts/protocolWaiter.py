@@ -0,0 +1,105 @@
+"""
+protocolWaiter.py
+
+Description
+   Wait for NGPF protocol sessions to come up.
+
+   bgpNgpf.py used to call protocolObj.refresh().SessionStatus on every protocol object once per
+   second, which is one GET per object per second and up to one extra second of delay after
+   convergence.  waitForSessionsUp() reads the SessionStatus of every given protocol object with
+   a single select operation per poll, polls quickly right after StartAllProtocols and backs off
+   while sessions are still converging, and returns as soon as every session is up.
+
+   It also records when each protocol session came up, so that slow peers stand out.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from protocolWaiter import waitForSessionsUp
+
+   result = waitForSessionsUp([bgp1, bgp2], timeout=60)
+   if result['allUp'] == False:
+       raise Exception('Sessions down: {}'.format(result['down']))
+"""
+
+import time
+
+from batchSelect import selectMany
+
+
+def waitForSessionsUp(protocolObjects, timeout=60, minInterval=0.1, maxInterval=2, backoff=1.5):
+    """
+    Description
+        Poll the SessionStatus of all protocol objects until every session is up or the timeout expires.
+
+    Parameters
+        protocolObjects: (list): restpy protocol objects. Ex: [bgp1, bgp2] or [uhd.Topology.find().DeviceGroup.find()...BgpIpv4Peer.find()]
+                         Objects that encapsulate several resources are expanded.
+        timeout: (int): Seconds to wait for all sessions to be up.
+        minInterval: (float): The first poll interval in seconds.
+        maxInterval: (float): The poll interval will not grow beyond this many seconds.
+        backoff: (float): The poll interval is multiplied by this after every poll that did not converge.
+
+    Return
+        A dict:
+            {'allUp': True,
+             'elapsed': 4.2,                # seconds until all sessions were up or until the timeout
+             'polls': 9,                    # number of REST requests issued
+             'peers': [{'href': ..., 'name': 'BGP Peer 1', 'timeToUp': [1.3, 4.2], 'up': True}, ...],
+             'down': []}                    # names of the protocol objects that are not all up
+
+        timeToUp holds one value per session of the protocol object, or None if that session is not up.
+    """
+    resources = []
+    for protocolObject in protocolObjects:
+        for resource in protocolObject:
+            resources.append(resource)
+
+    if len(resources) == 0:
+        return {'allUp': True, 'elapsed': 0, 'polls': 0, 'peers': [], 'down': []}
+
+    hrefs = [resource.href for resource in resources]
+    peers = [{'href': href, 'name': href, 'timeToUp': None, 'up': False} for href in hrefs]
+
+    start = time.time()
+    interval = minInterval
+    polls = 0
+
+    while True:
+        responses = selectMany(resources[0], hrefs, properties=['sessionStatus', 'descriptiveName'])
+        polls += 1
+        elapsed = time.time() - start
+
+        for peer, response in zip(peers, responses):
+            peer['name'] = response.get('descriptiveName', peer['href'])
+            sessionStatus = response.get('sessionStatus', [])
+            if peer['timeToUp'] is None:
+                peer['timeToUp'] = []
+            # The sessions can show up after the first poll
+            if len(sessionStatus) > len(peer['timeToUp']):
+                peer['timeToUp'].extend([None] * (len(sessionStatus) - len(peer['timeToUp'])))
+
+            for index, status in enumerate(sessionStatus):
+                if status == 'up' and peer['timeToUp'][index] is None:
+                    peer['timeToUp'][index] = round(elapsed, 3)
+
+            peer['up'] = len(sessionStatus) > 0 and all(status == 'up' for status in sessionStatus)
+
+        if all(peer['up'] for peer in peers) or elapsed >= timeout:
+            break
+
+        time.sleep(min(interval, max(timeout - elapsed, 0)))
+        interval = min(interval * backoff, maxInterval)
+
+    return {'allUp': all(peer['up'] for peer in peers),
+            'elapsed': round(time.time() - start, 3),
+            'polls': polls,
+            'peers': peers,
+            'down': [peer['name'] for peer in peers if peer['up'] == False]}
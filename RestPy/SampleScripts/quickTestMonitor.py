@@ -0,0 +1,210 @@
+"""
+quickTestMonitor.py
+
+Description
+   Follow a running QuickTest with one request per poll.
+
+   quickTestHandle.Results.IsRunning, .Progress, .CurrentActions and .Status each select the
+   results node again, so the monitor loops in loadQuickTest.py sent up to four requests per
+   poll and slept a fixed 1 to 10 seconds between polls.
+
+   QuickTestMonitor reads the whole results node with a single GET per poll into a
+   QuickTestState and keeps the history of state transitions.  Callbacks registered with
+   onTransition() are called on every change of the current action or of isRunning, and
+   transitions() is a generator over the changes.  The poll interval is short while the test is
+   in a transitional action such as InitializingTest or ApplyFlowGroups, and long while it is
+   transmitting or collecting stats.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from quickTestMonitor import QuickTestMonitor
+
+   monitor = QuickTestMonitor(quickTestHandle, logger=uhd)
+   monitor.onTransition(lambda previous, state: uhd.info('{} -> {}'.format(previous.currentAction, state.currentAction)))
+   quickTestHandle.Start()
+   monitor.waitForInitialization()
+   monitor.waitForCompletion()
+"""
+
+import re, time
+from collections import namedtuple
+
+# One poll of the results node
+QuickTestState = namedtuple('QuickTestState', ['time', 'isRunning', 'progress', 'currentAction', 'currentActions',
+                                               'status', 'result', 'resultPath', 'duration', 'trafficStatus', 'waitingStatus'])
+
+# Actions that usually last a few seconds. The monitor polls fast while the test is in one of them.
+transitionalActions = ['None', 'TestStarted', 'InitializingTest', 'CheckingLicense', 'LicenseVerified', 'SetTestConfiguration',
+                       'ApplyFlowGroups', 'SetupStatisticsCollection', 'ClearingStats', 'WaitingForPorts', 'IterationStart',
+                       'StartingTraffic', 'WaitingTrafficToStop', 'TransmittingComplete', 'CheckingForAvailableStats',
+                       'ReleasingResources']
+
+# Once the test reaches one of these actions it is done initializing and transmits frames
+initializedActions = ['TransmittingComplete', 'TransmittingFrames', 'WaitingForStats', 'CollectingStats', 'TestEnded']
+
+
+class QuickTestMonitor(object):
+    def __init__(self, quickTestHandle, fastInterval=0.5, slowInterval=5, maxRetries=10, maxHistory=1000, logger=None):
+        """
+        Parameters
+            quickTestHandle: /api/v1/sessions/{id}/ixnetwork/quickTest/rfc2544throughput/{id}
+            fastInterval: (float): Seconds between polls in a transitional action and right after a transition.
+            slowInterval: (float): Seconds between polls while the test is transmitting or collecting stats.
+            maxRetries: (int): Consecutive failed reads of the results node before giving up.
+            maxHistory: (int): Transitions kept in history.
+            logger: An object with info() and debug() methods, such as session.Ixnetwork.
+        """
+        self._quickTestHandle = quickTestHandle
+        self._resultsHref = '{}/results'.format(quickTestHandle.href)
+        self._fastInterval = fastInterval
+        self._slowInterval = slowInterval
+        self._maxRetries = maxRetries
+        self._maxHistory = maxHistory
+        self._logger = logger
+        self._callbacks = []
+        self.state = None
+        self.history = []
+        self._transitioned = False
+
+    def _info(self, message):
+        if self._logger is not None:
+            self._logger.info(message)
+
+    def onTransition(self, callback):
+        """Call callback(previousState, state) on every transition. previousState is None on the first poll"""
+        self._callbacks.append(callback)
+        return self
+
+    def poll(self):
+        """
+        Description
+            Read the results node once, record a transition if the state changed and call the callbacks.
+
+        Return
+            The QuickTestState.
+        """
+        for retry in range(self._maxRetries + 1):
+            try:
+                results = self._quickTestHandle._connection._read(self._resultsHref)
+                break
+            except Exception as errMsg:
+                # A failure to reach the API server is often not related to the test. Retry.
+                if self._logger is not None:
+                    self._logger.debug('QuickTestMonitor: Failed to read {} {}/{} times: {}'.format(
+                        self._resultsHref, retry + 1, self._maxRetries, errMsg))
+                if retry == self._maxRetries:
+                    raise Exception('QuickTestMonitor: Giving up reading {} after {} attempts'.format(self._resultsHref, self._maxRetries))
+                time.sleep(3)
+
+        currentActions = results.get('currentActions') or []
+        state = QuickTestState(time=time.time(),
+                               isRunning=results.get('isRunning'),
+                               progress=results.get('progress'),
+                               currentAction=currentActions[-1]['arg2'] if len(currentActions) > 0 else 'None',
+                               currentActions=[action['arg2'] for action in currentActions],
+                               status=results.get('status'),
+                               result=results.get('result'),
+                               resultPath=results.get('resultPath'),
+                               duration=results.get('duration'),
+                               trafficStatus=results.get('trafficStatus'),
+                               waitingStatus=results.get('waitingStatus'))
+
+        previous = self.state
+        self.state = state
+        if previous is None or (previous.currentAction, previous.isRunning) != (state.currentAction, state.isRunning):
+            self.history.append(state)
+            if len(self.history) > self._maxHistory:
+                del self.history[0]
+            self._info('QuickTestMonitor: {} isRunning={} progress={}'.format(state.currentAction, state.isRunning, state.progress))
+            for callback in self._callbacks:
+                callback(previous, state)
+            self._transitioned = True
+        else:
+            self._transitioned = False
+
+        return state
+
+    def _interval(self):
+        if self._transitioned or self.state.currentAction in transitionalActions:
+            return self._fastInterval
+        return self._slowInterval
+
+    def transitions(self, timeout=None):
+        """
+        Description
+            A generator of (previousState, state) on every transition, until the test
+            has ended and is no longer running.
+
+        Parameters
+            timeout: (int): Raise an exception after this many seconds.
+        """
+        start = time.time()
+        previous = None
+        while True:
+            state = self.poll()
+            if self._transitioned:
+                yield previous, state
+                previous = state
+
+            if state.isRunning is False and state.currentAction == 'TestEnded':
+                return
+            if timeout is not None and time.time() - start > timeout:
+                raise Exception('QuickTestMonitor: The test did not end after {} seconds: {}'.format(timeout, state.currentAction))
+            time.sleep(self._interval())
+
+    def waitFor(self, condition, timeout, description):
+        """
+        Description
+            Poll until condition(state) is True.
+
+        Return
+            The QuickTestState that satisfied the condition.
+        """
+        start = time.time()
+        while True:
+            state = self.poll()
+            if condition(state):
+                return state
+            if time.time() - start > timeout:
+                raise Exception('QuickTestMonitor: Waited {} seconds for {}. Current action: {} Status: {}'.format(
+                    timeout, description, state.currentAction, state.status))
+            time.sleep(self._interval())
+
+    def waitForInitialization(self, timeout=150):
+        """
+        Description
+            Wait until the test has applied its configuration and transmits frames.
+            Raise an exception if the test ends while initializing.
+        """
+        state = self.waitFor(lambda state: state.currentAction in initializedActions, timeout,
+                             'the QuickTest to start transmitting frames')
+        if state.currentAction == 'TestEnded':
+            raise Exception('QuickTestMonitor: QuickTest failed during initialization: {}'.format(state.status))
+
+        self._info('QuickTestMonitor: Done applying configuration and started transmitting frames')
+        return state
+
+    def waitForCompletion(self, startTimeout=40, timeout=None):
+        """
+        Description
+            Wait until the test is running trials and then until it stops running.
+
+        Parameters
+            startTimeout: (int): Seconds to wait for isRunning and a Trial progress.
+            timeout: (int): Seconds to wait for the test to complete. None waits forever.
+        """
+        self.waitFor(lambda state: state.isRunning is True and bool(re.match('^Trial.*', state.progress or '')),
+                     startTimeout, 'the QuickTest to run trials')
+
+        state = self.waitFor(lambda state: state.isRunning is False, timeout if timeout is not None else float('inf'),
+                             'the QuickTest to complete')
+        self._info('QuickTestMonitor: Quick Test ran and is complete')
+        return state
@@ -0,0 +1,201 @@
+"""
+quickTestScheduler.py
+
+Description
+   Run many QuickTests with as much overlap as their ports allow.
+
+   loadQuickTest.py used to run every Rfc2544frameLoss/Rfc2544throughput/Rfc2544back2back handle
+   one after another and download its CSV and PDF results before starting the next one.
+
+   QuickTestScheduler builds a port conflict graph from the ports of each test: two tests conflict
+   if they share a vport.  Whenever a test ends, the scheduler starts every pending test whose ports
+   are all free, in the original order.  Result downloads run on a separate thread, so they overlap
+   the Apply/Start phase of the next test instead of holding up its ports.
+
+   When all tests are done it reports the wall-clock time saved compared to running and
+   downloading every test back to back.
+
+   Note: IxNetwork does not generally run several QuickTests at once in one session.  Whether
+   they can depends on the API server and the QuickTest types.  With maxParallel=1, the setting of
+   loadQuickTest.py, only the result downloads are overlapped.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from quickTestScheduler import QuickTestScheduler
+
+   scheduler = QuickTestScheduler(runTest=runQuickTest, collectResults=getQuickTestResults)
+   report = scheduler.run(quickTestHandles)
+   scheduler.printReport(report)
+"""
+
+import time, threading, traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from batchSelect import select
+
+
+def getQuickTestPorts(quickTestHandle):
+    """
+    Description
+        Get the vport hrefs that a QuickTest runs on, with one request.
+
+    Parameters
+        quickTestHandle: /api/v1/sessions/{id}/ixnetwork/quickTest/rfc2544throughput/{id}
+
+    Return
+        A set of vport hrefs. An empty set means the ports are unknown and the test
+        conflicts with every other test.
+    """
+    response = select(quickTestHandle, quickTestHandle.href,
+                      children=[{'child': '^ports$', 'properties': ['__id__', 'inTest'], 'filters': []}])
+    return set(port['__id__'] for port in response.get('ports', []) if port.get('inTest', True) is not False)
+
+
+def buildConflictGraph(tests, portsOfTest):
+    """
+    Description
+        Return {testIndex: set(conflicting test indexes)}.
+        A test with unknown ports (an empty set) conflicts with every other test.
+    """
+    graph = dict((index, set()) for index in range(len(tests)))
+    for first in range(len(tests)):
+        for second in range(first + 1, len(tests)):
+            firstPorts, secondPorts = portsOfTest[first], portsOfTest[second]
+            if len(firstPorts) == 0 or len(secondPorts) == 0 or firstPorts & secondPorts:
+                graph[first].add(second)
+                graph[second].add(first)
+    return graph
+
+
+class QuickTestScheduler(object):
+    def __init__(self, runTest, collectResults=None, getPorts=getQuickTestPorts, getName=None,
+                 maxParallel=None, downloadWorkers=1, logger=None):
+        """
+        Parameters
+            runTest: A function(quickTestHandle) that applies, starts and waits for one test.
+            collectResults: A function(quickTestHandle) that downloads the results of one test.
+            getPorts: A function(quickTestHandle) that returns the set of ports used by the test.
+            getName: A function(quickTestHandle) that returns the name used in the report. Defaults to the href.
+            maxParallel: (int): The most tests running at the same time. None means as many as the ports allow.
+            downloadWorkers: (int): Threads downloading results.
+            logger: An object with an info() method, such as session.Ixnetwork.
+        """
+        self._runTest = runTest
+        self._collectResults = collectResults
+        self._getPorts = getPorts
+        self._getName = getName if getName is not None else (lambda quickTestHandle: quickTestHandle.href)
+        self._maxParallel = maxParallel
+        self._downloadWorkers = downloadWorkers
+        self._logger = logger
+
+    def _info(self, message):
+        if self._logger is not None:
+            self._logger.info(message)
+
+    def run(self, quickTestHandles):
+        """
+        Description
+            Run all tests and collect all results.
+
+        Return
+            A report dict:
+                {'tests': [{'name', 'ports', 'start', 'end', 'runTime', 'downloadTime', 'error'}, ...],
+                 'wallClock': seconds from the first start to the last download,
+                 'serial': seconds it would have taken to run and download every test back to back,
+                 'saved': serial - wallClock}
+        """
+        tests = list(quickTestHandles)
+        portsOfTest = [set(self._getPorts(test)) for test in tests]
+        graph = buildConflictGraph(tests, portsOfTest)
+        results = [{'name': self._getName(test), 'ports': sorted(portsOfTest[index]), 'start': None, 'end': None,
+                    'runTime': 0, 'downloadTime': 0, 'error': None} for index, test in enumerate(tests)]
+
+        pending = list(range(len(tests)))
+        running = set()
+        finished = queue.Queue()
+        downloads = queue.Queue()
+        start = time.time()
+
+        def runOne(index):
+            results[index]['start'] = time.time() - start
+            try:
+                self._runTest(tests[index])
+            except Exception:
+                results[index]['error'] = traceback.format_exc()
+            results[index]['end'] = time.time() - start
+            results[index]['runTime'] = results[index]['end'] - results[index]['start']
+            finished.put(index)
+
+        def downloader():
+            while True:
+                index = downloads.get()
+                if index is None:
+                    return
+                downloadStart = time.time()
+                try:
+                    self._collectResults(tests[index])
+                except Exception:
+                    results[index]['error'] = (results[index]['error'] or '') + traceback.format_exc()
+                results[index]['downloadTime'] = time.time() - downloadStart
+
+        downloadThreads = []
+        if self._collectResults is not None:
+            for worker in range(self._downloadWorkers):
+                thread = threading.Thread(target=downloader)
+                thread.daemon = True
+                thread.start()
+                downloadThreads.append(thread)
+
+        while len(pending) > 0 or len(running) > 0:
+            # Start every pending test that does not share a port with a running test
+            for index in list(pending):
+                if self._maxParallel is not None and len(running) >= self._maxParallel:
+                    break
+                if len(graph[index] & running) == 0:
+                    pending.remove(index)
+                    running.add(index)
+                    self._info('QuickTestScheduler: starting {} on {}'.format(results[index]['name'], results[index]['ports']))
+                    thread = threading.Thread(target=runOne, args=(index,))
+                    thread.daemon = True
+                    thread.start()
+
+            index = finished.get()
+            running.discard(index)
+            self._info('QuickTestScheduler: {} ended after {:.1f}s'.format(results[index]['name'], results[index]['runTime']))
+            if self._collectResults is not None:
+                downloads.put(index)
+
+        for thread in downloadThreads:
+            downloads.put(None)
+        for thread in downloadThreads:
+            thread.join()
+
+        wallClock = time.time() - start
+        serial = sum(result['runTime'] + result['downloadTime'] for result in results)
+        return {'tests': results, 'wallClock': wallClock, 'serial': serial, 'saved': serial - wallClock}
+
+    def printReport(self, report):
+        lines = ['QuickTestScheduler report:']
+        for result in report['tests']:
+            lines.append('\t{}: start {:.1f}s  run {:.1f}s  download {:.1f}s{}'.format(
+                result['name'], result['start'] or 0, result['runTime'], result['downloadTime'],
+                '  FAILED' if result['error'] else ''))
+        lines.append('\tWall clock: {:.1f}s  Serial: {:.1f}s  Saved: {:.1f}s'.format(
+            report['wallClock'], report['serial'], report['saved']))
+        message = '\n'.join(lines)
+        if self._logger is not None:
+            self._logger.info(message)
+        else:
+            print(message)
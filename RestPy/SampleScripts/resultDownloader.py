@@ -0,0 +1,273 @@
+"""
+resultDownloader.py
+
+Description
+   Download many result files from the API server at once.
+
+   session.Session.DownloadFile() reads a whole file into memory before it writes it, and
+   loadQuickTest.py calls it once per CSV and PDF file, one file after another.
+
+   ResultDownloader fetches a list of server files over a bounded pool of HTTP connections,
+   one worker thread per connection, and streams every file to disk in chunks.  A file is first
+   written to <local file>.part and renamed when it is complete, so an interrupted download is
+   resumed with an HTTP Range request on the next attempt or the next run.  The ETag or
+   Last-Modified of the server file is kept in <local file>.part.validator and sent as If-Range, so
+   that the server sends the whole file again if it changed since.  A part file without a validator
+   is only resumed if an expected checksum is given, and is downloaded again otherwise.  The
+   received size is checked against the Content-Length/Content-Range of the response, a SHA-256 is
+   computed while streaming and checked if an expected checksum is given.
+
+   download() returns a manifest: one entry per file with where it landed, its size, its SHA-256,
+   and the error if it failed.  Failures no longer just print a warning.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from resultDownloader import ResultDownloader
+
+   downloader = ResultDownloader.fromSession(session, maxConnections=4)
+   manifest = downloader.download([(resultsPath+'/AggregateResults.csv', '/home/user/results/AggregateResults.csv'),
+                                   (resultsPath+'/results.csv', '/home/user/results/results.csv')])
+   downloader.writeManifest(manifest, '/home/user/results/manifest.json')
+"""
+
+import os, json, time, hashlib, threading
+
+try:
+    import queue
+    from urllib.parse import quote
+except ImportError:
+    import Queue as queue
+    from urllib import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class DownloadError(Exception):
+    pass
+
+
+class ResultDownloader(object):
+    def __init__(self, filesUrl, headers=None, verify=False, maxConnections=4, chunkSize=1024*1024,
+                 retries=3, timeout=60, logger=None):
+        """
+        Parameters
+            filesUrl: (str): The files url of the session. Ex: https://10.36.78.190/api/v1/sessions/1/ixnetwork/files
+            headers: (dict): Headers sent with every request, such as the X-Api-Key.
+            verify: (bool): Verify the server certificate.
+            maxConnections: (int): Files downloaded at the same time.
+            chunkSize: (int): Bytes read from the socket and written to disk at a time.
+            retries: (int): Attempts per file. Every retry resumes from the bytes already on disk.
+            timeout: (int): Seconds to wait for the server to send data.
+            logger: An object with info() and warn() methods, such as session.Ixnetwork.
+        """
+        self._filesUrl = filesUrl
+        self._verify = verify
+        self._maxConnections = maxConnections
+        self._chunkSize = chunkSize
+        self._retries = retries
+        self._timeout = timeout
+        self._logger = logger
+
+        self._http = requests.Session()
+        self._http.headers.update(headers or {})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=maxConnections)
+        self._http.mount('http://', adapter)
+        self._http.mount('https://', adapter)
+
+    @classmethod
+    def fromSession(cls, session, **kwargs):
+        """Use the address, API key and certificate setting of a SessionAssistant"""
+        connection = session.Session._connection
+        filesUrl = connection._normalize_url('{}/ixnetwork/files'.format(session.Session.href))[1]
+        headers = dict((key, value) for key, value in connection._headers.items() if key.lower() != 'content-type')
+        kwargs.setdefault('logger', session.Ixnetwork)
+        return cls(filesUrl, headers=headers, verify=connection._verify_cert, **kwargs)
+
+    def _info(self, message):
+        if self._logger is not None:
+            self._logger.info(message)
+
+    def download(self, files, expectedSha256=None):
+        """
+        Description
+            Download files concurrently.
+
+        Parameters
+            files: A list of (remoteFilename, localFilename). Every localFilename must be different.
+                   Backslashes in the remote filename are replaced with slashes for a Linux API server.
+            expectedSha256: (dict): Optional {remoteFilename: hex sha256} to verify.
+
+        Return
+            The manifest: a list in the order of files, each item is
+                {'remote', 'local', 'size', 'sha256', 'resumedFrom', 'attempts', 'seconds', 'status': 'ok'|'failed', 'error'}
+                resumedFrom is the number of bytes that were already on disk when the last attempt started.
+        """
+        localFilenames = [os.path.abspath(localFilename) for remoteFilename, localFilename in files]
+        duplicates = sorted(set(localFilename for localFilename in localFilenames if localFilenames.count(localFilename) > 1))
+        if len(duplicates) > 0:
+            raise DownloadError('Several files would be downloaded to: {}'.format(', '.join(duplicates)))
+
+        expectedSha256 = expectedSha256 or {}
+        manifest = [None] * len(files)
+        work = queue.Queue()
+        for index, (remoteFilename, localFilename) in enumerate(files):
+            work.put((index, remoteFilename, localFilename))
+
+        def worker():
+            while True:
+                try:
+                    index, remoteFilename, localFilename = work.get_nowait()
+                except queue.Empty:
+                    return
+                manifest[index] = self._downloadFile(remoteFilename, localFilename, expectedSha256.get(remoteFilename))
+
+        threads = []
+        for connection in range(min(self._maxConnections, len(files))):
+            thread = threading.Thread(target=worker)
+            thread.daemon = True
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        return manifest
+
+    def downloadOne(self, remoteFilename, localFilename, expectedSha256=None):
+        """Download one file and raise DownloadError if it failed. Return its manifest entry"""
+        entry = self._downloadFile(remoteFilename, localFilename, expectedSha256)
+        if entry['status'] != 'ok':
+            raise DownloadError('Download {} failed: {}'.format(remoteFilename, entry['error']))
+        return entry
+
+    def _downloadFile(self, remoteFilename, localFilename, expectedSha256):
+        remoteFilename = remoteFilename.replace('\\', '/')
+        entry = {'remote': remoteFilename, 'local': localFilename, 'size': None, 'sha256': None,
+                 'resumedFrom': 0, 'attempts': 0, 'seconds': 0, 'status': 'failed', 'error': None}
+        partFilename = localFilename + '.part'
+        start = time.time()
+
+        for attempt in range(1, self._retries + 1):
+            try:
+                entry['attempts'] = attempt
+                size, sha256, resumedFrom = self._stream(remoteFilename, partFilename, expectedSha256 is not None)
+                if expectedSha256 is not None and sha256 != expectedSha256.lower():
+                    # The bytes on disk are wrong, the next attempt starts over
+                    self._removePart(partFilename)
+                    raise DownloadError('SHA-256 mismatch: expected {} received {}'.format(expectedSha256, sha256))
+
+                if os.path.exists(localFilename):
+                    os.remove(localFilename)
+                os.rename(partFilename, localFilename)
+                self._removePart(partFilename)
+                entry.update({'size': size, 'sha256': sha256, 'resumedFrom': resumedFrom, 'status': 'ok', 'error': None})
+                break
+            except Exception as errMsg:
+                entry['error'] = str(errMsg)
+                if self._logger is not None:
+                    self._logger.warn('\nDownload {} attempt {}/{} failed: {}'.format(remoteFilename, attempt, self._retries, errMsg))
+                if isinstance(errMsg, DownloadError) and 'HTTP 404' in str(errMsg):
+                    break
+
+        entry['seconds'] = time.time() - start
+        if entry['status'] == 'ok':
+            self._info('\nDownloaded {} -> {} ({} bytes in {:.2f}s)'.format(remoteFilename, localFilename, entry['size'], entry['seconds']))
+        return entry
+
+    def _removePart(self, partFilename):
+        """Remove a part file and its validator, if they exist"""
+        for filename in (partFilename, partFilename + '.validator'):
+            if os.path.exists(filename):
+                os.remove(filename)
+
+    def _stream(self, remoteFilename, partFilename, verified=False):
+        """
+        Stream one file to partFilename, resuming from its current size. Return (size, sha256, resumedFrom)
+
+        The part file is resumed if the validator saved with it still matches the server file, or if
+        it has no validator and verified is True: the caller checks the SHA-256 of the whole file.
+        """
+        sha256 = hashlib.sha256()
+        validatorFilename = partFilename + '.validator'
+        validator = None
+        if os.path.exists(validatorFilename):
+            with open(validatorFilename) as validatorFile:
+                validator = validatorFile.read().strip() or None
+        offset = os.path.getsize(partFilename) if os.path.exists(partFilename) else 0
+        if offset > 0 and validator is None and not verified:
+            # Nothing tells whether these bytes are of the current server file: start over
+            self._removePart(partFilename)
+            offset = 0
+
+        headers = {}
+        if offset > 0:
+            headers['Range'] = 'bytes={}-'.format(offset)
+            if validator is not None:
+                # The server sends the whole file instead if it changed
+                headers['If-Range'] = validator
+
+        url = '{}?filename={}'.format(self._filesUrl, quote(remoteFilename))
+        response = self._http.get(url, headers=headers, stream=True, verify=self._verify, timeout=self._timeout)
+        try:
+            if response.status_code == 416 and offset > 0:
+                # The part file already holds the whole file, or more: start over
+                self._removePart(partFilename)
+                response.close()
+                return self._stream(remoteFilename, partFilename, verified)
+
+            if response.status_code not in (200, 206):
+                raise DownloadError('HTTP {} {}'.format(response.status_code, response.text[:200]))
+
+            if response.status_code == 206:
+                # Content-Range: bytes <first>-<last>/<total>
+                contentRange = response.headers.get('Content-Range', '')
+                if not contentRange.startswith('bytes {}-'.format(offset)):
+                    raise DownloadError('Unexpected Content-Range {} for offset {}'.format(contentRange, offset))
+                total = contentRange.split('/')[-1]
+                expectedSize = int(total) if total.isdigit() else None
+                with open(partFilename, 'rb') as partFile:
+                    for chunk in iter(lambda: partFile.read(self._chunkSize), b''):
+                        sha256.update(chunk)
+                mode = 'ab'
+            else:
+                # The server ignored the Range header, or the file changed, and sends the whole file
+                contentLength = response.headers.get('Content-Length')
+                expectedSize = int(contentLength) if contentLength is not None else None
+                offset = 0
+                mode = 'wb'
+                # A weak ETag cannot be used in If-Range
+                etag = response.headers.get('ETag')
+                validator = etag if etag is not None and not etag.startswith('W/') else response.headers.get('Last-Modified')
+                if validator is not None:
+                    with open(validatorFilename, 'w') as validatorFile:
+                        validatorFile.write(validator)
+                elif os.path.exists(validatorFilename):
+                    os.remove(validatorFilename)
+
+            size = offset
+            with open(partFilename, mode) as partFile:
+                for chunk in response.iter_content(chunk_size=self._chunkSize):
+                    partFile.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+        finally:
+            response.close()
+
+        if expectedSize is not None and size != expectedSize:
+            raise DownloadError('Size mismatch: expected {} bytes received {}'.format(expectedSize, size))
+
+        return size, sha256.hexdigest(), offset
+
+    def writeManifest(self, manifest, filename):
+        """Save the manifest as JSON"""
+        with open(filename, 'w') as manifestFile:
+            json.dump(manifest, manifestFile, indent=2)
+        return filename
@@ -0,0 +1,384 @@
+"""
+sessionPool.py
+
+Description
+   Lease ready sessions to tests instead of creating and clearing one per test.
+
+   The samples connect with SessionAssistant(..., ClearConfig=True) and often remove the session at
+   the end with session.Session.remove().  Creating a session, and clearing its config, is on the
+   critical path of every test.
+
+   SessionPool keeps 'size' idle sessions authenticated and cleared in the background:
+      - lease() hands out an idle session at once.  A new session is created in the background
+        to take its place, up to 'maxSessions' sessions in total.
+      - release() gives the session back.  It is cleared with NewConfig in the background and
+        becomes idle again.  release(healthy=False) removes it instead.  A 'with pool.lease()'
+        block that raises an exception releases its session with healthy=False.  Idle sessions above
+        'size' are removed once they have been idle for 'maxIdleSeconds'.
+      - Idle sessions are checked every 'healthCheckInterval' seconds.  Sessions that are no longer
+        ACTIVE, or fail NewConfig, are removed and replaced.
+      - A lease held longer than 'maxLeaseSeconds' is considered stuck: the session is removed and
+        replaced, and releasing it later does nothing.
+
+   The sessions are named '<namePrefix>-<process id>-<number>' so that they can be told apart from
+   the sessions of other users.  A pool only saves time for the tests run by the same process, such
+   as a Robot Framework or pytest run.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from uhd_restpy.testplatform.testplatform import TestPlatform
+   from sessionPool import SessionPool
+
+   testPlatform = TestPlatform('10.36.78.190', rest_port=443)
+   testPlatform.Authenticate('admin', 'admin')
+   pool = SessionPool(testPlatform, size=2, maxLeaseSeconds=3600).start(wait=True)
+
+   with pool.lease() as session:
+       uhd = session.Ixnetwork
+       portmap = session.PortMapAssistant()
+       ...
+
+   pool.stop()
+"""
+
+import os, time, threading, traceback
+from collections import deque
+
+from attributeCache import invalidateAttributeCache
+from findIndex import invalidateFindIndex
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+
+class PooledSession(object):
+    """A session leased from a SessionPool. It has the Session, Ixnetwork and TestPlatform of a SessionAssistant"""
+    def __init__(self, pool, session, ixnetwork):
+        self._pool = pool
+        self.Session = session
+        self.Ixnetwork = ixnetwork
+        self.leasedAt = time.time()
+        self.expired = False
+
+    @property
+    def TestPlatform(self):
+        return self._pool.testPlatform
+
+    @property
+    def Id(self):
+        return self.Session.Id
+
+    def PortMapAssistant(self):
+        from uhd_restpy.assistants.ports.portmapassistant import PortMapAssistant
+        return PortMapAssistant(self.Ixnetwork)
+
+    def StatViewAssistant(self, ViewName, Timeout=180, LocalCsvStorage=None):
+        from uhd_restpy.assistants.statistics.statviewassistant import StatViewAssistant
+        return StatViewAssistant(self.Ixnetwork, ViewName, Timeout, LocalCsvStorage)
+
+    def release(self, healthy=True):
+        self._pool.release(self, healthy=healthy)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, excTraceback):
+        # A session left in an unknown state by an exception is removed instead of reused
+        self.release(healthy=excType is None)
+
+
+class SessionPool(object):
+    def __init__(self, testPlatform, size=2, maxSessions=None, namePrefix='uhdPool', applicationType='ixnrest',
+                 maxLeaseSeconds=None, maxIdleSeconds=600, healthCheckInterval=60, workers=2, retryDelay=10, logger=None):
+        """
+        Parameters
+            testPlatform: An authenticated TestPlatform object.
+            size: (int): The number of idle sessions kept ready.
+            maxSessions: (int): The most sessions, idle and leased, the pool owns. Defaults to no limit.
+            namePrefix: (str): The prefix of the session names.
+            applicationType: (str): The application type of the sessions.
+            maxLeaseSeconds: (int): Remove a session leased for longer than this. None never does.
+            maxIdleSeconds: (int): Remove the idle sessions above size after this many seconds.
+            healthCheckInterval: (int): Seconds between checks of an idle session.
+            workers: (int): Threads creating, clearing and removing sessions.
+            retryDelay: (int): Seconds to wait after a failed session creation.
+            logger: An object with an info() method. Defaults to print.
+        """
+        self.testPlatform = testPlatform
+        self.size = size
+        self.maxSessions = maxSessions
+        self.namePrefix = namePrefix
+        self.applicationType = applicationType
+        self.maxLeaseSeconds = maxLeaseSeconds
+        self.maxIdleSeconds = maxIdleSeconds
+        self.healthCheckInterval = healthCheckInterval
+        self.retryDelay = retryDelay
+        self._workers = workers
+        self._logger = logger
+        # Idle sessions as [session, ixnetwork, lastChecked, idleSince], the least recently checked first
+        self._idle = deque()
+        self._leases = {}
+        # Sessions being created, cleared or checked
+        self._pending = 0
+        self._sessionNumber = 0
+        self._condition = threading.Condition()
+        self._tasks = queue.Queue()
+        self._threads = []
+        self._started = False
+        self._closed = False
+        self.stats = {'created': 0, 'recycled': 0, 'removed': 0, 'expired': 0, 'failures': 0,
+                      'leases': 0, 'waitSeconds': 0.0, 'maxWaitSeconds': 0.0}
+
+    def _info(self, message):
+        if self._logger is not None:
+            self._logger.info(message)
+        else:
+            print(message)
+
+    def start(self, wait=False):
+        """
+        Description
+            Start creating the idle sessions in the background.
+
+        Parameters
+            wait: (bool): Wait until 'size' sessions are idle, such as in the setup of a test suite.
+
+        Return
+            The pool.
+        """
+        with self._condition:
+            if self._started:
+                return self
+            self._started = True
+            for workerNumber in range(self._workers):
+                thread = threading.Thread(target=self._worker)
+                thread.daemon = True
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._maintain)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+            self._fill()
+            while wait and len(self._idle) < self.size and not self._closed:
+                self._condition.wait(1)
+        return self
+
+    def _owned(self):
+        return len(self._idle) + len(self._leases) + self._pending
+
+    def _fill(self, waiting=0):
+        """Queue the creation of the sessions missing from the pool. Call with the condition held"""
+        while not self._closed and len(self._idle) + self._pending < self.size + waiting and \
+                (self.maxSessions is None or self._owned() < self.maxSessions):
+            self._pending += 1
+            self._tasks.put((self._create, None))
+
+    def _worker(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            function, session = task
+            try:
+                function(session)
+            except Exception:
+                self._info('SessionPool: {}'.format(traceback.format_exc()))
+
+    def _maintain(self):
+        """Expire stuck leases and queue the health checks of idle sessions"""
+        interval = min(1.0, self.healthCheckInterval)
+        while True:
+            with self._condition:
+                self._condition.wait(interval)
+                if self._closed:
+                    return
+                now = time.time()
+                if self.maxLeaseSeconds is not None:
+                    for lease in list(self._leases.values()):
+                        if now - lease.leasedAt > self.maxLeaseSeconds:
+                            self._info('SessionPool: Session {} was leased {:.0f}s ago. Removing it'.format(lease.Id, now - lease.leasedAt))
+                            lease.expired = True
+                            del self._leases[id(lease)]
+                            self.stats['expired'] += 1
+                            self._tasks.put((self._remove, lease.Session))
+
+                for entry in list(self._idle):
+                    if len(self._idle) > self.size and now - entry[3] > self.maxIdleSeconds:
+                        self._idle.remove(entry)
+                        self._tasks.put((self._remove, entry[0]))
+
+                while len(self._idle) > 0 and now - self._idle[0][2] > self.healthCheckInterval:
+                    session, ixnetwork, lastChecked, idleSince = self._idle.popleft()
+                    self._pending += 1
+                    self._tasks.put((self._check, (session, ixnetwork, idleSince)))
+                self._fill()
+
+    def _addIdle(self, session, ixnetwork, idleSince=None):
+        with self._condition:
+            self._pending -= 1
+            closed = self._closed
+            if not closed:
+                now = time.time()
+                self._idle.append([session, ixnetwork, now, idleSince if idleSince is not None else now])
+            self._condition.notify_all()
+        if closed:
+            self._remove(session)
+
+    def _failed(self, session):
+        with self._condition:
+            self._pending -= 1
+            self._fill()
+            self._condition.notify_all()
+        if session is not None:
+            self._remove(session)
+
+    def _create(self, unused):
+        with self._condition:
+            self._sessionNumber += 1
+            name = '{}-{}-{}'.format(self.namePrefix, os.getpid(), self._sessionNumber)
+        start = time.time()
+        try:
+            session = self.testPlatform.Sessions.add(self.applicationType, Name=name)
+            # A new session has an empty config, no NewConfig needed
+            ixnetwork = session.Ixnetwork
+        except Exception as errMsg:
+            self.stats['failures'] += 1
+            self._info('SessionPool: Creating session {} failed: {}'.format(name, errMsg))
+            time.sleep(self.retryDelay)
+            self._failed(None)
+            return
+
+        self.stats['created'] += 1
+        self._info('SessionPool: Created session {} {} in {:.1f}s'.format(session.Id, name, time.time() - start))
+        self._addIdle(session, ixnetwork)
+
+    def _recycle(self, sessionAndIxnetwork):
+        session, ixnetwork = sessionAndIxnetwork
+        try:
+            ixnetwork.NewConfig()
+        except Exception as errMsg:
+            self.stats['failures'] += 1
+            self._info('SessionPool: NewConfig on session {} failed: {}'.format(session.Id, errMsg))
+            self._failed(session)
+            return
+        # The next lease must not see the nodes of the previous config
+        invalidateAttributeCache(ixnetwork)
+        invalidateFindIndex(ixnetwork)
+        self.stats['recycled'] += 1
+        self._addIdle(session, ixnetwork)
+
+    def _check(self, sessionAndIxnetwork):
+        session, ixnetwork, idleSince = sessionAndIxnetwork
+        try:
+            session.refresh()
+            state = session.State
+        except Exception as errMsg:
+            state = errMsg
+        if state != 'ACTIVE':
+            self.stats['failures'] += 1
+            self._info('SessionPool: Session {} is not healthy: {}'.format(session.Id, state))
+            self._failed(session)
+            return
+        self._addIdle(session, ixnetwork, idleSince)
+
+    def _remove(self, session):
+        try:
+            session.remove()
+            self.stats['removed'] += 1
+        except Exception as errMsg:
+            self._info('SessionPool: Removing session {} failed: {}'.format(session.Id, errMsg))
+
+    def lease(self, timeout=None):
+        """
+        Description
+            Lease an idle session. Wait for one if there is none.
+
+        Parameters
+            timeout: (int): Seconds to wait. None waits as long as it takes.
+
+        Return
+            A PooledSession. Release it, or use it in a with statement.
+        """
+        start = time.time()
+        with self._condition:
+            if not self._started:
+                self.start()
+            waiting = False
+            while len(self._idle) == 0:
+                if self._closed:
+                    raise Exception('SessionPool: The pool is stopped')
+                if not waiting:
+                    # More tests than idle sessions: create one more for this one
+                    self._fill(waiting=1)
+                    waiting = True
+                remaining = None if timeout is None else timeout - (time.time() - start)
+                if remaining is not None and remaining <= 0:
+                    raise Exception('SessionPool: No session after {} seconds'.format(timeout))
+                self._condition.wait(remaining)
+
+            # The most recently checked session is the most likely to be healthy
+            session, ixnetwork, lastChecked, idleSince = self._idle.pop()
+            lease = PooledSession(self, session, ixnetwork)
+            self._leases[id(lease)] = lease
+            self._fill()
+
+            waitSeconds = time.time() - start
+            self.stats['leases'] += 1
+            self.stats['waitSeconds'] += waitSeconds
+            self.stats['maxWaitSeconds'] = max(self.stats['maxWaitSeconds'], waitSeconds)
+        return lease
+
+    def release(self, lease, healthy=True):
+        """
+        Description
+            Give a leased session back. It is cleared in the background before it is leased again.
+
+        Parameters
+            lease: The PooledSession from lease().
+            healthy: (bool): False removes the session instead of reusing it.
+        """
+        with self._condition:
+            if self._leases.pop(id(lease), None) is None:
+                if lease.expired:
+                    self._info('SessionPool: The lease of session {} expired, it was removed'.format(lease.Id))
+                return
+            closed = self._closed
+            if not closed and healthy:
+                self._pending += 1
+                self._tasks.put((self._recycle, (lease.Session, lease.Ixnetwork)))
+            elif not closed:
+                self._tasks.put((self._remove, lease.Session))
+                self._fill()
+        if closed:
+            self._remove(lease.Session)
+
+    def status(self):
+        """Return {'idle', 'leased', 'pending'} session counts"""
+        with self._condition:
+            return {'idle': len(self._idle), 'leased': len(self._leases), 'pending': self._pending}
+
+    def stop(self):
+        """Remove the idle sessions and stop the threads. Leased sessions are removed when released"""
+        with self._condition:
+            self._closed = True
+            idle = [entry[0] for entry in self._idle]
+            self._idle.clear()
+            self._condition.notify_all()
+        for session in idle:
+            self._tasks.put((self._remove, session))
+        for thread in self._threads[:self._workers]:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
@@ -0,0 +1,298 @@
+"""
+sessionReaper.py
+
+Description
+   List the sessions of an API server and remove the abandoned ones, many at a time.
+
+   manageSessions.py lists the sessions with testPlatform.Sessions.find() and removes them one ID at a
+   time.  Shared servers collect hundreds of sessions left open by debugMode = True runs, and each
+   removal stops the session and waits for it, so cleaning up takes minutes.
+
+   SessionReaper reads the session list once and selects the sessions that match all the given
+   policies:
+      - idleSeconds: idle for longer than this many seconds
+      - userNames: owned by one of these users
+      - namePattern: the session name matches this regular expression
+      - states: in one of these states, such as ['STOPPED', 'ACTIVE']
+   The sessions in keepIds, such as the session of the caller, are never selected.
+
+   The selected sessions are removed by 'workers' threads.  With dryRun=True nothing is removed and
+   the report shows what would be.
+
+   Note: The idle time is the time since the last activity the server reports for the session.  If
+   the server does not report the last activity, the time since the session started or was created
+   is used only for sessions that are not ACTIVE: a soak test that started days ago is running, not
+   idle.  An ACTIVE session without a last activity is never selected by idleSeconds.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from sessionReaper import SessionReaper, printReport
+
+   reaper = SessionReaper(testPlatform, idleSeconds=8*3600, namePattern='^uhdPool-', dryRun=True)
+   printReport(reaper.reap())
+
+   # From cron
+   python sessionReaper.py 10.36.78.190 admin admin --idle-hours 8 --user admin --remove
+"""
+
+import re, sys, time, calendar, threading, traceback
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+# The fields with the time of the last activity of a session, in order of preference
+activityFields = ['lastActivityOn', 'lastActivity']
+# The fields with the time a session started, for the age of sessions without a last activity
+ageFields = ['startedOn', 'createdOn']
+
+
+def parseTimestamp(value):
+    """
+    Description
+        Parse the time of a session field to seconds since the epoch.
+
+    Parameters
+        value: (str|int|float): An ISO 8601 UTC time such as 2021-03-04T10:20:30.123Z, or seconds
+               or milliseconds since the epoch.
+
+    Return
+        Seconds since the epoch, or None if the value cannot be parsed.
+    """
+    if isinstance(value, (int, float)):
+        return value / 1000.0 if value > 1e11 else float(value)
+    match = re.match(r'(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(\.\d+)?(Z|[+-]\d\d:?\d\d)?$', str(value).strip())
+    if match is None:
+        return None
+    fields = [int(field) for field in match.groups()[:6]]
+    seconds = calendar.timegm(fields + [0, 0, 0]) + float(match.group(7) or 0)
+    zone = match.group(8)
+    if zone not in (None, 'Z'):
+        offset = int(zone[1:3]) * 3600 + int(zone[-2:]) * 60
+        seconds -= offset if zone[0] == '+' else -offset
+    return seconds
+
+
+def secondsSince(properties, fields, now):
+    """The seconds since the time of the first of the fields that the session has, or None"""
+    for field in fields:
+        if properties.get(field) is not None:
+            timestamp = parseTimestamp(properties[field])
+            if timestamp is not None:
+                return max(0, now - timestamp)
+    return None
+
+
+def sessionInfo(properties, now=None):
+    """Return the id, name, userName, state, subState, applicationType, idleSeconds and ageSeconds of a session"""
+    now = time.time() if now is None else now
+    return {'id': properties.get('id'),
+            'name': properties.get('name') or properties.get('sessionName') or properties.get('configName') or '',
+            'userName': properties.get('userName', ''),
+            'state': str(properties.get('state', '')).upper(),
+            'subState': properties.get('subState', ''),
+            'applicationType': properties.get('applicationType', ''),
+            'idleSeconds': secondsSince(properties, activityFields, now),
+            'ageSeconds': secondsSince(properties, ageFields, now)}
+
+
+def sessionInventory(testPlatform):
+    """
+    Description
+        Read all sessions of the server with one request.
+
+    Return
+        A list of (session, info): session is a Sessions object holding only that session,
+        info is the dict of sessionInfo().
+    """
+    now = time.time()
+    return [(session, sessionInfo(session._properties, now)) for session in testPlatform.Sessions.find()]
+
+
+class SessionReaper(object):
+    def __init__(self, testPlatform, idleSeconds=None, userNames=None, namePattern=None, states=None,
+                 keepIds=None, workers=8, dryRun=False, logger=None):
+        """
+        Parameters
+            testPlatform: An authenticated TestPlatform object.
+            idleSeconds: (int): Select the sessions idle for longer than this.
+            userNames: (list): Select the sessions of these users.
+            namePattern: (str): Select the sessions whose name matches this regular expression.
+            states: (list): Select the sessions in these states.
+            keepIds: (list): Never select these session ids.
+            workers: (int): The most sessions removed at the same time.
+            dryRun: (bool): Only report what would be removed.
+            logger: An object with an info() method. Defaults to print.
+
+        A policy left to None selects every session. With no policy at all, every session is selected.
+        """
+        self._testPlatform = testPlatform
+        self._idleSeconds = idleSeconds
+        self._userNames = None if userNames is None else set(userNames)
+        self._namePattern = None if namePattern is None else re.compile(namePattern)
+        self._states = None if states is None else set(state.upper() for state in states)
+        self._keepIds = set(str(sessionId) for sessionId in (keepIds or []))
+        self._workers = workers
+        self._dryRun = dryRun
+        self._logger = logger
+
+    def _info(self, message):
+        if self._logger is not None:
+            self._logger.info(message)
+        else:
+            print(message)
+
+    def matches(self, info):
+        """Return True if a session matches all the policies"""
+        if str(info['id']) in self._keepIds:
+            return False
+        if self._idleSeconds is not None:
+            idleSeconds = info['idleSeconds']
+            if idleSeconds is None and info['state'] != 'ACTIVE':
+                idleSeconds = info.get('ageSeconds')
+            if idleSeconds is None or idleSeconds < self._idleSeconds:
+                return False
+        if self._userNames is not None and info['userName'] not in self._userNames:
+            return False
+        if self._namePattern is not None and self._namePattern.search(info['name']) is None:
+            return False
+        if self._states is not None and info['state'] not in self._states:
+            return False
+        return True
+
+    def _remove(self, session, entry):
+        start = time.time()
+        try:
+            session.remove()
+            entry['action'] = 'removed'
+        except Exception as errMsg:
+            entry['action'] = 'failed'
+            entry['error'] = str(errMsg)
+        entry['seconds'] = time.time() - start
+
+    def reap(self):
+        """
+        Description
+            Select the sessions and remove them.
+
+        Return
+            A report dict:
+                {'sessions': [{'id', 'name', 'userName', 'state', 'idleSeconds', 'action', 'error', 'seconds'}, ...],
+                 'total': sessions on the server, 'selected', 'removed', 'failed', 'dryRun', 'seconds'}
+            'action' is 'kept', 'would remove', 'removed' or 'failed'.
+        """
+        start = time.time()
+        entries = []
+        selected = []
+        for session, info in sessionInventory(self._testPlatform):
+            entry = dict(info, action='kept', error=None, seconds=0)
+            entries.append(entry)
+            if self.matches(info):
+                entry['action'] = 'would remove'
+                selected.append((session, entry))
+
+        self._info('SessionReaper: {} of {} sessions selected'.format(len(selected), len(entries)))
+        if not self._dryRun and len(selected) > 0:
+            work = queue.Queue()
+            for item in selected:
+                work.put(item)
+
+            def worker():
+                while True:
+                    try:
+                        session, entry = work.get_nowait()
+                    except queue.Empty:
+                        return
+                    self._remove(session, entry)
+                    self._info('SessionReaper: Session {} {}: {} in {:.1f}s'.format(
+                        entry['id'], entry['name'], entry['action'], entry['seconds']))
+
+            threads = []
+            for workerNumber in range(min(self._workers, len(selected))):
+                thread = threading.Thread(target=worker)
+                thread.daemon = True
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+
+        return {'sessions': entries,
+                'total': len(entries),
+                'selected': len(selected),
+                'removed': len([entry for entry in entries if entry['action'] == 'removed']),
+                'failed': len([entry for entry in entries if entry['action'] == 'failed']),
+                'dryRun': self._dryRun,
+                'seconds': time.time() - start}
+
+
+def formatIdle(idleSeconds):
+    if idleSeconds is None:
+        return '?'
+    return '{}h{:02d}m'.format(int(idleSeconds // 3600), int(idleSeconds % 3600 // 60))
+
+
+def printReport(report, showKept=False):
+    """Print a report of reap() as a table, and the sessions per user"""
+    print('\n{:>6}  {:30} {:16} {:10} {:>9}  {:14} {:>7}'.format('Id', 'Name', 'User', 'State', 'Idle', 'Action', 'Seconds'))
+    for entry in report['sessions']:
+        if entry['action'] == 'kept' and not showKept:
+            continue
+        print('{:>6}  {:30} {:16} {:10} {:>9}  {:14} {:7.1f}{}'.format(
+            entry['id'], entry['name'][:30], entry['userName'][:16], entry['state'][:10], formatIdle(entry['idleSeconds']),
+            entry['action'], entry['seconds'], '  ' + entry['error'] if entry['error'] else ''))
+
+    users = {}
+    for entry in report['sessions']:
+        counts = users.setdefault(entry['userName'], [0, 0])
+        counts[0] += 1
+        counts[1] += entry['action'] in ('removed', 'would remove')
+    print('\nSessions per user (total / {}):'.format('would remove' if report['dryRun'] else 'removed'))
+    for userName in sorted(users):
+        print('   {:20} {:5} {:5}'.format(userName or '-', users[userName][0], users[userName][1]))
+    print('\n{} sessions, {} selected, {} removed, {} failed in {:.1f}s{}'.format(
+        report['total'], report['selected'], report['removed'], report['failed'], report['seconds'],
+        ' (dry run)' if report['dryRun'] else ''))
+
+
+if __name__ == '__main__':
+    import argparse
+    from uhd_restpy.testplatform.testplatform import TestPlatform
+
+    parser = argparse.ArgumentParser(description='Remove abandoned sessions from an API server')
+    parser.add_argument('apiServerIp')
+    parser.add_argument('username')
+    parser.add_argument('password')
+    parser.add_argument('--port', type=int, default=443)
+    parser.add_argument('--idle-hours', type=float, default=None)
+    parser.add_argument('--user', action='append', default=None, help='May be repeated')
+    parser.add_argument('--name', default=None, help='A regular expression')
+    parser.add_argument('--state', action='append', default=None, help='May be repeated')
+    parser.add_argument('--keep', action='append', default=None, help='A session id to keep. May be repeated')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--remove', action='store_true', help='Without it only report what would be removed')
+    args = parser.parse_args()
+    if args.idle_hours is None and args.user is None and args.name is None and args.state is None:
+        parser.error('Give at least one of --idle-hours, --user, --name or --state')
+
+    try:
+        testPlatform = TestPlatform(args.apiServerIp, rest_port=args.port)
+        testPlatform.Authenticate(args.username, args.password)
+        reaper = SessionReaper(testPlatform, idleSeconds=None if args.idle_hours is None else args.idle_hours * 3600,
+                               userNames=args.user, namePattern=args.name, states=args.state, keepIds=args.keep,
+                               workers=args.workers, dryRun=not args.remove)
+        report = reaper.reap()
+        printReport(report)
+        sys.exit(1 if report['failed'] > 0 else 0)
+
+    except Exception as errMsg:
+        print('\n%s' % traceback.format_exc(None, errMsg))
+        sys.exit(2)
@@ -0,0 +1,239 @@
+"""
+statSnapshot.py
+
+Description
+   A columnar snapshot of a StatViewAssistant view.
+
+   printStat() in the sample scripts looks up every cell with row[columnCaptions.index(col)],
+   copies every row twice and then transposes the whole table.  StatViewSnapshot takes one
+   snapshot of statView.Rows, transposes it once into per-column tuples and parses a numeric
+   column into a typed array the first time it is used.  Columns are then looked up by name
+   in O(1), and filters and aggregates (Tx/Rx Frames sums, loss %) run over whole columns.
+
+   If NumPy is installed the numeric columns are NumPy arrays and filters are vectorized.
+   Without NumPy they are array.array columns and filters use map() over the columns.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - (optional) pip install numpy
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from statSnapshot import StatViewSnapshot
+
+   flowStatistics = StatViewSnapshot(session.StatViewAssistant('Flow Statistics'))
+   port1 = flowStatistics.where(('Tx Port', 'regex', '^Port_1$'), ('Tx Frames', '>', 0))
+   print(flowStatistics.sum('Tx Frames', port1), flowStatistics.lossPercent(mask=port1))
+"""
+
+import re, operator
+from array import array
+from itertools import compress
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+comparators = {'<': operator.lt,
+               '<=': operator.le,
+               '==': operator.eq,
+               '!=': operator.ne,
+               '>': operator.gt,
+               '>=': operator.ge}
+
+
+class StatViewSnapshot(object):
+    """
+    Column store for one sample of a statistic view.
+
+    Parameters
+        statView: A StatViewAssistant object. Its Rows are read once.
+        columnHeaders/rawData: Build the snapshot from already fetched rows instead of a statView.
+    """
+    def __init__(self, statView=None, columnHeaders=None, rawData=None):
+        if statView is not None:
+            rows = statView.Rows
+            columnHeaders = rows.Columns
+            rawData = rows.RawData
+
+        self.columns = list(columnHeaders)
+        self._columnIndex = dict((name, index) for index, name in enumerate(self.columns))
+        if len(rawData) > 0:
+            self._rawColumns = list(zip(*rawData))
+        else:
+            self._rawColumns = [()] * len(self.columns)
+        self._numericColumns = {}
+
+    def __len__(self):
+        return len(self._rawColumns[0]) if len(self._rawColumns) > 0 else 0
+
+    def raw(self, columnName):
+        """The cells of a column as the strings returned by the server"""
+        return self._rawColumns[self._index(columnName)]
+
+    def __getitem__(self, columnName):
+        """A numeric column as a typed array, or the raw strings if the column is not numeric"""
+        column = self.numeric(columnName)
+        if column is None:
+            return self.raw(columnName)
+        return column
+
+    def numeric(self, columnName):
+        """
+        Description
+            Parse a column once into an int64 or float64 array.
+            Empty cells and cells such as 'N/A' become NaN in a float column.
+
+        Return
+            The typed array, or None if no cell of the column is a number.
+        """
+        if columnName not in self._numericColumns:
+            self._numericColumns[columnName] = parseNumbers(self.raw(columnName))
+
+        return self._numericColumns[columnName]
+
+    def where(self, *conditions):
+        """
+        Description
+            Build a row mask where all conditions are true.
+
+        Parameters
+            conditions: (ColumnName, Comparator, Value) tuples.
+                        Comparator is one of <, <=, ==, !=, >, >= or 'regex' (the StatViewAssistant constants).
+
+        Return
+            A boolean NumPy array, or a list of bools without NumPy.
+        """
+        masks = [self._condition(*condition) for condition in conditions]
+        if len(masks) == 0:
+            return numpy.ones(len(self), dtype=bool) if numpy is not None else [True] * len(self)
+
+        mask = masks[0]
+        for each in masks[1:]:
+            if numpy is not None:
+                mask = mask & each
+            else:
+                mask = list(map(operator.and_, mask, each))
+        return mask
+
+    def _condition(self, columnName, comparator, value):
+        if comparator == 'regex':
+            regex = re.compile(value)
+            matches = [regex.search(cell) is not None for cell in self.raw(columnName)]
+            return numpy.array(matches, dtype=bool) if numpy is not None else matches
+
+        compare = comparators[comparator]
+        column = self.numeric(columnName)
+        if column is not None:
+            try:
+                value = float(value)
+            except ValueError:
+                column = None
+
+        if column is None:
+            column = self.raw(columnName)
+            value = str(value)
+
+        if numpy is not None and not isinstance(column, tuple):
+            return compare(column, value)
+
+        matches = list(map(compare, column, [value] * len(column)))
+        return numpy.array(matches, dtype=bool) if numpy is not None else matches
+
+    def filter(self, mask):
+        """Return a new snapshot with only the rows selected by mask"""
+        rawData = list(compress(zip(*self._rawColumns), mask))
+        return StatViewSnapshot(columnHeaders=self.columns, rawData=rawData)
+
+    def sum(self, columnName, mask=None):
+        column = self._selected(columnName, mask)
+        if numpy is not None:
+            return column.sum().item()
+        return sum(column)
+
+    def mean(self, columnName, mask=None):
+        column = self._selected(columnName, mask)
+        if len(column) == 0:
+            return float('nan')
+        return self.sum(columnName, mask) / float(len(column))
+
+    def min(self, columnName, mask=None):
+        return min(self._selected(columnName, mask))
+
+    def max(self, columnName, mask=None):
+        return max(self._selected(columnName, mask))
+
+    def lossPercent(self, txColumn='Tx Frames', rxColumn='Rx Frames', mask=None):
+        """Aggregate frame loss in percent over the selected rows"""
+        txFrames = self.sum(txColumn, mask)
+        if txFrames == 0:
+            return 0.0
+        return (txFrames - self.sum(rxColumn, mask)) * 100.0 / txFrames
+
+    def lossPercentColumn(self, txColumn='Tx Frames', rxColumn='Rx Frames'):
+        """Per row frame loss in percent"""
+        txFrames = self.numeric(txColumn)
+        rxFrames = self.numeric(rxColumn)
+        if numpy is not None:
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                loss = (txFrames - rxFrames) * 100.0 / txFrames
+            return numpy.where(txFrames == 0, 0.0, loss)
+
+        return array('d', map(lambda tx, rx: (tx - rx) * 100.0 / tx if tx else 0.0, txFrames, rxFrames))
+
+    def table(self, transpose=True):
+        """Rows for tabulate. Transposed rows start with the column header"""
+        if transpose:
+            return [(name,) + tuple(column) for name, column in zip(self.columns, self._rawColumns)]
+        return list(zip(*self._rawColumns))
+
+    def _index(self, columnName):
+        try:
+            return self._columnIndex[columnName]
+        except KeyError:
+            raise ValueError('Invalid column name {}, valid values are {}'.format(columnName, ', '.join(self.columns)))
+
+    def _selected(self, columnName, mask):
+        column = self.numeric(columnName)
+        if column is None:
+            raise ValueError('Column {} is not numeric'.format(columnName))
+
+        if mask is None:
+            return column
+        if numpy is not None:
+            return column[mask]
+        return array(column.typecode, compress(column, mask))
+
+
+def parseNumbers(cells):
+    """
+    Description
+        Parse a column of strings into an int64 array, or a float64 array if any cell is
+        a decimal number or not a number.
+
+    Return
+        The typed array (a NumPy array if NumPy is installed) or None if no cell is a number.
+    """
+    try:
+        column = array('q', map(int, cells))
+    except (ValueError, OverflowError):
+        column = array('d', map(toFloat, cells))
+        if len(column) > 0 and all(value != value for value in column):
+            return None
+
+    if numpy is not None:
+        return numpy.frombuffer(column, dtype=numpy.int64 if column.typecode == 'q' else numpy.float64)
+    return column
+
+
+def toFloat(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return float('nan')
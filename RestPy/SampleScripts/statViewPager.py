@@ -0,0 +1,229 @@
+"""
+statViewPager.py
+
+Description
+   Stream a large statistic view one page at a time.
+
+   session.StatViewAssistant('Flow Statistics') loads every row of the view in one snapshot, and
+   printStat() then copies it again.  With per-flow tracking a Flow Statistics view can have
+   hundreds of thousands of rows.  StatViewPager walks the pages of the view's /page node instead
+   and yields fixed-size row batches.
+
+   With Prefetch=True the next page is read on a background thread while the caller processes the
+   current batch.  At most three pages are in memory: the current page, one prefetched page and
+   the page in flight.  Without Prefetch only the current page is.  Row filters use the same
+   AddRowFilter() signature and comparators as StatViewAssistant and are applied while streaming.
+
+   Note: the server pages a live view.  Rows can move between pages while traffic is running, so
+   stream a view after the traffic is stopped when an exact row count matters.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from statViewPager import StatViewPager
+
+   flowStatistics = StatViewPager(uhd, 'Flow Statistics', PageSize=1000)
+   flowStatistics.AddRowFilter('Tx Frames', flowStatistics.GREATER_THAN, 0)
+   for rows in flowStatistics.Batches():
+       ...
+"""
+
+import re, time, threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+from statSnapshot import comparators
+
+
+class StatViewPager(object):
+    REGEX = 'regex'
+    LESS_THAN = '<'
+    LESS_THAN_OR_EQUAL = '<='
+    EQUAL = '=='
+    NOT_EQUAL = '!='
+    GREATER_THAN = '>'
+    GREATER_THAN_OR_EQUAL = '>='
+
+    def __init__(self, uhd, ViewName, PageSize=500, BatchSize=None, Prefetch=True, Timeout=180):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            ViewName: (str): The statistic view caption. Ex: 'Flow Statistics'
+            PageSize: (int): Rows per server page.
+            BatchSize: (int): Rows per yielded batch. Defaults to PageSize.
+            Prefetch: (bool): Read the next page on a background thread.
+            Timeout: (int): Seconds to wait for the view to exist and be ready.
+        """
+        self._uhd = uhd
+        self._viewName = ViewName
+        self._pageSize = PageSize
+        self._batchSize = BatchSize if BatchSize is not None else PageSize
+        self._prefetch = Prefetch
+        self._timeout = Timeout
+        self._pageHref = None
+        self._columnHeaders = None
+        self._filters = []
+
+    @property
+    def ColumnHeaders(self):
+        self._waitForView()
+        return self._columnHeaders
+
+    def AddRowFilter(self, ColumnName, Comparator, FilterValue):
+        """
+        Description
+            Only stream the rows where ColumnName matches FilterValue.
+            Numbers are compared as numbers, anything else as strings.
+
+        Parameters
+            ColumnName: (str): A valid column name for this view.
+            Comparator: (str): REGEX, LESS_THAN, LESS_THAN_OR_EQUAL, EQUAL, NOT_EQUAL, GREATER_THAN or GREATER_THAN_OR_EQUAL.
+            FilterValue: (str|number): The regex or the value to compare with.
+        """
+        if ColumnName not in self.ColumnHeaders:
+            raise ValueError('Invalid column name {}, valid values are {}'.format(ColumnName, ', '.join(self.ColumnHeaders)))
+
+        if Comparator == StatViewPager.REGEX:
+            FilterValue = re.compile(FilterValue)
+        elif Comparator not in comparators:
+            raise ValueError('Invalid comparator {}'.format(Comparator))
+
+        self._filters.append((self.ColumnHeaders.index(ColumnName), Comparator, FilterValue))
+        return self
+
+    def ClearRowFilters(self):
+        self._filters = []
+        return self
+
+    def Rows(self):
+        """A generator of rows, each row is a list of cells"""
+        for batch in self.Batches():
+            for row in batch:
+                yield row
+
+    def Batches(self):
+        """
+        Description
+            A generator of row batches of BatchSize rows. The last batch may be shorter.
+            Only the rows that pass all row filters are yielded.
+        """
+        batch = []
+        for page in self._pages():
+            for row in page:
+                if self._match(row):
+                    batch.append(row)
+                    if len(batch) == self._batchSize:
+                        yield batch
+                        batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+    def _match(self, row):
+        for columnIndex, comparator, filterValue in self._filters:
+            cell = row[columnIndex]
+            if comparator == StatViewPager.REGEX:
+                if filterValue.search(cell) is None:
+                    return False
+                continue
+
+            try:
+                if comparators[comparator](float(cell), float(filterValue)) is False:
+                    return False
+            except ValueError:
+                if comparators[comparator](cell, str(filterValue)) is False:
+                    return False
+        return True
+
+    def _waitForView(self):
+        if self._pageHref is not None:
+            return
+
+        start = time.time()
+        while True:
+            view = self._uhd.Statistics.View.find(Caption='^{}$'.format(self._viewName))
+            if len(view) == 1:
+                pageHref = '{}/page'.format(view.href)
+                page = self._uhd._connection._read(pageHref)
+                if page.get('isReady') is True:
+                    break
+
+            if time.time() - start > self._timeout:
+                raise Exception('After {} seconds the {} view is not ready'.format(self._timeout, self._viewName))
+            time.sleep(2)
+
+        if page.get('pageSize') != self._pageSize:
+            self._uhd._connection._update(pageHref, {'pageSize': self._pageSize})
+        self._columnHeaders = page['columnCaptions']
+        # Set last: a view that timed out is waited for again on the next call
+        self._pageHref = pageHref
+
+    def _readPage(self, pageNumber):
+        self._uhd._connection._update(self._pageHref, {'currentPage': pageNumber})
+        page = self._uhd._connection._read(self._pageHref)
+
+        # Every page value is a list of rows: the row itself plus any drill down sub rows
+        rows = []
+        for rowValues in page.get('pageValues') or []:
+            for row in rowValues:
+                rows.append(row)
+        return rows, page.get('totalPages', 0)
+
+    def _pages(self):
+        self._waitForView()
+        if self._prefetch == False:
+            pageNumber = 1
+            while True:
+                rows, totalPages = self._readPage(pageNumber)
+                yield rows
+                if pageNumber >= totalPages:
+                    return
+                pageNumber += 1
+
+        # One page waits for the consumer.  The reader thread blocks on the page after it, so
+        # at most three pages are in memory: the current page, the prefetched one and the one in flight.
+        pages = queue.Queue(maxsize=1)
+        stop = threading.Event()
+
+        def reader():
+            try:
+                pageNumber = 1
+                while stop.is_set() == False:
+                    rows, totalPages = self._readPage(pageNumber)
+                    pages.put((rows, None))
+                    if pageNumber >= totalPages:
+                        break
+                    pageNumber += 1
+            except Exception as errMsg:
+                pages.put((None, errMsg))
+            pages.put((None, None))
+
+        thread = threading.Thread(target=reader)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                rows, errMsg = pages.get()
+                if errMsg is not None:
+                    raise errMsg
+                if rows is None:
+                    return
+                yield rows
+        finally:
+            # Unblock the reader if the consumer stopped early
+            stop.set()
+            while thread.is_alive():
+                try:
+                    pages.get(timeout=0.1)
+                except queue.Empty:
+                    pass
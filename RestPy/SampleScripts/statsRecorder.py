@@ -0,0 +1,334 @@
+"""
+statsRecorder.py
+
+Description
+   Record a statistic view as a time series for the whole traffic run.
+
+   StatsRecorder samples a view on a background thread at a fixed interval and appends the
+   samples to a compact chunked columnar file.  Integer counters such as Tx/Rx Frames are stored
+   as deltas from the previous sample, other numeric columns as values, and every column of a
+   chunk is zlib compressed.  Memory is bounded by one chunk plus the previous sample: a chunk is
+   written after chunkSamples samples, or before its value cells would exceed chunkCells, 8 bytes
+   each.  The default of 1,000,000 cells is about 8 MB, so a view of 50,000 rows and 20 value
+   columns is written every sample instead of holding 60 samples.
+
+   If a sample takes longer than the interval, the recorder skips the missed ticks instead of
+   queueing them, so it never falls behind the wall clock.  Missed ticks are counted.
+
+   StatsRecording reads a file back one chunk at a time.
+
+File format
+   'UHDSTAT1' | uint32 header length | JSON header {columns, keyColumns, valueColumns, interval, viewName}
+   Then one chunk after another:
+      'CHNK' | uint32 samples | uint32 rows | uint32 keys length | zlib(keys JSON): the key cells of every row
+      float64[samples] timestamps
+      per value column: 1 byte typecode ('q' or 'd') | uint32 length | zlib(column values, sample after sample)
+   The first sample of every chunk holds absolute values so chunks can be read on their own.
+   A new chunk is started whenever the set of rows in the view changes.  A chunk of a view
+   without rows has no keys.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 3
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from statsRecorder import StatsRecorder, StatsRecording
+
+   recorder = StatsRecorder.fromStatView(session.StatViewAssistant('Traffic Item Statistics'), 'trafficItem.stats', interval=1)
+   recorder.start()
+   ...
+   recorder.stop()
+
+   for timestamp, value in StatsRecording('trafficItem.stats').series('Rx Frames', key=('BGP Traffic',)):
+       print(timestamp, value)
+"""
+
+import json, operator, struct, threading, time, zlib
+from array import array
+
+fileMagic = b'UHDSTAT1'
+chunkMagic = b'CHNK'
+
+
+class StatsRecorder(object):
+    def __init__(self, sampleFunction, filename, interval=1, keyColumns=None, chunkSamples=60, chunkCells=1000000,
+                 viewName=''):
+        """
+        Parameters
+            sampleFunction: A function that returns (columnHeaders, rows) for one sample of the view.
+            filename: (str): The file to write.
+            interval: (float): Seconds between samples.
+            keyColumns: (list): The columns that identify a row. Ex: ['Traffic Item'].
+                        Defaults to the columns that are not numbers in the first sample.
+            chunkSamples: (int): Samples per chunk. Bounds the memory used by the recorder.
+            chunkCells: (int): Value cells per chunk, rows x value columns x samples. Bounds the memory
+                        used by the recorder for a large view. A chunk always holds at least one sample.
+            viewName: (str): Saved in the file header.
+        """
+        self._sampleFunction = sampleFunction
+        self._filename = filename
+        self._interval = interval
+        self._keyColumns = keyColumns
+        self._chunkSamples = chunkSamples
+        self._chunkCells = chunkCells
+        self._viewName = viewName
+        self._thread = None
+        self._stop = threading.Event()
+        self._file = None
+        self._error = None
+
+        self.samples = 0
+        self.missedTicks = 0
+        self.sampleTimes = []
+        self.bytesWritten = 0
+
+    @classmethod
+    def fromStatView(cls, statView, filename, **kwargs):
+        """Record a StatViewAssistant. Every sample is one statView.Rows snapshot"""
+        def sample():
+            rows = statView.Rows
+            return rows.Columns, rows.RawData
+
+        kwargs.setdefault('viewName', getattr(statView, '_ViewName', ''))
+        return cls(sample, filename, **kwargs)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling, flush the last chunk and close the file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def _run(self):
+        try:
+            with open(self._filename, 'wb') as self._file:
+                nextTick = time.time()
+                while self._stop.is_set() == False:
+                    start = time.time()
+                    self.record(start, *self._sampleFunction())
+                    self.sampleTimes.append(time.time() - start)
+                    if len(self.sampleTimes) > 3600:
+                        del self.sampleTimes[0:len(self.sampleTimes) - 3600]
+
+                    nextTick += self._interval
+                    now = time.time()
+                    if now > nextTick:
+                        missed = int((now - nextTick) // self._interval) + 1
+                        self.missedTicks += missed
+                        nextTick += missed * self._interval
+                    self._stop.wait(max(nextTick - now, 0))
+
+                self._flush()
+        except Exception as errMsg:
+            self._error = errMsg
+
+    def record(self, timestamp, columnHeaders, rows):
+        """Add one sample. Called by the sampling thread, or directly to record without a thread"""
+        if self._file is None:
+            self._file = open(self._filename, 'wb')
+
+        if not hasattr(self, '_columns'):
+            self._writeHeader(columnHeaders, rows)
+
+        cells = list(zip(*rows)) if len(rows) > 0 else [()] * len(columnHeaders)
+        keys = list(zip(*[cells[index] for index in self._keyIndexes])) if len(rows) > 0 else []
+        sampleCells = len(rows) * len(self._valueIndexes)
+        if keys != self._chunkKeys or len(self._chunkTimes) >= self._chunkSamples or \
+                (len(self._chunkTimes) > 0 and (len(self._chunkTimes) + 1) * sampleCells > self._chunkCells):
+            self._flush()
+            self._chunkKeys = keys
+            self._previous = None
+
+        values = [parseColumn(cells[index]) for index in self._valueIndexes]
+        if self._previous is not None:
+            typecodes = [column.typecode for column in values]
+            if typecodes != [column.typecode for column in self._previous]:
+                # A column changed between int and float. Delta encoding restarts in a new chunk.
+                self._flush()
+                self._previous = None
+
+        for columnIndex, column in enumerate(values):
+            stored = column
+            if self._previous is not None and column.typecode == 'q':
+                stored = array('q', map(operator.sub, column, self._previous[columnIndex]))
+            self._chunkValues[columnIndex].append(stored)
+
+        self._previous = values
+        self._chunkTimes.append(timestamp)
+        self.samples += 1
+
+    def _writeHeader(self, columnHeaders, rows):
+        self._columns = list(columnHeaders)
+        if self._keyColumns is None:
+            firstRow = rows[0] if len(rows) > 0 else [''] * len(self._columns)
+            self._keyColumns = [name for name, cell in zip(self._columns, firstRow) if not isNumber(cell)]
+
+        self._keyIndexes = [self._columns.index(name) for name in self._keyColumns]
+        self._valueColumns = [name for name in self._columns if name not in self._keyColumns]
+        self._valueIndexes = [self._columns.index(name) for name in self._valueColumns]
+        self._chunkKeys = None
+        self._chunkTimes = []
+        self._chunkValues = [[] for name in self._valueColumns]
+        self._previous = None
+
+        header = json.dumps({'columns': self._columns,
+                             'keyColumns': self._keyColumns,
+                             'valueColumns': self._valueColumns,
+                             'interval': self._interval,
+                             'viewName': self._viewName}).encode('utf-8')
+        self._write(fileMagic + struct.pack('<I', len(header)) + header)
+
+    def _flush(self):
+        if not hasattr(self, '_columns') or len(self._chunkTimes) == 0:
+            return
+
+        keys = zlib.compress(json.dumps(self._chunkKeys).encode('utf-8'), 1)
+        data = [chunkMagic, struct.pack('<III', len(self._chunkTimes), len(self._chunkKeys), len(keys)), keys,
+                array('d', self._chunkTimes).tobytes()]
+        for samples in self._chunkValues:
+            typecode = 'q' if all(sample.typecode == 'q' for sample in samples) else 'd'
+            column = array(typecode)
+            for sample in samples:
+                column.extend(sample)
+            compressed = zlib.compress(column.tobytes(), 1)
+            data.append(typecode.encode('ascii') + struct.pack('<I', len(compressed)) + compressed)
+
+        self._write(b''.join(data))
+        self._file.flush()
+        self._chunkTimes = []
+        self._chunkValues = [[] for name in self._valueColumns]
+
+    def _write(self, data):
+        self._file.write(data)
+        self.bytesWritten += len(data)
+
+    def close(self):
+        """Flush and close a recorder that was fed with record() instead of start()"""
+        self._flush()
+        self._file.close()
+
+
+class StatsRecording(object):
+    """Read a file written by StatsRecorder, one chunk at a time"""
+    def __init__(self, filename):
+        self._filename = filename
+        with open(filename, 'rb') as fileObj:
+            self._readHeader(fileObj)
+
+    def _readHeader(self, fileObj):
+        if fileObj.read(len(fileMagic)) != fileMagic:
+            raise ValueError('{} is not a stats recording'.format(self._filename))
+        length = struct.unpack('<I', fileObj.read(4))[0]
+        header = json.loads(fileObj.read(length).decode('utf-8'))
+        self.columns = header['columns']
+        self.keyColumns = header['keyColumns']
+        self.valueColumns = header['valueColumns']
+        self.interval = header['interval']
+        self.viewName = header['viewName']
+
+    def chunks(self):
+        """
+        Description
+            A generator of (timestamps, keys, columns) per chunk, where columns maps every value
+            column name to a list with one list of row values per sample.
+        """
+        with open(self._filename, 'rb') as fileObj:
+            self._readHeader(fileObj)
+            while True:
+                magic = fileObj.read(len(chunkMagic))
+                if len(magic) == 0:
+                    return
+                if magic != chunkMagic:
+                    raise ValueError('{} is corrupted at offset {}'.format(self._filename, fileObj.tell()))
+
+                samples, rows, keysLength = struct.unpack('<III', fileObj.read(12))
+                keys = [tuple(key) for key in json.loads(zlib.decompress(fileObj.read(keysLength)).decode('utf-8'))]
+                timestamps = array('d')
+                timestamps.frombytes(fileObj.read(8 * samples))
+
+                columns = {}
+                for name in self.valueColumns:
+                    typecode = fileObj.read(1).decode('ascii')
+                    length = struct.unpack('<I', fileObj.read(4))[0]
+                    values = array(typecode)
+                    values.frombytes(zlib.decompress(fileObj.read(length)))
+                    perSample = [values[sample * rows:(sample + 1) * rows] for sample in range(samples)]
+                    if typecode == 'q':
+                        # Undo the delta encoding
+                        for sample in range(1, samples):
+                            perSample[sample] = array('q', map(operator.add, perSample[sample - 1], perSample[sample]))
+                    columns[name] = [list(sample) for sample in perSample]
+
+                yield list(timestamps), keys, columns
+
+    def samples(self):
+        """A generator of (timestamp, rows) where rows maps every row key to {column: value}"""
+        for timestamps, keys, columns in self.chunks():
+            for sample, timestamp in enumerate(timestamps):
+                rows = {}
+                for rowIndex, key in enumerate(keys):
+                    rows[key] = dict((name, columns[name][sample][rowIndex]) for name in self.valueColumns)
+                yield timestamp, rows
+
+    def series(self, columnName, key=None):
+        """
+        Description
+            The time series of one column for one row.
+
+        Parameters
+            columnName: (str): A value column. Ex: 'Rx Frames'
+            key: (tuple): The key cells of the row. Ex: ('BGP Traffic',).
+                 Defaults to the first row of the first sample that has rows.
+
+        Return
+            A list of (timestamp, value).
+        """
+        series = []
+        rowKey = None if key is None else tuple(key)
+        for timestamps, keys, columns in self.chunks():
+            if len(keys) == 0:
+                # The view had no rows
+                continue
+            if rowKey is None:
+                rowKey = keys[0]
+            if rowKey not in keys:
+                continue
+            rowIndex = keys.index(rowKey)
+            for sample, timestamp in enumerate(timestamps):
+                series.append((timestamp, columns[columnName][sample][rowIndex]))
+        return series
+
+
+def isNumber(cell):
+    try:
+        float(cell)
+        return True
+    except ValueError:
+        return False
+
+
+def parseColumn(cells):
+    try:
+        return array('q', map(int, cells))
+    except (ValueError, OverflowError):
+        return array('d', map(toFloat, cells))
+
+
+def toFloat(cell):
+    try:
+        return float(cell)
+    except ValueError:
+        return float('nan')
@@ -0,0 +1,233 @@
+"""
+templateCache.py
+
+Description
+   A process-wide cache of the traffic protocol templates and of the field names of every template.
+
+   The protocol templates (uhd.Traffic.ProtocolTemplate) and the fields of each template, such as
+   'Destination MAC Address', 'UDP-Source-Port' or 'Default PHB', are fixed for a server build.
+   TemplateCache reads them once per build number and resolves every later lookup locally.
+
+   The cache is keyed by uhd.Globals.BuildNumber.  It can be saved to a JSON file, so the next
+   script run against the same build reads nothing from the server.  A file written for another
+   build is ignored and replaced.  Template hrefs are stored relative to the ixnetwork root and
+   resolved against the session of the caller.
+
+   Warm up the cache file once per build:
+      python templateCache.py <uhdIp> [username] [password] [cacheFile]
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from templateCache import getTemplateCache
+
+   templateCache = getTemplateCache(uhd, filename=defaultCacheFile)
+   ipv4Template = templateCache.template(uhd, 'IPv4')
+   fieldAliases = templateCache.fieldAliases(uhd, ['IPv4', 'UDP'])
+"""
+
+import os, re, sys, json, threading
+
+from batchSelect import select, selectUrl, rootHref
+from attributeCache import getAttributeCache
+
+defaultCacheFile = os.path.join(os.path.expanduser('~'), '.uhdTemplateCache.json')
+
+_lock = threading.RLock()
+# {buildNumber: TemplateCache}
+_caches = {}
+
+
+def getBuildNumber(uhd):
+    """The build number of the session's server, read once per session (see attributeCache.py)"""
+    return getAttributeCache(uhd).get('{}/globals'.format(rootHref(uhd.href)), 'buildNumber')
+
+
+def getTemplateCache(uhd, filename=None):
+    """
+    Description
+        Get the process-wide TemplateCache of the session's server build.
+
+    Parameters
+        uhd: The session.Ixnetwork object.
+        filename: (str): Load the cache from this JSON file and save it there. None keeps it in memory only.
+    """
+    buildNumber = getBuildNumber(uhd)
+    with _lock:
+        cache = _caches.get(buildNumber)
+        if cache is None:
+            cache = TemplateCache(buildNumber, filename)
+            _caches[buildNumber] = cache
+        elif filename is not None and cache.filename is None:
+            cache.filename = filename
+            cache.save()
+        return cache
+
+
+class TemplateCache(object):
+    def __init__(self, buildNumber, filename=None):
+        """
+        Parameters
+            buildNumber: (str): The server build the cache is valid for.
+            filename: (str): The JSON file to load from and save to.
+        """
+        self.buildNumber = buildNumber
+        self.filename = filename
+        # {displayName: {'path': 'traffic/protocolTemplate/{id}', 'stackTypeId': str}}
+        self._templates = None
+        # {templateDisplayName: {fieldDisplayName or fieldTypeId: fieldAlias}}
+        self._fields = {}
+        self._lock = threading.RLock()
+        self.load()
+
+    def load(self):
+        """Load the file if it was written for the same build"""
+        if self.filename is None or not os.path.exists(self.filename):
+            return False
+        try:
+            with open(self.filename) as cacheFile:
+                data = json.load(cacheFile)
+        except ValueError:
+            return False
+
+        if data.get('buildNumber') != self.buildNumber:
+            return False
+        with self._lock:
+            self._templates = data.get('templates')
+            self._fields = data.get('fields', {})
+        return True
+
+    def save(self):
+        if self.filename is None or self._templates is None:
+            return
+        with self._lock:
+            data = {'buildNumber': self.buildNumber, 'templates': self._templates, 'fields': self._fields}
+            # Write a temporary file first so a concurrent reader never sees half a file
+            temporaryFile = '{}.{}.tmp'.format(self.filename, os.getpid())
+            with open(temporaryFile, 'w') as cacheFile:
+                json.dump(data, cacheFile)
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(temporaryFile, self.filename)
+
+    def _getTemplates(self, uhd):
+        with self._lock:
+            if self._templates is None:
+                root = rootHref(uhd.href)
+                response = select(uhd, '{}/traffic'.format(root),
+                                  children=[{'child': '^protocolTemplate$', 'properties': ['displayName', 'stackTypeId'], 'filters': []}])
+                self._templates = {}
+                for template in response.get('protocolTemplate', []):
+                    self._templates[template['displayName']] = {'path': template['href'][len(root) + 1:],
+                                                                'stackTypeId': template['stackTypeId']}
+                self.save()
+            return self._templates
+
+    def templateNames(self, uhd):
+        """The DisplayName of every protocol template"""
+        return sorted(self._getTemplates(uhd).keys())
+
+    def template(self, uhd, displayName):
+        """
+        Description
+            Look up a protocol template by DisplayName. An exact match is preferred,
+            otherwise the DisplayName must start with displayName.
+
+        Return
+            {'href', 'displayName', 'stackTypeId'} with the href in the session of uhd.
+        """
+        templates = self._getTemplates(uhd)
+        if displayName not in templates:
+            matches = [name for name in templates if name.startswith(displayName)]
+            if len(matches) == 0:
+                raise ValueError('{} protocol template not supported. Supported protocol templates: {}'.format(
+                    displayName, '|'.join(sorted(templates))))
+            displayName = sorted(matches, key=len)[0]
+
+        template = templates[displayName]
+        return {'href': '{}/{}'.format(rootHref(uhd.href), template['path']),
+                'displayName': displayName,
+                'stackTypeId': template['stackTypeId']}
+
+    def fieldAliases(self, uhd, templateDisplayNames):
+        """
+        Description
+            Get the field aliases of protocol templates, reading all templates that are not
+            cached yet with one select.
+
+        Return
+            {templateDisplayName: {fieldDisplayName or fieldTypeId: fieldAlias}}
+            Ex: {'IPv4': {'Source Address': 'ipv4.header.srcIp-27', 'ipv4.header.srcIp': 'ipv4.header.srcIp-27', ...}}
+        """
+        templates = [self.template(uhd, name) for name in templateDisplayNames]
+        with self._lock:
+            missing = []
+            for template in templates:
+                if template['displayName'] not in self._fields and template not in missing:
+                    missing.append(template)
+
+            if len(missing) > 0:
+                selects = [{'from': template['href'], 'properties': [],
+                            'children': [{'child': '^field$', 'properties': ['displayName', 'fieldTypeId'], 'filters': []}],
+                            'inlines': []} for template in missing]
+                response = uhd._connection._execute(selectUrl(uhd.href, xpath=True), {'selects': selects})
+                for template, node in zip(missing, response):
+                    self._fields[template['displayName']] = self._aliases(node.get('field', []))
+                self.save()
+
+            return dict((name, self._fields[template['displayName']]) for name, template in zip(templateDisplayNames, templates))
+
+    def _aliases(self, fields):
+        aliases = {}
+        for field in fields:
+            alias = re.search(r"field\[@alias = '([^']+)'\]$", field['xpath']).group(1)
+            aliases[field['displayName']] = alias
+            aliases[field['fieldTypeId']] = alias
+        return aliases
+
+    def warmUp(self, uhd):
+        """
+        Description
+            Read every protocol template and all their fields with one select and save the cache.
+        """
+        root = rootHref(uhd.href)
+        response = select(uhd, '{}/traffic'.format(root), xpath=True,
+                          children=[{'child': '^protocolTemplate$', 'properties': ['displayName', 'stackTypeId'], 'filters': []},
+                                    {'child': '^field$', 'properties': ['displayName', 'fieldTypeId'], 'filters': []}])
+        with self._lock:
+            self._templates = {}
+            self._fields = {}
+            for template in response.get('protocolTemplate', []):
+                self._templates[template['displayName']] = {'path': template['href'][len(root) + 1:],
+                                                            'stackTypeId': template['stackTypeId']}
+                self._fields[template['displayName']] = self._aliases(template.get('field', []))
+            self.save()
+        return self
+
+
+if __name__ == '__main__':
+    from uhd_restpy import SessionAssistant
+
+    if len(sys.argv) < 2:
+        sys.exit('Usage: python templateCache.py <uhdIp> [username] [password] [cacheFile]')
+
+    uhdIp = sys.argv[1]
+    username = sys.argv[2] if len(sys.argv) > 2 else 'admin'
+    password = sys.argv[3] if len(sys.argv) > 3 else 'admin'
+    cacheFile = sys.argv[4] if len(sys.argv) > 4 else defaultCacheFile
+
+    session = SessionAssistant(IpAddress=uhdIp, RestPort=None, UserName=username, Password=password,
+                               SessionName='templateCache', ClearConfig=True, LogLevel='info')
+    try:
+        uhd = session.Ixnetwork
+        cache = getTemplateCache(uhd, filename=cacheFile).warmUp(uhd)
+        uhd.info('Cached {} protocol templates of build {} in {}'.format(len(cache.templateNames(uhd)), cache.buildNumber, cacheFile))
+    finally:
+        session.Session.remove()
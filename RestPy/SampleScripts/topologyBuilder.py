@@ -0,0 +1,240 @@
+"""
+topologyBuilder.py
+
+Description
+   Build many NGPF topologies from a compact spec with a constant number of requests.
+
+   bgpNgpf.py builds every topology with a chain of calls: Topology.add, DeviceGroup.add,
+   Ethernet.add, Mac.Increment, EnableVlans.Single, Vlan.find, Ipv4.add, BgpIpv4Peer.add,
+   NetworkGroup.add, Ipv4PrefixPools.add and more.  Each call is at least one request, about 25
+   per topology, so 256 BGP topologies take thousands of requests.
+
+   TopologyBuilder turns a spec into the JSON config format of loadJsonConfigFile.py: nodes with an
+   xpath, and multivalues inlined with their singleValue, counter or valueList pattern.  It reads
+   the vports and the number of existing topologies with one select, and imports the topologies
+   with one resourceManager importConfig per 'batchSize' topologies.
+
+   The spec is a dict, or a JSON or YAML file (YAML needs pip install pyyaml):
+      - A node is a dict.  A dict or a list of dicts under a key is a child node of that type,
+        such as 'deviceGroup', 'ethernet', 'ipv4' or 'bgpIpv4Peer'.  Other keys are attributes.
+      - 'count' repeats a node, such as 256 topologies.
+      - The attributes in scalarAttributes, such as name and multiplier, are set as they are.
+        All others are multivalues:
+           value                                   singleValue
+           {'start': x, 'step': y}                 counter, 'direction' defaults to increment
+           {'values': [...]}                       valueList
+      - Strings are formatted with {t}, the topology number from 1, and {d}, the device group
+        number in its topology from 1.  A counter 'start' moves by 'topologyStep' per topology and
+        'deviceGroupStep' per device group, for integers, IPv4, IPv6 and MAC addresses.
+      - 'ports' of a topology are vport names.
+      - 'connectedTo' of a node is the type of the node it is stacked on in the same device group.
+        Prefix pools are connected to the last protocol of the device group by default.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from topologyBuilder import TopologyBuilder
+
+   spec = {'topology': {'count': 256, 'name': 'Topo{t}', 'ports': ['Port_{t}'],
+           'deviceGroup': {'name': 'DG{t}', 'multiplier': 1,
+               'ethernet': {'mac': {'start': '00:01:01:00:00:01', 'step': '00:00:00:00:00:01', 'topologyStep': '00:00:00:01:00:00'},
+                   'ipv4': {'address': {'start': '1.1.0.1', 'step': '0.0.0.1', 'topologyStep': '0.0.1.0'},
+                            'gatewayIp': {'start': '1.1.0.2', 'step': '0.0.0.0', 'topologyStep': '0.0.1.0'},
+                            'bgpIpv4Peer': {'type': 'internal', 'localAs2Bytes': 101}}},
+               'networkGroup': {'name': 'BGP-Routes{t}', 'multiplier': 100,
+                                'ipv4PrefixPools': {'numberOfAddresses': 1, 'prefixLength': 32,
+                                                    'networkAddress': {'start': '10.0.0.1', 'step': '0.0.0.1', 'topologyStep': '0.1.0.0'}}}}}}
+   result = TopologyBuilder(uhd).build(spec)
+"""
+
+import json, time
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+from batchSelect import select, importConfig, stringTypes
+from multivaluePattern import addStep
+
+# The attributes that are plain values, not multivalues
+scalarAttributes = set(['name', 'multiplier', 'vlanCount', 'numberOfAddresses', 'ports', 'note', 'description',
+                        'stackedLayers', 'addrStepSupported'])
+
+# The keys of a multivalue pattern in a spec
+patternKeys = set(['start', 'step', 'direction', 'topologyStep', 'deviceGroupStep', 'values'])
+
+# Prefix pools are connected to the last protocol of their device group by default
+prefixPoolTypes = set(['ipv4PrefixPools', 'ipv6PrefixPools'])
+
+# The node types that are not protocols a node can be connected to
+notStackedTypes = set(['deviceGroup', 'networkGroup', 'vlan', 'bgpIPRouteProperty', 'bgpV6IPRouteProperty']) | prefixPoolTypes
+
+
+def loadSpec(filename):
+    """Read a spec from a JSON or YAML file"""
+    with open(filename) as specFile:
+        if filename.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise ImportError('Reading {} needs PyYAML: pip install pyyaml'.format(filename))
+            return yaml.safe_load(specFile)
+        return json.load(specFile)
+
+
+def _valueString(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class _Build(object):
+    """The state of one buildConfig call"""
+    def __init__(self, vportXpaths):
+        self.vportXpaths = vportXpaths
+        self.nodes = 0
+        self.xpaths = {}
+
+    def format(self, value, indexes):
+        if isinstance(value, stringTypes):
+            return value.format(**indexes)
+        return value
+
+    def multivalue(self, owner, attribute, value, indexes):
+        xpath = "/multivalue[@source = '{} {}']".format(owner, attribute)
+        self.nodes += 1
+        if isinstance(value, dict) and 'values' in value:
+            return {'xpath': xpath, 'valueList': {'xpath': xpath + '/valueList',
+                                                  'values': [_valueString(self.format(each, indexes)) for each in value['values']]}}
+        if isinstance(value, dict):
+            start = self.format(value['start'], indexes)
+            start = addStep(start, value.get('topologyStep'), indexes['t'] - 1)
+            start = addStep(start, value.get('deviceGroupStep'), indexes['d'] - 1)
+            return {'xpath': xpath, 'counter': {'xpath': xpath + '/counter', 'start': _valueString(start),
+                                                'step': _valueString(value.get('step', 0)),
+                                                'direction': value.get('direction', 'increment')}}
+        return {'xpath': xpath, 'singleValue': {'xpath': xpath + '/singleValue',
+                                                'value': _valueString(self.format(value, indexes))}}
+
+    def node(self, nodeType, spec, xpath, indexes, stack):
+        """Return the config of one node. stack lists the (type, xpath) of the protocols of the device group"""
+        self.nodes += 1
+        self.xpaths.setdefault(nodeType, []).append(xpath)
+        config = {'xpath': xpath}
+        children = []
+        for key, value in spec.items():
+            if key == 'count':
+                continue
+            if key == 'ports':
+                config['ports'] = [self.vportXpaths[self.format(name, indexes)] for name in value]
+            elif key == 'connectedTo':
+                continue
+            elif isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict) or \
+                    isinstance(value, dict) and not (len(value) > 0 and set(value) <= patternKeys):
+                children.append((key, value if isinstance(value, list) else [value]))
+            elif key in scalarAttributes:
+                config[key] = self.format(value, indexes)
+            else:
+                config[key] = self.multivalue(xpath, key, value, indexes)
+
+        connectedTo = spec.get('connectedTo')
+        if connectedTo is None and nodeType in prefixPoolTypes and len(stack) > 0:
+            connectedTo = stack[-1][0]
+        if connectedTo is not None:
+            targets = [targetXpath for targetType, targetXpath in stack if targetType == connectedTo]
+            if len(targets) == 0:
+                raise ValueError('{}: No {} to connect to in its device group'.format(xpath, connectedTo))
+            config['connector'] = {'xpath': xpath + '/connector', 'connectedTo': targets[-1]}
+
+        # Protocol stacks first, so that network groups can connect to them
+        children.sort(key=lambda child: child[0] == 'networkGroup')
+        for childType, childSpecs in children:
+            config[childType] = []
+            for childSpec in childSpecs:
+                for repeat in range(childSpec.get('count', 1)):
+                    childIndexes = dict(indexes)
+                    if childType == 'deviceGroup':
+                        childIndexes['d'] = len(config[childType]) + 1
+                        childStack = []
+                    else:
+                        childStack = stack
+                    childXpath = '{}/{}[{}]'.format(xpath, childType, len(config[childType]) + 1)
+                    if childType not in notStackedTypes:
+                        stack.append((childType, childXpath))
+                    config[childType].append(self.node(childType, childSpec, childXpath, childIndexes, childStack))
+        return config
+
+
+def buildConfig(spec, vportXpaths, topologyOffset=0):
+    """
+    Description
+        Turn a spec into JSON config topology nodes, without any request.
+
+    Parameters
+        spec: (dict): {'topology': a node spec or a list of node specs}.
+        vportXpaths: (dict): {vport name: vport xpath}.
+        topologyOffset: (int): The number of topologies already in the config.
+
+    Return
+        (topologies, build): The list of topology configs, and the build state with the
+        node count and the xpaths of every node type.
+    """
+    build = _Build(vportXpaths)
+    topologySpecs = spec['topology'] if isinstance(spec['topology'], list) else [spec['topology']]
+    topologies = []
+    for topologySpec in topologySpecs:
+        for repeat in range(topologySpec.get('count', 1)):
+            number = len(topologies) + 1
+            xpath = '/topology[{}]'.format(topologyOffset + number)
+            topologies.append(build.node('topology', topologySpec, xpath, {'t': number, 'd': 1}, []))
+    return topologies, build
+
+
+class TopologyBuilder(object):
+    def __init__(self, uhd, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._logger = logger if logger is not None else uhd
+
+    def build(self, spec, batchSize=None):
+        """
+        Description
+            Create the topologies of a spec after the existing ones.
+
+        Parameters
+            spec: (dict|str): A spec, or a JSON or YAML spec file.
+            batchSize: (int): Topologies per importConfig. None imports all of them at once.
+
+        Return
+            {'topologies': int, 'nodes': int, 'requests': int, 'seconds': float,
+             'xpaths': {nodeType: [xpath, ...]}}
+        """
+        start = time.time()
+        if isinstance(spec, stringTypes):
+            spec = loadSpec(spec)
+
+        response = select(self._uhd, children=[{'child': '^(vport|topology)$', 'properties': ['name'], 'filters': []}], xpath=True)
+        vportXpaths = dict((vport['name'], vport['xpath']) for vport in response.get('vport', []))
+        topologies, build = buildConfig(spec, vportXpaths, topologyOffset=len(response.get('topology', [])))
+
+        batchSize = batchSize or len(topologies) or 1
+        requests = 1
+        for index in range(0, len(topologies), batchSize):
+            importConfig(self._uhd, topologies[index:index + batchSize])
+            requests += 1
+
+        seconds = time.time() - start
+        self._logger.info('TopologyBuilder: Created {} topologies, {} nodes with {} requests in {:.2f}s'.format(
+            len(topologies), build.nodes, requests, seconds))
+        return {'topologies': len(topologies), 'nodes': build.nodes, 'requests': requests,
+                'seconds': seconds, 'xpaths': build.xpaths}
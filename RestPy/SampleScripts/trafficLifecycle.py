@@ -0,0 +1,228 @@
+"""
+trafficLifecycle.py
+
+Description
+   Generate only the traffic items that changed, apply once and time every traffic phase.
+
+   The samples run trafficItem.Generate(), Traffic.Apply() and StartStatelessTrafficBlocking()
+   in sequence, for TrafficItem.find()[0] only.  With hundreds of traffic items, a test that
+   changes a few of them between iterations and regenerates all of them spends minutes per
+   iteration in Generate.
+
+   TrafficLifecycle reads the configuration of every traffic item with one select and keeps a
+   fingerprint of each one: its properties and the properties of its endpoint sets, config
+   elements, frame size and rate, transmission control, packet headers and tracking.  A traffic
+   item is dirty when it was never generated by this TrafficLifecycle, when its fingerprint
+   changed since it was generated, or when it was marked dirty with markDirty().  run():
+      - Generates the dirty traffic items with one generate request.
+      - Applies the traffic once, when something was generated or the traffic is unapplied.
+      - Starts all enabled traffic items with one startStatelessTrafficBlocking request.
+      - Waits until every started traffic item receives its first packet.
+   and returns the seconds of each phase.
+
+   The first run generates every traffic item.  After loading a config with traffic that is
+   already generated, markClean() takes the fingerprints without generating.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from trafficLifecycle import TrafficLifecycle
+
+   traffic = TrafficLifecycle(uhd)
+   timings = traffic.run()
+   ... change some traffic items ...
+   timings = traffic.run()
+   print(timings['generated'], timings['generate'], timings['apply'], timings['start'], timings['firstPacket'])
+"""
+
+import json, time, hashlib
+
+from batchSelect import select, childRegex
+from statViewPager import StatViewPager
+
+# The children of a traffic item that are part of its fingerprint
+fingerprintChildren = ['endpointSet', 'configElement', 'frameRate', 'frameRateDistribution', 'frameSize',
+                       'framePayload', 'transmissionControl', 'transmissionDistribution', 'stack', 'field',
+                       'tracking', 'egressTracking']
+
+# The properties that change without a configuration change, left out of the fingerprint
+volatileProperties = set(['href', 'state', 'errors', 'warnings'])
+
+
+def _fingerprint(node):
+    content = dict((key, value) for key, value in node.items() if key not in volatileProperties)
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def trafficItemRxFrames(statView):
+    """Return {traffic item name: Rx Frames} from a StatViewPager of the Traffic Item Statistics view"""
+    nameColumn = statView.ColumnHeaders.index('Traffic Item')
+    rxColumn = statView.ColumnHeaders.index('Rx Frames')
+    rxFrames = {}
+    for row in statView.Rows():
+        try:
+            rxFrames[row[nameColumn]] = int(float(row[rxColumn]))
+        except ValueError:
+            rxFrames[row[nameColumn]] = 0
+    return rxFrames
+
+
+class TrafficLifecycle(object):
+    def __init__(self, uhd, pollInterval=1, statsReader=None, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            pollInterval: (int): Seconds between reads of the statistics while waiting for the first packets.
+            statsReader: A function() that returns {traffic item name: Rx Frames}.
+                         Defaults to reading the Traffic Item Statistics view.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._pollInterval = pollInterval
+        self._statsReader = statsReader
+        self._logger = logger if logger is not None else uhd
+        self._trafficHref = '{}/traffic'.format(uhd.href)
+        # {traffic item href: fingerprint when it was last generated}
+        self._generated = {}
+        self._dirty = set()
+
+    def _read(self):
+        """Return (traffic state, [traffic items with their fingerprint]) with one select"""
+        children = [{'child': '^trafficItem$', 'properties': ['*'], 'filters': []},
+                    {'child': childRegex(fingerprintChildren), 'properties': ['*'], 'filters': []}]
+        response = select(self._uhd, fromHref=self._trafficHref, properties=['state'], children=children)
+        trafficItems = response.get('trafficItem', [])
+        for trafficItem in trafficItems:
+            trafficItem['fingerprint'] = _fingerprint(trafficItem)
+        return response.get('state'), trafficItems
+
+    def markDirty(self, *trafficItems):
+        """Generate these traffic items on the next run. Each one is a name, an href or a TrafficItem object"""
+        for trafficItem in trafficItems:
+            self._dirty.add(getattr(trafficItem, 'href', trafficItem))
+
+    def markClean(self):
+        """Take the current traffic items as generated, such as after loading a config with generated traffic"""
+        state, trafficItems = self._read()
+        for trafficItem in trafficItems:
+            self._generated[trafficItem['href']] = trafficItem['fingerprint']
+        self._dirty.clear()
+
+    def dirtyItems(self, trafficItems=None):
+        """Return the enabled traffic items to generate, from one select unless trafficItems is given"""
+        if trafficItems is None:
+            state, trafficItems = self._read()
+        return [trafficItem for trafficItem in trafficItems if trafficItem.get('enabled', True) and
+                (trafficItem['href'] in self._dirty or trafficItem.get('name') in self._dirty or
+                 self._generated.get(trafficItem['href']) != trafficItem['fingerprint'])]
+
+    def generate(self, dirtyItems):
+        """Generate the traffic items with one request, and record their fingerprints"""
+        if len(dirtyItems) == 0:
+            return
+        hrefs = [trafficItem['href'] for trafficItem in dirtyItems]
+        self._uhd._connection._execute('{}/trafficItem/operations/generate'.format(self._trafficHref), {'arg1': hrefs})
+
+        # Generate can change a traffic item, so the fingerprints are taken after it
+        state, trafficItems = self._read()
+        errors = []
+        for trafficItem in trafficItems:
+            if trafficItem['href'] not in hrefs:
+                continue
+            if trafficItem.get('errors'):
+                errors.append('{}: {}'.format(trafficItem.get('name'), ', '.join(trafficItem['errors'])))
+                continue
+            self._generated[trafficItem['href']] = trafficItem['fingerprint']
+            self._dirty.discard(trafficItem['href'])
+            self._dirty.discard(trafficItem.get('name'))
+        if len(errors) > 0:
+            raise Exception('TrafficLifecycle: Generate failed: {}'.format('; '.join(errors)))
+
+    def _readRxFrames(self):
+        if self._statsReader is None:
+            statView = StatViewPager(self._uhd, 'Traffic Item Statistics', Prefetch=False)
+            self._statsReader = lambda: trafficItemRxFrames(statView)
+        return self._statsReader()
+
+    def waitForFirstPacket(self, names, timeout=60):
+        """
+        Description
+            Wait until every traffic item receives at least one frame.
+
+        Return
+            {traffic item name: seconds until its first frame}. The traffic items without a frame
+            by the timeout are left out.
+        """
+        start = time.time()
+        firstPackets = {}
+        while True:
+            rxFrames = self._readRxFrames()
+            now = time.time() - start
+            for name in names:
+                if name not in firstPackets and rxFrames.get(name, 0) > 0:
+                    firstPackets[name] = now
+            if len(firstPackets) == len(names):
+                return firstPackets
+            if now > timeout:
+                self._logger.info('TrafficLifecycle: No packet after {} seconds: {}'.format(
+                    timeout, ', '.join(name for name in names if name not in firstPackets)))
+                return firstPackets
+            time.sleep(self._pollInterval)
+
+    def run(self, start=True, waitFirstPacket=True, firstPacketTimeout=60):
+        """
+        Description
+            Generate the dirty traffic items, apply, start the traffic and wait for the first packets.
+
+        Parameters
+            start: (bool): Start the traffic. False stops after apply.
+            waitFirstPacket: (bool): Wait until every started traffic item receives a frame.
+            firstPacketTimeout: (int): Seconds to wait for the first packets.
+
+        Return
+            {'generated': [traffic item names], 'trafficItems': int,
+             'generate', 'apply', 'start', 'firstPacket', 'total': seconds,
+             'firstPackets': {traffic item name: seconds from the start until its first frame}}
+            The seconds of a phase that did not run are 0.
+        """
+        timings = {'generated': [], 'generate': 0, 'apply': 0, 'start': 0, 'firstPacket': 0, 'firstPackets': {}}
+        started = time.time()
+        state, trafficItems = self._read()
+        enabledItems = [trafficItem for trafficItem in trafficItems if trafficItem.get('enabled', True)]
+        timings['trafficItems'] = len(enabledItems)
+
+        dirtyItems = self.dirtyItems(trafficItems)
+        phaseStart = time.time()
+        self.generate(dirtyItems)
+        timings['generated'] = [trafficItem.get('name') for trafficItem in dirtyItems]
+        timings['generate'] = time.time() - phaseStart
+
+        if len(dirtyItems) > 0 or state == 'unapplied':
+            phaseStart = time.time()
+            self._uhd._connection._execute('{}/operations/apply'.format(self._trafficHref), {'arg1': self._trafficHref})
+            timings['apply'] = time.time() - phaseStart
+
+        if start and len(enabledItems) > 0:
+            phaseStart = time.time()
+            self._uhd._connection._execute('{}/trafficItem/operations/startstatelesstrafficblocking'.format(self._trafficHref),
+                                           {'arg1': [trafficItem['href'] for trafficItem in enabledItems]})
+            timings['start'] = time.time() - phaseStart
+
+            if waitFirstPacket:
+                phaseStart = time.time()
+                timings['firstPackets'] = self.waitForFirstPacket([trafficItem.get('name') for trafficItem in enabledItems],
+                                                                  timeout=firstPacketTimeout)
+                timings['firstPacket'] = time.time() - phaseStart
+
+        timings['total'] = time.time() - started
+        self._logger.info('TrafficLifecycle: Generated {} of {} traffic items in {:.2f}s, apply {:.2f}s, start {:.2f}s, '
+                          'first packet {:.2f}s'.format(len(dirtyItems), len(enabledItems), timings['generate'],
+                                                        timings['apply'], timings['start'], timings['firstPacket']))
+        return timings
@@ -2,10 +2,11 @@
 Description
    Verify IPv4 and IPv6 ARP.
 
-   If there is any ARP failure, create a list with all the ip addresses that failed ARP and 
-   insert the ipv4/ipv6 obj as the first element in the list.
+   If there is any ARP failure, create a list with one entry per ipv4/ipv6 stack that failed ARP,
+   holding the stack href, its topology/device group/ethernet names and all the ip addresses that failed.
 
-   This code will loop through all created topologies, device groups that are started/enabled, ethernet, for ipv4 and ipv6.
+   This code reads all created topologies, device groups that are started/enabled, ethernet, ipv4 and ipv6
+   in one batched request (see arpVerification.py) instead of looping through every object.
 
 Requirements:
    - Minimum UHD 1.0
@@ -26,6 +27,7 @@ import os, sys, time, traceback
 from uhd_restpy.testplatform.testplatform import TestPlatform
 from uhd_restpy.files import Files
 from uhd_restpy.assistants.statistics.statviewassistant import StatViewAssistant
+from arpVerification import getArpFailures, printArpFailures
 
 uhdIp = '10.36.78.190'
 sessionId = 17
@@ -43,44 +45,10 @@ try:
 
     uhd = session.Ixnetwork
     
-    arpFailedList = []
-    for topology in uhd.Topology.find():
-        for deviceGroup in topology.DeviceGroup.find():
-            # Verify if the device group is enabled/started
-            if deviceGroup.Status == 'started':
-                for ethernet in deviceGroup.Ethernet.find(): 
+    # One select for every ipv4/ipv6 SessionInfo plus one request per ip stack that has failures.
+    arpFailedList = getArpFailures(uhd, stacks=['ipv4', 'ipv6'])
+    printArpFailures(arpFailedList)
 
-                    ipv4Obj = ethernet.Ipv4.find()
-                    if ipv4Obj:
-                        currentIpObjList = []
-                        # Get the index of the arp failure
-                        for index, arpFailed in enumerate(ipv4Obj.SessionInfo):
-                            if arpFailed == 'resolveMacFailed':
-                                # With the index, get the IP address
-                                currentIpObjList.append(ipv4Obj.Address.Values[index])
-
-                        if len(currentIpObjList) > 0:
-                            currentIpObjList.insert(0, ipv4Obj)
-                            arpFailedList.append(currentIpObjList)
-
-                    ipv6Obj = ethernet.Ipv6.find()
-                    if ipv6Obj:
-                        currentIpObjList = []
-                        # Get the index of the arp failure
-                        for index, arpFailed in enumerate(ipv6Obj.SessionInfo):
-                            if arpFailed == 'resolveMacFailed':
-                                # With the index, get the IP address
-                                currentIpObjList.append(ipv6Obj.Address.Values[index])
-
-                        if len(currentIpObjList) > 0:
-                            currentIpObjList.insert(0, ipv6Obj)
-                            arpFailedList.append(currentIpObjList)
-
-    if arpFailedList != []:
-        print('\nARP failures:')
-        for eachFailure in arpFailedList:
-            print('\t', eachFailure)
-    
     print('Done')
 
 except Exception as errMsg:
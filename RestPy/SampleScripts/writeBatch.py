@@ -0,0 +1,263 @@
+"""
+writeBatch.py
+
+Description
+   Record attribute writes and adds locally and send them as one importConfig.
+
+   Every restpy attribute assignment, such as configElement.FrameSize.FixedSize = 128 or
+   field.ValueType = 'increment', is its own PATCH.  Configuring the fields of a raw traffic item
+   takes a request per attribute of every field, thousands for a thousand fields.
+
+   Inside a WriteBatch, the attribute writes and add() calls made through batch.node() are only
+   recorded, with the file and line that made them.  When the batch ends they are sent as:
+      - One select that reads the xpath of every node written to, and the number of children of
+        the nodes that children are added to.
+      - One resourceManager importConfig with all the writes and adds, in the order they were made.
+   Restpy objects, added nodes and REST hrefs used as values, such as the Sources of an endpoint
+   set, are sent as their xpath.
+
+   If the importConfig fails, the writes whose xpath is in the error are reported with the line
+   that made them.  If the error names no xpath, every write of the batch is reported.  Nothing is
+   sent again to find the failing write, so a failed batch adds no writes of its own to the server.
+   WriteBatchError lists the failures.  A batch left with an exception is discarded.
+
+   Note: Reads in the batch see the server as it was before the batch.  add() returns a node that
+   can be written to and used as a value, but it has no href until the batch is flushed.
+
+Requirements:
+   - Minimum UHD 1.0
+   - Python 2.7 and 3+
+   - pip install requests
+   - pip install ixnetwork_restpy (minimum version 1.0.54)
+
+RestPy Doc:
+    https://www.openixia.github.io/ixnetwork_restpy
+
+Usage:
+   from writeBatch import WriteBatch
+
+   with WriteBatch(uhd) as batch:
+       configElementNode = batch.node(configElement)
+       configElementNode.child('FrameRate').update(Type='percentLineRate', Rate=50)
+       configElementNode.child('FrameSize').FixedSize = 128
+       for field in fields:
+           batch.node(field).update(ValueType='increment', StartValue='1.1.1.1', StepValue='0.0.0.1', CountValue=100)
+       batch.node(trafficItem).add('EndpointSet', Sources=topology1, Destinations=topology2)
+"""
+
+import os, re, sys
+from collections import OrderedDict
+
+from batchSelect import selectUrl, importConfig, lowerCamel, stringTypes
+
+_thisFile = os.path.splitext(os.path.abspath(__file__))[0]
+
+
+def _origin():
+    """The file and line outside of this module that made the current call"""
+    frame = sys._getframe(1)
+    while frame is not None and os.path.splitext(os.path.abspath(frame.f_code.co_filename))[0] == _thisFile:
+        frame = frame.f_back
+    if frame is None:
+        return 'unknown'
+    return '{}:{}'.format(frame.f_code.co_filename, frame.f_lineno)
+
+
+class WriteBatchError(Exception):
+    def __init__(self, failures):
+        """
+        Parameters
+            failures: (list): [{'origin': 'file:line', 'xpath', 'attributes', 'error'}]
+        """
+        self.failures = failures
+        super(WriteBatchError, self).__init__('WriteBatch: {} writes failed:\n{}'.format(len(failures), '\n'.join(
+            '\t{}: {} {}: {}'.format(failure['origin'], failure['xpath'], failure['attributes'], failure['error'])
+            for failure in failures)))
+
+
+class BatchNode(object):
+    """
+    A node written to in a WriteBatch: a node with an href, a child of a node such as
+    child('FrameSize'), or a node added in the batch.
+    """
+    def __init__(self, batch, href=None, parent=None, childName=None, index=None, added=False):
+        object.__setattr__(self, '_batch', batch)
+        object.__setattr__(self, 'href', href)
+        object.__setattr__(self, '_parent', parent)
+        object.__setattr__(self, '_childName', childName)
+        object.__setattr__(self, '_index', index)
+        object.__setattr__(self, '_added', added)
+
+    def __setattr__(self, name, value):
+        self._batch._write(self, {lowerCamel(name): value}, _origin())
+
+    def update(self, **attributes):
+        """Write several attributes, like restpy update()"""
+        self._batch._write(self, dict((lowerCamel(name), value) for name, value in attributes.items()), _origin())
+        return self
+
+    def child(self, name, index=None):
+        """A singleton child of this node, such as child('FrameSize'), or child('Stack', 2) in a list of children"""
+        return BatchNode(self._batch, parent=self, childName=lowerCamel(name), index=index)
+
+    def add(self, name, **attributes):
+        """Add a child node with its attributes, like restpy add(). Return the added BatchNode"""
+        if self.href is None and not self._added:
+            raise ValueError('add() needs a node with an href or a node added in the batch')
+        node = BatchNode(self._batch, parent=self, childName=lowerCamel(name), added=True)
+        self._batch._write(node, dict((lowerCamel(key), value) for key, value in attributes.items()), _origin())
+        return node
+
+
+class WriteBatch(object):
+    def __init__(self, uhd, logger=None):
+        """
+        Parameters
+            uhd: The session.Ixnetwork object.
+            logger: An object with an info() method. Defaults to uhd.
+        """
+        self._uhd = uhd
+        self._logger = logger if logger is not None else uhd
+        # [(BatchNode, {attribute: value}, origin)] in the order they were made
+        self._writes = []
+        # {parent href, or id of an added parent: {childName: number added}}
+        self._addCounts = {}
+
+    def node(self, node):
+        """A BatchNode for an href, a restpy object or a BatchNode"""
+        if isinstance(node, BatchNode):
+            return node
+        return BatchNode(self, href=getattr(node, 'href', node))
+
+    def nodes(self, nodes):
+        """A BatchNode per node of a restpy object that holds several nodes, such as the result of find()"""
+        return [self.node(node) for node in nodes]
+
+    def _write(self, node, attributes, origin):
+        if node._added and node._index is None:
+            # The position among the children added to the same parent in this batch
+            parent = node._parent
+            counts = self._addCounts.setdefault(parent.href if parent.href is not None else id(parent), {})
+            counts[node._childName] = counts.get(node._childName, 0) + 1
+            object.__setattr__(node, '_index', counts[node._childName])
+        self._writes.append((node, attributes, origin))
+
+    def __len__(self):
+        return len(self._writes)
+
+    def _baseNode(self, node):
+        """The nearest node with an href, the node itself or an ancestor"""
+        while node.href is None:
+            node = node._parent
+        return node
+
+    def _resolve(self, writes):
+        """Read the xpaths and the child counts with one select. Return ({href: xpath}, {(href, childName): count})"""
+        hrefs = OrderedDict()
+        for node, attributes, origin in writes:
+            base = self._baseNode(node)
+            children = hrefs.setdefault(base.href, set())
+            if node._added and node._parent is base:
+                children.add(node._childName)
+            for value in attributes.values():
+                for reference in (value if isinstance(value, (list, tuple)) else [value]):
+                    href = self._referenceHref(reference)
+                    if href is not None:
+                        hrefs.setdefault(href, set())
+
+        selects = [{'from': href, 'properties': [],
+                    'children': [{'child': '^({})$'.format('|'.join(sorted(children))), 'properties': [], 'filters': []}] if children else [],
+                    'inlines': []} for href, children in hrefs.items()]
+        responses = self._uhd._connection._execute(selectUrl(list(hrefs)[0], xpath=True), {'selects': selects})
+        xpaths = {}
+        childCounts = {}
+        for (href, children), response in zip(hrefs.items(), responses):
+            xpaths[href] = response['xpath']
+            for childName in children:
+                childCounts[(href, childName)] = len(response.get(childName, []))
+        return xpaths, childCounts
+
+    def _referenceHref(self, value):
+        if isinstance(value, BatchNode):
+            return self._baseNode(value).href
+        if isinstance(value, stringTypes):
+            return value if re.match('/api/v[0-9]+/sessions/[0-9]+/ixnetwork', value) else None
+        return getattr(value, 'href', None)
+
+    def _xpath(self, node, xpaths, childCounts):
+        if node.href is not None:
+            return xpaths[node.href]
+        parentXpath = self._xpath(node._parent, xpaths, childCounts)
+        index = node._index
+        if node._added and node._parent.href is not None:
+            index += childCounts.get((node._parent.href, node._childName), 0)
+        return '{}/{}'.format(parentXpath, node._childName) + ('[{}]'.format(index) if index is not None else '')
+
+    def _value(self, value, xpaths, childCounts):
+        if isinstance(value, (list, tuple)):
+            return [self._value(each, xpaths, childCounts) for each in value]
+        if isinstance(value, BatchNode):
+            return self._xpath(value, xpaths, childCounts)
+        href = self._referenceHref(value)
+        return xpaths[href] if href is not None else value
+
+    def flush(self):
+        """
+        Description
+            Send the recorded writes and adds, and start a new batch.
+
+        Return
+            The number of nodes written to.
+        """
+        if len(self._writes) == 0:
+            return 0
+        writes, self._writes, self._addCounts = self._writes, [], {}
+        xpaths, childCounts = self._resolve(writes)
+
+        # Consecutive writes to one node are merged. A node written to again after another node gets
+        # a new entry, so that the server applies the writes in the order they were made.
+        config = []
+        resolved = []
+        for node, attributes, origin in writes:
+            xpath = self._xpath(node, xpaths, childCounts)
+            values = dict((name, self._value(value, xpaths, childCounts)) for name, value in attributes.items())
+            if len(config) > 0 and config[-1]['xpath'] == xpath:
+                config[-1].update(values)
+            else:
+                entry = {'xpath': xpath}
+                entry.update(values)
+                config.append(entry)
+            resolved.append((node, xpath, values, origin))
+
+        try:
+            importConfig(self._uhd, config)
+        except Exception as errMsg:
+            raise WriteBatchError(self._failures(resolved, errMsg))
+        nodeCount = len(set(entry['xpath'] for entry in config))
+        self._logger.info('WriteBatch: Wrote {} nodes with {} writes in 2 requests'.format(nodeCount, len(writes)))
+        return nodeCount
+
+    def _failures(self, resolved, errMsg):
+        """The writes that an importConfig error is about"""
+        message = str(errMsg)
+        failures = [{'origin': origin, 'xpath': xpath, 'attributes': values, 'error': message}
+                    for node, xpath, values, origin in resolved if re.search(re.escape(xpath) + '(?!/)', message)]
+        if len(failures) > 0:
+            return failures
+
+        # The error names no xpath: any write of the batch can be the one
+        return [{'origin': origin, 'xpath': xpath, 'attributes': values, 'error': message}
+                for node, xpath, values, origin in resolved]
+
+    def discard(self):
+        self._writes = []
+        self._addCounts = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.flush()
+        else:
+            self.discard()